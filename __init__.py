@@ -54,6 +54,14 @@ except Exception:
     except Exception:
         GetTempo = None
 
+try:
+    from .src.resample import AudioResample
+except Exception:
+    try:
+        from src.resample import AudioResample
+    except Exception:
+        AudioResample = None
+
 
 NODE_CLASS_MAPPINGS = {}
 if AudioSeparation:
@@ -70,3 +78,5 @@ if TimeShift:
     NODE_CLASS_MAPPINGS["AudioSpeedShift"] = TimeShift
 if GetTempo:
     NODE_CLASS_MAPPINGS["AudioGetTempo"] = GetTempo
+if AudioResample:
+    NODE_CLASS_MAPPINGS["AudioResample"] = AudioResample
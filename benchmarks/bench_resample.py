@@ -0,0 +1,61 @@
+"""Speed and exactness of ChunkResampler against torchaudio's Resample.
+
+For each rate pair, resamples a random batched signal three ways and reports the median time:
+
+* ``full``: one ``Resample`` call on the whole signal (the numerical reference),
+* ``split``: the previous ChunkResampler path, ``Resample`` on every chunk followed by ``cat``,
+* ``stream``: ``ChunkResampler``, which carries filter context between chunks.
+
+Alongside the times it prints the largest absolute difference of ``split`` and ``stream`` from
+``full``; the split path shows the seams it leaves at chunk boundaries.
+
+    python benchmarks/bench_resample.py --seconds 60 --batch 2
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import torch
+from _common import timed
+from torchaudio.transforms import Resample
+
+from src.resample import ChunkResampler
+
+RATE_PAIRS = [(48000, 44100), (44100, 48000), (44100, 46000), (32000, 31000)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--batch", type=int, default=2)
+    parser.add_argument("--chunk-seconds", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = ("rates", "full s", "split s", "stream s", "speedup", "split err", "stream err")
+    print("{:>15} {:>8} {:>8} {:>9} {:>8} {:>10} {:>10}".format(*header))
+    for orig, new in RATE_PAIRS:
+        resampler = ChunkResampler(orig, new, chunk_size_seconds=args.chunk_seconds)
+        resample = Resample(resampler.orig_freq, resampler.new_freq)
+        waveform = torch.randn(args.batch, 2, int(args.seconds * orig))
+        chunk_frames = int(orig * resampler.chunk_size_seconds)
+
+        def split(resample=resample, waveform=waveform, chunk_frames=chunk_frames):
+            return torch.cat([resample(chunk) for chunk in torch.split(waveform, chunk_frames, dim=-1)], dim=-1)
+
+        full_time, reference = timed(lambda resample=resample, waveform=waveform: resample(waveform), args.repeat)
+        split_time, split_out = timed(split, args.repeat)
+        stream_time, stream_out = timed(lambda resampler=resampler, waveform=waveform: resampler(waveform), args.repeat)
+
+        split_err = (split_out - reference).abs().max().item() if split_out.shape == reference.shape else float("nan")
+        stream_err = (stream_out - reference).abs().max().item()
+        print(
+            f"{orig:>7}->{new:<7} {full_time:8.3f} {split_time:8.3f} {stream_time:9.3f} "
+            f"{split_time / stream_time:7.2f}x {split_err:10.2e} {stream_err:10.2e}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
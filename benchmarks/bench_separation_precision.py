@@ -0,0 +1,103 @@
+"""Throughput and quality of the AudioSeparation precision options.
+
+Separates a synthetic four-stem mix with every requested precision and reports, per precision,
+the median separation time, the real-time factor, the SDR of each stem against the fp32 stems,
+and the SDR change against the ground-truth stems relative to fp32.
+
+    python benchmarks/bench_separation_precision.py --precisions fp32 int8 --seconds 30
+
+Exits with status 1 when a precision agrees with fp32 by less than ``--min-sdr`` dB on any stem,
+so it can be used as a quality-regression check. ``--random-weights`` skips the checkpoint
+download and only measures speed and agreement with fp32.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import torch
+from _common import sdr, synthetic_stems, timed
+from torchaudio.models import hdemucs_high
+from torchaudio.pipelines import HDEMUCS_HIGH_MUSDB_PLUS
+
+from src.separation import AudioSeparation
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8"])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--chunk-length", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-sdr", type=float, default=20.0)
+    parser.add_argument("--random-weights", action="store_true")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    bundle = HDEMUCS_HIGH_MUSDB_PLUS
+    sample_rate = bundle.sample_rate
+    node = AudioSeparation()
+
+    if args.random_weights:
+        torch.manual_seed(0)
+        base = hdemucs_high(sources=["drums", "bass", "other", "vocals"]).eval()
+    else:
+        base = bundle.get_model().eval()
+
+    stems = synthetic_stems(args.seconds, sample_rate)
+    mix = sum(stems.values())
+    ref = mix.mean(0)
+    normalized = ((mix - ref.mean()) / ref.std())[None].to(device)
+
+    def separate(model, autocast_dtype):
+        out = node.separate_sources(
+            model,
+            normalized,
+            sample_rate,
+            segment=args.chunk_length,
+            device=device,
+            autocast_dtype=autocast_dtype,
+        )[0].cpu()
+        out = out * ref.std() + ref.mean()
+        return dict(zip(model.sources, out))
+
+    results = {}
+    for precision in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+        dtype = node.resolve_precision(precision, device)
+        model = base.to(device)
+        if dtype == torch.qint8:
+            model = node.quantize_model(base)
+        elif dtype is not None:
+            model = hdemucs_high(sources=base.sources).eval()
+            model.load_state_dict(base.state_dict())
+            model = model.to(device, dtype)
+        autocast_dtype = dtype if dtype in (torch.bfloat16, torch.float16) else None
+        elapsed, separated = timed(lambda m=model, a=autocast_dtype: separate(m, a), repeat=args.repeat)
+        results[precision] = (elapsed, separated)
+
+    fp32_time, fp32_stems = results["fp32"]
+    failed = False
+    print(f"{args.seconds:.0f} s synthetic mix, chunk {args.chunk_length} s, device {device}")
+    print(f"{'precision':<10}{'time (s)':>10}{'RTF':>8}{'speedup':>9}  stem      SDR vs fp32  dSDR vs truth")
+    for precision, (elapsed, separated) in results.items():
+        for i, name in enumerate(["bass", "drums", "other", "vocals"]):
+            agreement = sdr(fp32_stems[name], separated[name])
+            delta = sdr(stems[name], separated[name]) - sdr(stems[name], fp32_stems[name])
+            head = (
+                f"{precision:<10}{elapsed:>10.2f}{elapsed / args.seconds:>8.3f}{fp32_time / elapsed:>8.2f}x"
+                if i == 0
+                else " " * 37
+            )
+            print(f"{head}  {name:<8}{agreement:>12.1f}{delta:>+15.2f}")
+            if precision != "fp32" and agreement < args.min_sdr:
+                failed = True
+
+    if failed:
+        print(f"FAIL: a precision agrees with fp32 by less than {args.min_sdr} dB")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Speed and accuracy of the tempo analysis at different analysis rates.
+
+Estimates the tempo of synthetic stereo click tracks (see ``_common.click_track``) at each
+input sample rate, analysing either the full-rate mix or the mix decimated to an analysis rate
+(see ``src.tempo.downmix_decimate``). For each setting it prints the throughput as a multiple
+of real time and the mean and worst absolute BPM error over the fixture tempos.
+
+    python benchmarks/bench_tempo.py --seconds 120 --sample-rates 44100 48000
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import torch
+from _common import click_track, timed
+
+from src.tempo import analyze_tempo
+
+FIXTURE_BPMS = (72.0, 90.0, 96.0, 110.0, 120.0, 128.0, 140.0, 174.0)
+
+
+def estimate(batch: torch.Tensor, sample_rate: int, analysis_rate: int | None) -> torch.Tensor:
+    """BPM of each track of *batch*, analysed one at a time as Get Tempo does."""
+    return torch.stack([analyze_tempo(item, sample_rate, analysis_rate=analysis_rate).bpm for item in batch])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[44100, 48000])
+    parser.add_argument("--analysis-rates", type=int, nargs="+", default=[22050, 11025])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = ("rate", "analysis", "x realtime", "mean err", "max err")
+    print("{:>6} {:>9} {:>11} {:>9} {:>8}".format(*header))
+    for sample_rate in args.sample_rates:
+        batch = torch.stack([click_track(bpm, args.seconds, sample_rate, seed=i) for i, bpm in enumerate(FIXTURE_BPMS)])
+        for analysis_rate in [None, *args.analysis_rates]:
+            seconds, bpm = timed(lambda a=analysis_rate, b=batch, sr=sample_rate: estimate(b, sr, a), args.repeat)
+            errors = (bpm - torch.tensor(FIXTURE_BPMS)).abs()
+            label = "full" if analysis_rate is None else str(analysis_rate)
+            realtime = len(FIXTURE_BPMS) * args.seconds / seconds
+            print(
+                f"{sample_rate:6d} {label:>9} {realtime:11.1f} {errors.mean().item():9.2f} {errors.max().item():8.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
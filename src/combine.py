@@ -3,7 +3,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import comfy.model_management
-from torchaudio.transforms import Resample
+
+from .resample_cache import RESAMPLE_CACHE
 
 if TYPE_CHECKING:
     import torch
@@ -51,11 +52,11 @@ class AudioCombine:
         if input_sample_rate_1 != input_sample_rate_2:
             device: torch.device = comfy.model_management.get_torch_device()
             if input_sample_rate_1 < input_sample_rate_2:
-                resample = Resample(input_sample_rate_1, input_sample_rate_2).to(device)
+                resample = RESAMPLE_CACHE.get(input_sample_rate_1, input_sample_rate_2, device)
                 waveform_1: torch.Tensor = resample(waveform_1.to(device))
                 output_sample_rate = input_sample_rate_2
             else:
-                resample = Resample(input_sample_rate_2, input_sample_rate_1).to(device)
+                resample = RESAMPLE_CACHE.get(input_sample_rate_2, input_sample_rate_1, device)
                 waveform_2: torch.Tensor = resample(waveform_2.to(device))
                 output_sample_rate = input_sample_rate_1
             waveform_1 = waveform_1.to("cpu")
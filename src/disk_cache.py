@@ -0,0 +1,82 @@
+"""Size-bounded directories of ``.pt`` files shared by the stem and tempo caches."""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from typing import TYPE_CHECKING, Any
+
+import torch
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".pt"
+
+
+def load_entry(path: Path, label: str) -> Any | None:
+    """Return the entry stored at *path* and mark it as most recently used.
+
+    Returns ``None`` when there is no file; an unreadable file is logged as a *label* entry,
+    deleted and also reported as a miss.
+    """
+    if not path.is_file():
+        return None
+    try:
+        entry = torch.load(path, map_location="cpu", weights_only=True)
+    except Exception as e:
+        logger.warning("Discarding unreadable %s entry %s: %s", label, path.name, e)
+        path.unlink(missing_ok=True)
+        return None
+    os.utime(path)
+    return entry
+
+
+def save_entry(path: Path, entry: Any, label: str) -> bool:
+    """Write *entry* to *path* atomically, creating its directory; return whether it was written.
+
+    The entry is saved to a hidden temporary file next to *path* and renamed over it, so
+    concurrent readers never see a partial file. Write failures are logged as a *label* entry
+    and ignored.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        torch.save(entry, tmp)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Could not write %s entry %s: %s", label, path.name, e)
+        return False
+    return True
+
+
+def evict_lru(root: Path, max_bytes: int, suffix: str = SUFFIX) -> None:
+    """Delete the least recently used *suffix* files under *root* until they fit *max_bytes*."""
+    entries = []
+    for path in root.glob(f"*{suffix}"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+__all__ = [
+    "SUFFIX",
+    "evict_lru",
+    "load_entry",
+    "save_entry",
+]
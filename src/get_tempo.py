@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from .utils import estimate_tempo
+from .tempo import EXCERPT_SECONDS_TOOLTIP, EXCERPTS_TOOLTIP, TOLERANCE_BPM_TOOLTIP
+from .tempo_cache import TEMPO_CACHE
 
 if TYPE_CHECKING:
     from ._types import AUDIO
@@ -15,20 +16,61 @@ class GetTempo:
             "required": {
                 "audio": ("AUDIO",),
             },
+            "optional": {
+                "excerpts": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 64,
+                        "tooltip": EXCERPTS_TOOLTIP,
+                    },
+                ),
+                "excerpt_seconds": (
+                    "FLOAT",
+                    {
+                        "default": 30.0,
+                        "min": 5.0,
+                        "max": 600.0,
+                        "step": 1.0,
+                        "tooltip": EXCERPT_SECONDS_TOOLTIP,
+                    },
+                ),
+                "tolerance_bpm": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 20.0,
+                        "step": 0.1,
+                        "tooltip": TOLERANCE_BPM_TOOLTIP,
+                    },
+                ),
+            },
         }
 
     FUNCTION = "main"
-    RETURN_TYPES = ("STRING", "FLOAT", "INTEGER")
-    RETURN_NAMES = ("tempo_string", "tempo_float", "tempo_integer")
+    RETURN_TYPES = ("STRING", "FLOAT", "INTEGER", "FLOAT", "STRING")
+    RETURN_NAMES = ("tempo_string", "tempo_float", "tempo_integer", "confidence", "tempo_curve")
     CATEGORY = "audio"
-    DESCRIPTION = "Get the tempo (BPM) of audio using onset detection."
+    DESCRIPTION = "Get the tempo (BPM) of audio using onset detection. Also outputs a confidence between 0 (no steady beat found) and 1 (a steady pulse); audio without any beat to measure, such as silence, reports 120 BPM with a confidence of exactly 0. Long tracks can be analysed from a few excerpts instead of in full. tempo_curve lists the local tempo over time as 'seconds,bpm' lines, one every ~2 s; it is empty when excerpts are used."  # noqa: E501
 
     def main(
         self,
         audio: AUDIO,
-    ) -> tuple[AUDIO, AUDIO]:
+        excerpts: int = 0,
+        excerpt_seconds: float = 30.0,
+        tolerance_bpm: float = 0.0,
+    ) -> tuple[str, float, int, float, str]:
         waveform = audio["waveform"].squeeze(0)
         sample_rate = audio["sample_rate"]
-        tempo = estimate_tempo(waveform, sample_rate)
+        if excerpts:
+            estimate = TEMPO_CACHE.analyze(waveform, sample_rate, excerpts, excerpt_seconds, tolerance_bpm or None)
+            curve = ""
+        else:
+            estimate, tempo_curve = TEMPO_CACHE.curve(waveform, sample_rate)
+            points = zip(tempo_curve.times.tolist(), tempo_curve.bpm.tolist())
+            curve = "\n".join(f"{seconds:.2f},{bpm:.2f}" for seconds, bpm in points)
+        tempo = max(float(estimate.bpm), 1.0)
 
-        return (f"{int(round(tempo))}", tempo, int(tempo))
+        return (f"{int(round(tempo))}", tempo, int(tempo), float(estimate.confidence), curve)
@@ -0,0 +1,154 @@
+"""
+Process-wide cache for pretrained models used by the audio nodes.
+
+ComfyUI has no API for registering a custom model cache with its memory management, so
+`install_comfy_hooks` wraps ``comfy.model_management.free_memory`` and ``unload_all_models``
+in place: the wrappers release cached models (and the resampling kernels of
+`resample_cache.RESAMPLE_CACHE`) and then call the original functions. Each
+function is wrapped once per process; the wrapper dispatches to one hook per module name, so
+re-importing this module (e.g. when ComfyUI reloads custom nodes) replaces its hooks instead
+of stacking another wrapper.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable
+
+import comfy.model_management
+
+if TYPE_CHECKING:
+    import torch
+
+    from .resample_cache import ResampleCache
+
+
+class ModelCache:
+    """
+    LRU cache of loaded models keyed by ``(bundle, device, dtype)``.
+
+    Loading a pipeline bundle deserializes the checkpoint and copies every weight to the
+    compute device, so the cache keeps the most recently used models resident and evicts the
+    least recently used one once ``max_entries`` is exceeded. Entries hold a reference to their
+    bundle so the ``id()`` used in the key cannot be recycled while the entry is alive.
+
+    """
+
+    DEFAULT_MAX_ENTRIES = 2
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[Any, torch.nn.Module]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(bundle: Any, device: Any, dtype: Any = None) -> tuple:
+        return (id(bundle), str(device), str(dtype))
+
+    def get_or_load(
+        self,
+        bundle: Any,
+        device: Any,
+        loader: Callable[[], torch.nn.Module],
+        dtype: Any = None,
+    ) -> torch.nn.Module:
+        """Return the cached model for the key, calling *loader* to build it on a miss.
+
+        Exceptions raised by *loader* propagate and nothing is cached.
+        """
+        key = self.make_key(bundle, device, dtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is bundle:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            model = loader()
+            install_comfy_hooks(self)
+            self._entries[key] = (bundle, model)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return model
+
+    def evict_device(self, device: Any) -> int:
+        """Drop every model resident on *device*. Returns the number of evicted entries."""
+        device = str(device)
+        with self._lock:
+            keys = [key for key in self._entries if key[1] == device]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+HOOKS_ATTRIBUTE = "_audio_model_cache_hooks"
+
+_HOOKED_CACHES: weakref.WeakSet[ModelCache | ResampleCache] = weakref.WeakSet()
+
+
+def _register(name: str, hook: Callable[..., None]) -> None:
+    """Run *hook* before ``comfy.model_management.<name>``, wrapping the function only once."""
+    original = getattr(comfy.model_management, name, None)
+    if original is None:
+        return
+    hooks = getattr(original, HOOKS_ATTRIBUTE, None)
+    if hooks is None:
+        hooks = {}
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            for before in list(hooks.values()):
+                before(*args, **kwargs)
+            return original(*args, **kwargs)
+
+        setattr(wrapper, HOOKS_ATTRIBUTE, hooks)
+        setattr(comfy.model_management, name, wrapper)
+    hooks[__name__] = hook
+
+
+def _on_free_memory(memory_required, device, *args, **kwargs):
+    get_free_memory = getattr(comfy.model_management, "get_free_memory", None)
+    if get_free_memory is not None and get_free_memory(device) >= memory_required:
+        return
+    for cache in list(_HOOKED_CACHES):
+        cache.evict_device(device)
+
+
+def _on_unload_all_models(*args, **kwargs):
+    for cache in list(_HOOKED_CACHES):
+        cache.clear()
+
+
+def install_comfy_hooks(cache: ModelCache | ResampleCache) -> None:
+    """Release the entries of *cache* when ComfyUI frees memory or unloads all models.
+
+    ``free_memory`` is called before every model load, so the cache is only evicted when the
+    device does not already have ``memory_required`` bytes available; then every entry of
+    *cache* on that device is dropped with ``evict_device``. Safe to call repeatedly; the cache
+    is only referenced weakly.
+    """
+    _HOOKED_CACHES.add(cache)
+    _register("free_memory", _on_free_memory)
+    _register("unload_all_models", _on_unload_all_models)
+
+
+MODEL_CACHE = ModelCache()
+
+
+__all__ = [
+    "MODEL_CACHE",
+    "ModelCache",
+    "install_comfy_hooks",
+]
@@ -1,10 +1,45 @@
 from __future__ import annotations
 
+import functools
+import logging
 import math
+import sys
+from fractions import Fraction
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import comfy.model_management
 import torch
-from torchaudio.transforms import Resample
+
+from .resample_cache import RESAMPLE_CACHE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from ._types import AUDIO
+
+logger = logging.getLogger(__name__)
+
+
+class ResamplePlan(NamedTuple):
+    """Kernel size, cost and chunking chosen by `ChunkResampler.make_plan` for one rate pair."""
+
+    sample_rate: float  # input frames per second
+    target_freq: float  # requested output rate after clamping and tolerance
+    planned_freq: float  # output rate the kernel implements; differs from target_freq when snapped
+    snapped: bool
+    orig_freq: int  # reduced input term of the ratio, the stride of the polyphase filter
+    new_freq: int  # reduced output term of the ratio, the number of filter phases
+    kernel_width: int  # one-sided filter context in input frames
+    taps: int  # 2 * kernel_width + orig_freq
+    kernel_bytes: int
+    chunk_size_seconds: int
+    chunk_bytes: int  # working memory per signal row for one chunk
+    macs_per_second: float  # multiply-adds per second of input per signal row
+
+    def expected_seconds(self, frames: int, rows: int = 1) -> float:
+        """Rough wall time to resample *rows* signals of *frames* input frames each."""
+        macs = frames * rows * self.new_freq / self.orig_freq * self.taps
+        return macs / ChunkResampler.ASSUMED_MACS_PER_SECOND
 
 
 class ChunkResampler:
@@ -18,11 +53,35 @@ class ChunkResampler:
     a large GCD between the sample and resample rate will result in a simplification that allows
     for a smaller kernel and faster kernel computation.
 
+    chunks are resampled with the polyphase kernel of the cached `Resample` transform, carrying
+    the filter context from one chunk to the next (see `stream`), so the output is identical to
+    resampling the whole signal at once while only one chunk of intermediates is alive at a time.
+
+    the kernel holds ``new' * (2 * width + orig')`` values for the reduced ratio ``orig':new'``, so
+    a rate pair with a small GCD (e.g. 44100 -> 44101) would need gigabytes. `make_plan` sizes the
+    kernel before it is built: the exact rate is used whenever its kernel fits ``MAX_KERNEL_BYTES``,
+    otherwise it is snapped to the nearest rate within ``tolerance`` whose kernel fits, and a
+    `ValueError` is raised when there is none. The chunk size comes from ``CHUNK_MEMORY_BYTES``;
+    the result is kept in ``self.plan`` for inspection.
+
     """
 
+    # Below this many output phases a strided conv1d beats unfold + matmul.
+    MATMUL_MIN_PHASES = 8
+
     DEFAULT_UPPER_CLAMP = 1.1832
     DEFAULT_LOWER_CLAMP = 0.945
 
+    MAX_KERNEL_BYTES = 32 * 1024**2
+    # Relative change of a clamped target rate the planner may make to fit the kernel; clamping
+    # already replaced the requested rate, so this applies even when `tolerance` is 0.
+    SNAP_TOLERANCE = 0.01
+    # Widest tolerance an oversized-kernel error suggests; the Audio Resample node allows up to 5%.
+    MAX_SUGGESTED_TOLERANCE = 0.05
+    CHUNK_MEMORY_BYTES = 256 * 1024**2
+    # Throughput assumed by `ResamplePlan.expected_seconds`; a few cores of a desktop CPU.
+    ASSUMED_MACS_PER_SECOND = 2e9
+
     def __init__(
         self,
         orig_freq: int | float,
@@ -31,6 +90,7 @@ class ChunkResampler:
         tolerance: float = 0.0,
         upper_clamp: float | None = None,
         lower_clamp: float | None = None,
+        filter_params: dict[str, Any] | None = None,
     ):
         if orig_freq <= 0 or new_freq <= 0:
             raise ValueError("Frequencies must be positive.")
@@ -46,70 +106,267 @@ class ChunkResampler:
 
         self.orig_freq = orig_freq
         self.new_freq = new_freq
+        self.input_sample_rate = orig_freq
 
-        self.chunk_size_seconds = int(chunk_size_seconds)
         change_ratio = new_freq / orig_freq
+        clamped = change_ratio > uc or change_ratio < lc
         if change_ratio > uc:
             self.new_freq = self.orig_freq * uc
         elif change_ratio < lc:
             self.new_freq = self.orig_freq * lc
 
-        if tolerance > 0.0:
-            self.new_freq = self._find_optimal_freq(round(self.orig_freq), self.new_freq, tolerance)
+        self.filter_params = dict(filter_params or {})
+        self.plan = self.make_plan(
+            self.orig_freq,
+            self.new_freq,
+            chunk_size_seconds=chunk_size_seconds,
+            tolerance=max(tolerance, self.SNAP_TOLERANCE) if clamped else tolerance,
+            **self.filter_params,
+        )
+        self.chunk_size_seconds = self.plan.chunk_size_seconds
+        self.orig_freq, self.new_freq = self.plan.orig_freq, self.plan.new_freq
+        self.device = comfy.model_management.get_torch_device()
+        self.resample = RESAMPLE_CACHE.get(self.orig_freq, self.new_freq, self.device, **self.filter_params)
 
-        effective_ratio = self.new_freq / self.orig_freq
-        diff = abs(1 - effective_ratio)
-        if diff > 0.08:
-            self.chunk_size_seconds = min(self.chunk_size_seconds, 1)
-        elif diff > 0.002:
-            self.chunk_size_seconds = min(self.chunk_size_seconds, 2)
-        else:
-            self.chunk_size_seconds = min(self.chunk_size_seconds, 4)
+    @property
+    def effective_ratio(self) -> float:
+        """Ratio of output to input frames after clamping, tolerance snapping and reduction."""
+        return self.new_freq / self.orig_freq
 
-        # If the frequencies are float, try to convert to int while
-        # maintaining ratio (https://github.com/pytorch/audio/issues/1487).
-        self.orig_freq, self.new_freq = ChunkResampler.reduce_ratio(self.orig_freq, self.new_freq)
-        self.device = comfy.model_management.get_torch_device()
-        self.resample = Resample(self.orig_freq, self.new_freq).to(self.device)
+    @classmethod
+    def make_plan(
+        cls,
+        orig_freq: int | float,
+        new_freq: int | float,
+        chunk_size_seconds: int = 2,
+        tolerance: float = 0.0,
+        lowpass_filter_width: int = 6,
+        rolloff: float = 0.99,
+        **filter_params: Any,
+    ) -> ResamplePlan:
+        """Size the resampling kernel for ``orig_freq -> new_freq`` before building it.
+
+        The exact ratio is used whenever its kernel fits ``MAX_KERNEL_BYTES``. Otherwise the target
+        is snapped to the nearest integer rate within *tolerance* whose kernel fits and the snap
+        is logged; with ``tolerance=0``, or when no rate in the band fits, no kernel is planned.
+        The chunk size is the largest whole number of seconds, at most *chunk_size_seconds*, whose
+        unfolded frames and output fit ``CHUNK_MEMORY_BYTES`` per signal row.
+
+        Args:
+            orig_freq (int | float): input sample rate.
+            new_freq (int | float): requested output rate, already clamped.
+            chunk_size_seconds (int): upper bound for the chunk length.
+            tolerance (float): relative change of *new_freq* the caller allows.
+            lowpass_filter_width (int), rolloff (float): `Resample` filter settings that set the
+                kernel width; other *filter_params* do not change the kernel size.
+
+        Returns:
+            ResamplePlan: the chosen ratio, kernel size, chunk size and cost estimates.
+
+        Raises:
+            ValueError: if no rate within *tolerance* has a kernel that fits ``MAX_KERNEL_BYTES``;
+                the message names the tolerance that would allow the nearest one.
+        """
+        orig, new = cls.reduce_ratio(orig_freq, new_freq)
+        width, taps = _kernel_shape(orig, new, lowpass_filter_width, rolloff)
+        planned_freq = new_freq
+        if new * taps * 4 > cls.MAX_KERNEL_BYTES:
+            exact_bytes = new * taps * 4
+            snapped = None
+            if tolerance > 0.0:
+                snapped = cls._snap_freq(
+                    round(orig_freq), float(new_freq), tolerance, cls.MAX_KERNEL_BYTES, lowpass_filter_width, rolloff
+                )
+            if snapped is not None:
+                orig, new = cls.reduce_ratio(orig_freq, snapped)
+                width, taps = _kernel_shape(orig, new, lowpass_filter_width, rolloff)
+            if snapped is None or new * taps * 4 > cls.MAX_KERNEL_BYTES:
+                raise ValueError(
+                    cls._oversized_kernel_message(orig_freq, new_freq, exact_bytes, lowpass_filter_width, rolloff)
+                )
+            logger.info(
+                "Resampling %g Hz to %g Hz instead of %g Hz; the exact kernel would need %.0f MiB.",
+                orig_freq,
+                snapped,
+                new_freq,
+                exact_bytes / 1024**2,
+            )
+            planned_freq = snapped
+
+        # Unfolded [blocks, taps] input plus [blocks, phases] output, float32, per input second.
+        bytes_per_second = orig_freq * 4 * (taps + new) / orig
+        chunk_seconds = max(1, min(int(chunk_size_seconds), int(cls.CHUNK_MEMORY_BYTES // bytes_per_second)))
+        return ResamplePlan(
+            sample_rate=orig_freq,
+            target_freq=new_freq,
+            planned_freq=planned_freq,
+            snapped=planned_freq != new_freq,
+            orig_freq=orig,
+            new_freq=new,
+            kernel_width=width,
+            taps=taps,
+            kernel_bytes=new * taps * 4,
+            chunk_size_seconds=chunk_seconds,
+            chunk_bytes=math.ceil(chunk_seconds * bytes_per_second),
+            macs_per_second=orig_freq * new / orig * taps,
+        )
+
+    @classmethod
+    def _oversized_kernel_message(
+        cls, orig_freq: float, new_freq: float, kernel_bytes: int, lowpass_filter_width: int, rolloff: float
+    ) -> str:
+        """Explain why ``orig_freq -> new_freq`` cannot be planned and which tolerance would fix it."""
+        message = (
+            f"Resampling {orig_freq:g} Hz to {new_freq:g} Hz needs a {kernel_bytes / 1024**2:.0f} MiB kernel, "
+            f"more than the {cls.MAX_KERNEL_BYTES / 1024**2:.0f} MiB limit"
+        )
+        nearest = cls._snap_freq(
+            round(orig_freq),
+            float(new_freq),
+            cls.MAX_SUGGESTED_TOLERANCE,
+            cls.MAX_KERNEL_BYTES,
+            lowpass_filter_width,
+            rolloff,
+        )
+        if nearest is None:
+            return f"{message}; choose a target rate that shares a larger common divisor with {orig_freq:g} Hz."
+        needed = max(math.ceil(abs(nearest - new_freq) / new_freq * 1000) / 1000, 0.001)
+        return f"{message}; set tolerance to at least {needed:g} to resample to {nearest:g} Hz instead."
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _snap_freq(
+        orig_freq: int,
+        target_freq: float,
+        tolerance: float,
+        max_kernel_bytes: int,
+        lowpass_filter_width: int,
+        rolloff: float,
+    ) -> float | None:
+        """Nearest integer rate to *target_freq* whose kernel fits *max_kernel_bytes*, or ``None``.
+
+        Every candidate's GCD with *orig_freq* is one of its divisors, so the nearest multiple
+        of each divisor on either side of the target covers all kernel sizes reachable in the band.
+        """
+        margin = target_freq * tolerance
+        best = None
+        for divisor in _divisors(orig_freq):
+            below = math.floor(target_freq / divisor) * divisor
+            for candidate in (below, below + divisor):
+                distance = abs(candidate - target_freq)
+                if candidate < 1 or distance > margin or (best is not None and distance >= best[0]):
+                    continue
+                orig, new = ChunkResampler.reduce_ratio(orig_freq, candidate)
+                if new * _kernel_shape(orig, new, lowpass_filter_width, rolloff)[1] * 4 <= max_kernel_bytes:
+                    best = (distance, float(candidate))
+        return None if best is None else best[1]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def _find_optimal_freq(orig_freq: int, target_freq: float, tolerance: float) -> float:
         """Find a frequency near *target_freq* that shares a large GCD with *orig_freq*.
 
-        Searches integer candidates within ``target_freq * (1 ± tolerance)`` and
-        returns the one whose GCD with *orig_freq* is largest, producing a
-        smaller resampling kernel.
+        Considers integer candidates within ``target_freq * (1 ± tolerance)`` (at most ±1000)
+        and returns the one whose GCD with *orig_freq* is largest, producing a smaller
+        resampling kernel. Instead of testing every candidate, the divisors of *orig_freq* are
+        tried from largest to smallest: the first divisor with a multiple inside the band is
+        the largest achievable GCD, and its multiple nearest to the target is returned.
+        Results are memoized per argument tuple.
         """
         target = int(round(target_freq))
         margin = min(int(target * tolerance), 1000)
         lo = max(1, target - margin)
         hi = target + margin
 
-        best_freq = target
-        best_gcd = math.gcd(orig_freq, target)
-
-        for candidate in range(lo, hi + 1):
-            g = math.gcd(orig_freq, candidate)
-            if g > best_gcd:
-                best_gcd = g
-                best_freq = candidate
-
-        return float(best_freq)
+        for divisor in _divisors(orig_freq):
+            if divisor <= math.gcd(orig_freq, target):
+                break
+            below = target // divisor * divisor
+            above = below + divisor
+            candidates = [c for c in (below, above) if lo <= c <= hi]
+            if candidates:
+                return float(min(candidates, key=lambda c: (abs(c - target), c)))
+        return float(target)
 
     def __call__(self, waveform: torch.Tensor) -> torch.Tensor:
         waveform = waveform.to(self.device)
 
         with torch.no_grad():
-            chunks = torch.split(waveform, int(self.orig_freq * self.chunk_size_seconds), dim=-1)
-            resampled_chunks = [self.resample(chunk) for chunk in chunks]
-            resampled_waveform = torch.cat(resampled_chunks, dim=-1)
+            chunk_frames = max(1, int(self.input_sample_rate * self.chunk_size_seconds))
+            chunks = torch.split(waveform, chunk_frames, dim=-1)
+            resampled_waveform = torch.cat(list(self.stream(chunks)), dim=-1)
 
         return resampled_waveform.to("cpu")
 
+    def stream(self, chunks: Iterable[torch.Tensor]) -> Iterator[torch.Tensor]:
+        """
+        Resample consecutive chunks of one signal without seams at the chunk boundaries.
+
+        Each output block of the polyphase filter needs ``width`` input frames of context on
+        either side, so the unconsumed tail of every chunk (plus that context) is carried into
+        the next one and only complete blocks are emitted. After the last chunk the tail is
+        zero-padded exactly like `Resample` pads the end of a signal. All leading dimensions
+        (batch, channels) are resampled together in one call per chunk.
+
+        Args:
+            chunks (Iterable[torch.Tensor]): consecutive pieces ``[..., frames]`` of the signal,
+                all with the same leading dimensions and on the resampler's device.
+
+        Yields:
+            torch.Tensor: resampled pieces ``[..., new_frames]``; their concatenation matches
+            ``Resample(orig_freq, new_freq)`` applied to the concatenated input.
+        """
+        if self.orig_freq == self.new_freq:
+            # `Resample` builds no kernel for a 1:1 ratio and returns its input unchanged.
+            yield from chunks
+            return
+
+        kernel, width, gcd = self.resample.kernel, self.resample.width, self.resample.gcd
+        orig, new = int(self.resample.orig_freq) // gcd, int(self.resample.new_freq) // gcd
+
+        carry = None
+        leading: tuple[int, ...] = ()
+        consumed = emitted = 0
+        for chunk in chunks:
+            leading = tuple(chunk.shape[:-1])
+            chunk = chunk.reshape(-1, chunk.shape[-1]).to(kernel.dtype)
+            if carry is None:
+                carry = chunk.new_zeros((chunk.shape[0], width))
+            buffer = torch.cat([carry, chunk], dim=-1)
+            consumed += chunk.shape[-1]
+
+            blocks = (buffer.shape[-1] - 2 * width) // orig
+            if blocks > 0:
+                out = self._polyphase(buffer[:, : blocks * orig + 2 * width], kernel, orig)
+                emitted += out.shape[-1]
+                yield out.reshape(*leading, -1)
+                buffer = buffer[:, blocks * orig :]
+            carry = buffer
+
+        if carry is None:
+            return
+        target_length = math.ceil(new * consumed / orig)
+        out = self._polyphase(torch.nn.functional.pad(carry, (0, width + orig)), kernel, orig)
+        yield out[:, : target_length - emitted].reshape(*leading, -1)
+
+    @classmethod
+    def _polyphase(cls, padded: torch.Tensor, kernel: torch.Tensor, stride: int) -> torch.Tensor:
+        """Apply the ``[phases, 1, taps]`` kernel every `stride` frames of ``[n, frames]`` input."""
+        if kernel.shape[0] >= cls.MATMUL_MIN_PHASES:
+            frames = padded.unfold(-1, kernel.shape[-1], stride)  # [n, blocks, taps]
+            out = frames @ kernel[:, 0, :].T  # [n, blocks, phases]
+        else:
+            out = torch.nn.functional.conv1d(padded[:, None], kernel, stride=stride).transpose(1, 2)
+        return out.reshape(padded.shape[0], -1)
+
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def reduce_ratio(num1: float | int, num2: float | int) -> tuple[int, int]:
         """Reduces a ratio to its smallest **integer** form.
 
+        Inputs are rounded to one decimal place and the ratio is reduced exactly with
+        `fractions.Fraction`. Results are memoized per argument pair.
+
         Args:
             num1 (int): The numerator.
             num2 (int): The denominator.
@@ -117,37 +374,119 @@ class ChunkResampler:
         Returns:
             Tuple[int, int]: The reduced ratio.
         """
-        originals = (num1, num2)
-        num1 = round(num1, 1)  # increase for more precision
-        num2 = round(num2, 1)
-
-        if isinstance(num1, float) or isinstance(num2, float):
-            while (isinstance(num1, float) and not num1.is_integer()) or (
-                isinstance(num2, float) and not num2.is_integer()
-            ):
-                num1 *= 10
-                num2 *= 10
-
-        scaled_originals = (num1, num2)
-        num1, num2 = int(num1), int(num2)
-
-        if num1 < num2:
-            num1, num2 = num2, num1
-
-        attempts = 0
-        max_attempts = 128 if max(num1, num2) < 200_000 else 32
-        while num2 != 0:
-            if attempts == max_attempts:
-                return int(originals[0]), int(originals[1])
-            num1, num2 = num2, num1 % num2
-            attempts += 1
-
-        gcd = num1
-
-        new_num1 = int(scaled_originals[0] / gcd)
-        new_num2 = int(scaled_originals[1] / gcd)
-
-        if new_num1 > originals[0] or new_num2 > originals[1]:
-            return int(originals[0]), int(originals[1])
-
-        return new_num1, new_num2
+        ratio = Fraction(round(num1 * 10), 10) / Fraction(round(num2 * 10), 10)
+        if ratio.numerator > num1 or ratio.denominator > num2:
+            return int(num1), int(num2)
+        return ratio.numerator, ratio.denominator
+
+
+def _kernel_shape(orig: int, new: int, lowpass_filter_width: int, rolloff: float) -> tuple[int, int]:
+    """``(width, taps)`` of the kernel `torchaudio.transforms.Resample` builds for ``orig:new``."""
+    if orig == new:
+        return 0, 0
+    width = math.ceil(lowpass_filter_width * orig / (min(orig, new) * rolloff))
+    return width, 2 * width + orig
+
+
+@functools.lru_cache(maxsize=256)
+def _divisors(n: int) -> tuple[int, ...]:
+    """Divisors of *n* in descending order."""
+    small = [d for d in range(1, math.isqrt(n) + 1) if n % d == 0]
+    return tuple(sorted({*small, *(n // d for d in small)}, reverse=True))
+
+
+class AudioResample:
+    """Resample audio with `ChunkResampler`, trading filter quality against speed via presets."""
+
+    # Filter settings passed to `torchaudio.transforms.Resample`. "kaiser_fast" and "kaiser_best"
+    # follow the librosa/resampy presets of the same names.
+    PRESETS: dict[str, dict[str, Any]] = {
+        "fast": {"lowpass_filter_width": 4, "rolloff": 0.9, "resampling_method": "sinc_interp_hann"},
+        "balanced": {"lowpass_filter_width": 6, "rolloff": 0.99, "resampling_method": "sinc_interp_hann"},
+        "kaiser_fast": {
+            "lowpass_filter_width": 16,
+            "rolloff": 0.85,
+            "resampling_method": "sinc_interp_kaiser",
+            "beta": 8.555557,
+        },
+        "kaiser_best": {
+            "lowpass_filter_width": 64,
+            "rolloff": 0.9475937167399596,
+            "resampling_method": "sinc_interp_kaiser",
+            "beta": 14.769656459379492,
+        },
+    }
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "audio": ("AUDIO",),
+                "sample_rate": (
+                    "INT",
+                    {
+                        "default": 44100,
+                        "min": 1000,
+                        "max": 384000,
+                        "tooltip": "The target sample rate in Hz.",
+                    },
+                ),
+            },
+            "optional": {
+                "preset": (
+                    list(cls.PRESETS),
+                    {
+                        "default": "balanced",
+                        "tooltip": "Resampling filter. fast uses the shortest kernel; balanced matches torchaudio's default; kaiser_fast and kaiser_best use longer Kaiser-windowed kernels for less aliasing at a higher cost.",  # noqa: E501
+                    },
+                ),
+                "tolerance": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 0.05,
+                        "step": 0.001,
+                        "tooltip": "Allow the target sample rate to move by up to this fraction if that gives a simpler frequency ratio. Simpler ratios need much smaller kernels and resample faster; the rate only moves when the exact one would need an oversized kernel, and the output reports the sample rate that was used. With 0 such rates raise an error naming the tolerance that would allow the nearest usable rate.",  # noqa: E501
+                    },
+                ),
+            },
+        }
+
+    FUNCTION = "main"
+    RETURN_TYPES = ("AUDIO", "FLOAT")
+    RETURN_NAMES = ("audio", "effective_ratio")
+    CATEGORY = "audio"
+    DESCRIPTION = "Resample audio to a new sample rate. Also outputs the effective ratio of output to input frames."
+
+    def main(
+        self,
+        audio: AUDIO,
+        sample_rate: int = 44100,
+        preset: str = "balanced",
+        tolerance: float = 0.0,
+    ) -> tuple[AUDIO, float]:
+        if preset not in self.PRESETS:
+            raise ValueError(f"AudioResample: Unknown preset {preset}. Choose from {', '.join(self.PRESETS)}.")
+
+        waveform: torch.Tensor = audio["waveform"]
+        input_sample_rate: int = audio["sample_rate"]
+        if sample_rate == input_sample_rate:
+            return (audio, 1.0)
+
+        resampler = ChunkResampler(
+            input_sample_rate,
+            sample_rate,
+            tolerance=tolerance,
+            upper_clamp=math.inf,
+            lower_clamp=sys.float_info.min,
+            filter_params=self.PRESETS[preset],
+        )
+        ratio = resampler.effective_ratio
+        return (
+            {
+                "waveform": resampler(waveform),
+                "sample_rate": round(input_sample_rate * ratio),
+            },
+            ratio,
+        )
@@ -0,0 +1,105 @@
+"""Process-wide cache of `torchaudio.transforms.Resample` kernels shared by the audio nodes."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from torchaudio.transforms import Resample
+
+from .model_cache import install_comfy_hooks
+
+if TYPE_CHECKING:
+    import torch
+
+
+class ResampleCache:
+    """
+    Thread-safe LRU cache of `Resample` transforms, bounded by the size of their kernels.
+
+    Building a `Resample` computes its windowed-sinc kernel, which is wasted work when the same
+    conversion (e.g. 48000 -> 44100) runs for every clip of a batch job. Transforms are keyed by
+    ``(orig_freq, new_freq, filter params, device, dtype)``; the kernel is only read in
+    ``forward``, so one instance can be shared between nodes and threads. The least recently used
+    transforms are evicted once their kernels exceed ``max_bytes``, a kernel larger than that is
+    returned without being cached, and the cache is released with the models when ComfyUI frees
+    memory (see `model_cache.install_comfy_hooks`).
+
+    """
+
+    DEFAULT_MAX_BYTES = 128 * 1024**2
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, Resample] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        orig_freq: int | float,
+        new_freq: int | float,
+        device: torch.device | str = "cpu",
+        dtype: torch.dtype | None = None,
+        **filter_params: Any,
+    ) -> Resample:
+        """Return a `Resample` for the conversion on *device*, building it on a miss.
+
+        *filter_params* are passed through to `Resample` (``resampling_method``,
+        ``lowpass_filter_width``, ``rolloff``, ``beta``).
+        """
+        key = (orig_freq, new_freq, tuple(sorted(filter_params.items())), str(device), str(dtype))
+        with self._lock:
+            resample = self._entries.get(key)
+            if resample is not None:
+                self._entries.move_to_end(key)
+                return resample
+
+            resample = Resample(orig_freq, new_freq, **filter_params).to(device)
+            if dtype is not None:
+                resample = resample.to(dtype)
+            size = self.kernel_bytes(resample)
+            if size > self.max_bytes:
+                return resample
+            install_comfy_hooks(self)
+            self._entries[key] = resample
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self.kernel_bytes(evicted)
+            return resample
+
+    @staticmethod
+    def kernel_bytes(resample: Resample) -> int:
+        """Memory held by the kernel of *resample*; a 1:1 `Resample` has none."""
+        kernel = getattr(resample, "kernel", None)
+        return 0 if kernel is None else kernel.numel() * kernel.element_size()
+
+    def evict_device(self, device: torch.device | str) -> int:
+        """Drop every transform on *device*. Returns the number of evicted entries."""
+        device = str(device)
+        with self._lock:
+            keys = [key for key in self._entries if key[3] == device]
+            for key in keys:
+                self._size -= self.kernel_bytes(self._entries.pop(key))
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+RESAMPLE_CACHE = ResampleCache()
+
+
+__all__ = [
+    "RESAMPLE_CACHE",
+    "ResampleCache",
+]
@@ -2,19 +2,30 @@
 
 from __future__ import annotations
 
+import logging
+from contextlib import nullcontext
 from typing import TYPE_CHECKING
 from zipfile import BadZipFile
 
 import comfy.model_management
 import torch
 from torchaudio.pipelines import HDEMUCS_HIGH_MUSDB_PLUS
-from torchaudio.transforms import Fade, Resample
+from torchaudio.transforms import Fade
 
+from .model_cache import MODEL_CACHE
+from .resample_cache import RESAMPLE_CACHE
+from .stem_cache import STEM_CACHE
 from .utils import ensure_stereo
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from torchaudio.pipelines import SourceSeparationBundle
+
     from ._types import AUDIO
 
+logger = logging.getLogger(__name__)
+
 
 class AudioSeparation:
     @classmethod
@@ -50,9 +61,62 @@ class AudioSeparation:
                         "tooltip": "The overlap between each segment (chunk) in seconds. A higher overlap may be necessary if chunks are too short or the audio changes rapidly.",  # noqa: E501
                     },
                 ),
+                "chunk_batch_size": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": 64,
+                        "tooltip": "How many chunks are run through the model together. Values above 1 keep more cores busy and reduce the number of model calls at the cost of memory proportional to the batch size.",  # noqa: E501
+                    },
+                ),
+                "precision": (
+                    ["fp32", "bf16", "fp16", "int8"],
+                    {
+                        "default": "fp32",
+                        "tooltip": "Numeric precision of the model weights and chunk inference. bf16 roughly halves memory traffic on CPUs and GPUs with bfloat16 support; fp16 is only used on CUDA devices; int8 uses a dynamically quantized model and is only used on CPU. Normalization and chunk blending always run in fp32. Falls back to fp32 when the device does not support the selected precision.",  # noqa: E501
+                    },
+                ),
+                "silence_threshold_db": (
+                    "FLOAT",
+                    {
+                        "default": -100.0,
+                        "min": -100.0,
+                        "max": 0.0,
+                        "step": 1.0,
+                        "tooltip": "Windows whose RMS is below this level (in dB relative to the RMS of the whole track) are written as silence without running the model, which speeds up audio with long silent stretches. The number of skipped windows is logged. -100 disables skipping.",  # noqa: E501
+                    },
+                ),
+                "stems": (
+                    "STRING",
+                    {
+                        "default": "bass, drums, other, vocals",
+                        "tooltip": "Comma-separated list of the stems to produce (bass, drums, other, vocals). Stems that are not listed skip blending and copying and are returned as silence, e.g. use 'vocals' for vocal isolation.",  # noqa: E501
+                    },
+                ),
+                "cache_stems": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "Store the separated stems on disk, keyed by a hash of the audio and the separation settings, so separating the same audio again is a file read instead of a model run. Stems are stored as 16-bit floats in ComfyUI's user directory and kept across restarts.",  # noqa: E501
+                    },
+                ),
+                "streaming": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Keep the full track and the separated stems in system memory and only move the chunk being processed to the GPU. Use this for very long recordings that do not fit in VRAM.",  # noqa: E501
+                    },
+                ),
             },
         }
 
+    STEMS = ("bass", "drums", "other", "vocals")
+
+    # Window counts of the last `separate_sources` / `iter_sources` run.
+    total_windows = 0
+    skipped_windows = 0
+
     FUNCTION = "main"
     RETURN_TYPES = ("AUDIO", "AUDIO", "AUDIO", "AUDIO")
     RETURN_NAMES = ("Bass", "Drums", "Other", "Vocals")
@@ -65,13 +129,226 @@ class AudioSeparation:
         chunk_fade_shape: str = "linear",
         chunk_length: float = 10.0,
         chunk_overlap: float = 0.1,
+        chunk_batch_size: int = 1,
+        streaming: bool = False,
+        precision: str = "fp32",
+        stems: str = "bass, drums, other, vocals",
+        cache_stems: bool = True,
+        silence_threshold_db: float = -100.0,
     ) -> tuple[AUDIO, AUDIO, AUDIO, AUDIO]:
+        bundle = HDEMUCS_HIGH_MUSDB_PLUS
+        self.model_sample_rate = bundle.sample_rate
+        selected = self.parse_stems(stems)
+
+        cache_key = None
+        if cache_stems and STEM_CACHE.enabled:
+            cache_key = self.cache_key(
+                audio, chunk_fade_shape, chunk_length, chunk_overlap, precision, stems, silence_threshold_db
+            )
+            cached = STEM_CACHE.get(cache_key)
+            if cached is not None:
+                return self.sources_to_tuple(self.with_silent_stems(cached))
+
         device: torch.device = comfy.model_management.get_torch_device()
+        storage_device = torch.device("cpu") if streaming else device
         waveform: torch.Tensor = audio["waveform"]
-        waveform = waveform.squeeze(0).to(device)
+        if waveform.ndim == 2:
+            waveform = waveform.unsqueeze(0)
+        waveform = waveform.to(storage_device)  # [batch, channels, frames]
         self.input_sample_rate_: int = audio["sample_rate"]
 
+        dtype = self.resolve_precision(precision, device)
+        model = MODEL_CACHE.get_or_load(bundle, device, lambda: self.load_model(bundle, device, dtype), dtype=dtype)
+        source_indices = [i for i, name in enumerate(model.sources) if name in selected]
+
+        waveform = ensure_stereo(waveform)
+        waveform = waveform.float()
+
+        # Resample to model's expected sample rate
+        if self.input_sample_rate_ != self.model_sample_rate:
+            resample = RESAMPLE_CACHE.get(self.input_sample_rate_, self.model_sample_rate, storage_device)
+            waveform = resample(waveform)
+
+        ref = waveform.mean(1, keepdim=True)
+        mean, std, mask = self.normalization_stats(ref, self.valid_lengths(waveform))
+        waveform = (waveform - mean) / std  # Zs
+        if mask is not None:
+            waveform = waveform * mask
+
+        chunk_kwargs = {
+            "segment": chunk_length,
+            "overlap": chunk_overlap,
+            "device": device,
+            "chunk_fade_shape": chunk_fade_shape,
+            "batch_size": chunk_batch_size,
+            "autocast_dtype": dtype if dtype in (torch.bfloat16, torch.float16) else None,
+            "source_indices": source_indices if len(source_indices) < len(model.sources) else None,
+            "silence_threshold": self.silence_threshold(silence_threshold_db),
+        }
+        if streaming:
+            batch, channels, frames = waveform.shape
+            sources = torch.zeros(batch, len(source_indices), channels, frames, device=storage_device)
+            for start, region in self.iter_sources(model, waveform, self.model_sample_rate, **chunk_kwargs):
+                end = start + region.shape[-1]
+                region = region * std[:, None] + mean[:, None]
+                if mask is not None:
+                    region = region * mask[:, None, :, start:end]
+                sources[:, :, :, start:end] = region
+        else:
+            sources = self.separate_sources(
+                model, waveform, self.model_sample_rate, **chunk_kwargs
+            )  # [batch, selected sources, channels, frames]
+            sources = sources * std[:, None] + mean[:, None]
+            if mask is not None:
+                sources = sources * mask[:, None]
+
+        if self.skipped_windows:
+            logger.info(
+                "AudioSeparation: skipped %d of %d silent windows below %.1f dB",
+                self.skipped_windows,
+                self.total_windows,
+                silence_threshold_db,
+            )
+
+        outputs = {model.sources[index]: sources[:, i] for i, index in enumerate(source_indices)}
+        if cache_key is not None:
+            outputs = {name: stem.cpu() for name, stem in outputs.items()}
+            STEM_CACHE.put(cache_key, outputs)
+        return self.sources_to_tuple(self.with_silent_stems(outputs))
+
+    @classmethod
+    def cache_key(
+        cls,
+        audio: AUDIO,
+        chunk_fade_shape: str,
+        chunk_length: float,
+        chunk_overlap: float,
+        precision: str,
+        stems: str,
+        silence_threshold_db: float = -100.0,
+    ) -> str:
+        """
+        Key of the separation result in `STEM_CACHE`.
+
+        Only settings that change the output are part of the key; ``chunk_batch_size`` and
+        ``streaming`` only change how the same windows are scheduled.
+        """
         bundle = HDEMUCS_HIGH_MUSDB_PLUS
+        return STEM_CACHE.make_key(
+            audio["waveform"],
+            audio["sample_rate"],
+            model=getattr(bundle, "_model_path", type(bundle).__name__),
+            chunk_fade_shape=chunk_fade_shape,
+            chunk_length=float(chunk_length),
+            chunk_overlap=float(chunk_overlap),
+            precision=precision,
+            stems=sorted(cls.parse_stems(stems)),
+            silence_threshold=cls.silence_threshold(silence_threshold_db),
+        )
+
+    SILENCE_THRESHOLD_OFF_DB = -100.0
+
+    @classmethod
+    def silence_threshold(cls, silence_threshold_db: float) -> float | None:
+        """Convert the node's dB threshold to a linear RMS on the normalized mix, ``None`` when disabled."""
+        if silence_threshold_db <= cls.SILENCE_THRESHOLD_OFF_DB:
+            return None
+        return 10.0 ** (silence_threshold_db / 20.0)
+
+    @classmethod
+    def with_silent_stems(cls, stems: dict[str, torch.Tensor]) -> dict[str, torch.Tensor]:
+        """Fill in silent outputs for the stems that were not selected."""
+        shape = next(iter(stems.values())).shape
+        return {name: stems[name] if name in stems else torch.zeros(*shape) for name in cls.STEMS}
+
+    @classmethod
+    def parse_stems(cls, stems: str) -> set[str]:
+        """Parse the comma-separated `stems` option. An empty string selects every stem."""
+        selected = {name.strip().lower() for name in stems.split(",") if name.strip()}
+        unknown = selected - set(cls.STEMS)
+        if unknown:
+            raise ValueError(
+                f"AudioSeparation: Unknown stem(s) {', '.join(sorted(unknown))}. Choose from {', '.join(cls.STEMS)}."
+            )
+        return selected or set(cls.STEMS)
+
+    @staticmethod
+    def valid_lengths(waveform: torch.Tensor) -> torch.Tensor:
+        """
+        Number of frames before the trailing zero padding of each item in a batch.
+
+        ComfyUI batches clips of different lengths by right-padding them with zeros, so only
+        items of a batch of several that end in more zeros than the longest item count as
+        padded. A single clip and the longest items keep their full length even when they end
+        in digital silence, and items that are silent throughout count as full length.
+
+        Args:
+            waveform (torch.Tensor): Audio of shape [batch, channels, frames].
+
+        Returns:
+            torch.Tensor: Integer lengths of shape [batch].
+        """
+        frames = waveform.shape[-1]
+        active = waveform.abs().amax(dim=1) > 0  # [batch, frames]
+        lengths = frames - active.flip(-1).int().argmax(dim=-1)
+        return lengths.masked_fill(lengths == lengths.max(), frames)
+
+    @staticmethod
+    def normalization_stats(
+        ref: torch.Tensor, lengths: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor | None]:
+        """
+        Per-item mean and standard deviation of the mono reference, ignoring zero padding.
+
+        Args:
+            ref (torch.Tensor): Mono reference of shape [batch, 1, frames].
+            lengths (torch.Tensor): Valid frames per item, see `valid_lengths`.
+
+        Returns:
+            tuple: ``(mean, std, mask)`` where mean and std have shape [batch, 1, 1] and mask is a
+            [batch, 1, frames] float tensor selecting the unpadded frames, or None when no item
+            is padded.
+        """
+        frames = ref.shape[-1]
+        if bool((lengths == frames).all()):
+            return ref.mean(dim=-1, keepdim=True), ref.std(dim=-1, keepdim=True).clamp_min(1e-8), None
+
+        mask = (torch.arange(frames, device=ref.device) < lengths[:, None, None]).to(ref.dtype)
+        count = lengths[:, None, None].to(ref.dtype)
+        mean = (ref * mask).sum(dim=-1, keepdim=True) / count
+        var = (((ref - mean) * mask) ** 2).sum(dim=-1, keepdim=True) / (count - 1).clamp_min(1)
+        return mean, var.sqrt().clamp_min(1e-8), mask
+
+    @staticmethod
+    def resolve_precision(precision: str, device: torch.device) -> torch.dtype | None:
+        """
+        Map a `precision` option to the dtype used for model weights and autocast.
+
+        Returns:
+            torch.dtype | None: ``torch.bfloat16``, ``torch.float16`` or ``torch.qint8`` (dynamic
+            quantization), or None for fp32 (also used when the device cannot run the requested
+            precision).
+        """
+        if precision == "fp32":
+            return None
+        if precision not in ("bf16", "fp16", "int8"):
+            raise ValueError(f"Unsupported precision: {precision}")
+
+        device_type = _device_type(device)
+        if precision == "bf16" and (device_type == "cpu" or (device_type == "cuda" and torch.cuda.is_bf16_supported())):
+            return torch.bfloat16
+        if precision == "fp16" and device_type == "cuda":
+            return torch.float16
+        if precision == "int8" and device_type == "cpu":
+            return torch.qint8
+
+        logger.warning("AudioSeparation: %s is not supported on %s, falling back to fp32.", precision, device)
+        return None
+
+    @staticmethod
+    def load_model(
+        bundle: SourceSeparationBundle, device: torch.device, dtype: torch.dtype | None = None
+    ) -> torch.nn.Module:
         try:
             model: torch.nn.Module = bundle.get_model()
         except (BadZipFile, RuntimeError) as exc:
@@ -82,48 +359,187 @@ class AudioSeparation:
                 "located in your torch hub cache directory (~/.cache/torch/hub/checkpoints/)."
             ) from exc
         model = model.to(device)
-        self.model_sample_rate = bundle.sample_rate
-
-        waveform = ensure_stereo(waveform)
-        waveform = waveform.float()
+        if dtype is None:
+            return model
+        if dtype == torch.qint8:
+            return AudioSeparation.quantize_model(model)
+        return model.to(dtype)
 
-        # Resample to model's expected sample rate
-        if self.input_sample_rate_ != self.model_sample_rate:
-            resample = Resample(self.input_sample_rate_, self.model_sample_rate).to(device)
-            waveform = resample(waveform)
-
-        ref = waveform.mean(0)
-        waveform = (waveform - ref.mean()) / ref.std()  # Zs
+    @staticmethod
+    def quantize_model(model: torch.nn.Module) -> torch.nn.Module:
+        """
+        Dynamically quantize the Linear and LSTM layers of a CPU model to int8.
 
-        sources = self.separate_sources(
-            model,
-            waveform[None],
-            self.model_sample_rate,
-            segment=chunk_length,
-            overlap=chunk_overlap,
-            device=device,
-            chunk_fade_shape=chunk_fade_shape,
-        )[0]
-        sources = sources * ref.std() + ref.mean()
-        sources_list = model.sources
-        sources = list(sources)
+        Weights are stored as int8 and activations are quantized on the fly, which speeds up
+        the LSTM/attention parts of Hybrid Demucs on CPU. Dynamic quantization has no
+        convolution kernels, so Conv layers stay in fp32.
+        """
+        try:
+            from torch.ao.quantization import quantize_dynamic
+        except ImportError as exc:
+            raise RuntimeError(
+                "int8 precision requires torch.ao.quantization, which is not available in this PyTorch build. "
+                "Use fp32 or bf16 instead."
+            ) from exc
+        return quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
 
-        return self.sources_to_tuple(dict(zip(sources_list, sources)))
+    @staticmethod
+    def _forward(model: torch.nn.Module, chunk: torch.Tensor, autocast_dtype: torch.dtype | None) -> torch.Tensor:
+        """Run the model on a chunk, under autocast when a reduced precision is requested."""
+        autocast = (
+            nullcontext()
+            if autocast_dtype is None
+            else torch.autocast(_device_type(chunk.device), dtype=autocast_dtype)
+        )
+        with torch.no_grad(), autocast:
+            out = model.forward(chunk)
+        return out if autocast_dtype is None else out.float()
 
     def sources_to_tuple(self, sources: dict[str, torch.Tensor]) -> tuple[AUDIO, AUDIO, AUDIO, AUDIO]:
-        output_order = ["bass", "drums", "other", "vocals"]
         outputs = []
-        for source in output_order:
+        for source in self.STEMS:
             if source not in sources:
                 raise ValueError(f"Missing source {source} in the output")
+            waveform = sources[source].cpu()
+            if waveform.ndim == 2:
+                waveform = waveform.unsqueeze(0)
             outputs.append(
                 {
-                    "waveform": sources[source].cpu().unsqueeze(0),
+                    "waveform": waveform,
                     "sample_rate": self.model_sample_rate,
                 }
             )
         return tuple(outputs)
 
+    @staticmethod
+    def plan_chunks(length: int, chunk_len: int, overlap_frames: float) -> list[tuple[int, int, int, int]]:
+        """
+        Lay out the overlapping windows used by `separate_sources`.
+
+        The first window starts at 0 with no fade-in, every following window fades in over the
+        overlap, and the window that reaches the end of the track does not fade out.
+
+        Returns:
+            list[tuple[int, int, int, int]]: ``(start, end, fade_in_len, fade_out_len)`` per window.
+        """
+        windows = []
+        start = 0
+        end = chunk_len
+        fade_in_len = 0
+        fade_out_len = int(overlap_frames)
+        while start < length - overlap_frames:
+            windows.append((start, min(end, length), fade_in_len, fade_out_len))
+            if start == 0:
+                fade_in_len = int(overlap_frames)
+                start += int(chunk_len - overlap_frames)
+            else:
+                start += chunk_len
+            end += chunk_len
+            if end >= length:
+                fade_out_len = 0
+        return windows
+
+    @staticmethod
+    def group_chunks(
+        windows: list[tuple[int, int, int, int]], batch_size: int, isolated: set[int] | None = None
+    ) -> list[list[tuple[int, int, int, int]]]:
+        """Group consecutive windows that share length and fades into batches of at most `batch_size`.
+
+        Windows whose start frame is in `isolated` always form a group of their own.
+        """
+        isolated = isolated or set()
+        groups: list[list[tuple[int, int, int, int]]] = []
+        for window in windows:
+            start, end, fade_in_len, fade_out_len = window
+            if groups and len(groups[-1]) < batch_size and start not in isolated and groups[-1][0][0] not in isolated:
+                g_start, g_end, g_fade_in, g_fade_out = groups[-1][0]
+                if (g_end - g_start, g_fade_in, g_fade_out) == (end - start, fade_in_len, fade_out_len):
+                    groups[-1].append(window)
+                    continue
+            groups.append([window])
+        return groups
+
+    @staticmethod
+    def silent_windows(
+        mix: torch.Tensor, windows: list[tuple[int, int, int, int]], threshold: float | None
+    ) -> set[int]:
+        """
+        Start frames of the windows whose RMS is at or below `threshold` for every batch item.
+
+        The DC offset of each window is removed first, so silence in the normalized mix (a
+        constant ``-mean / std``) and zero padding both count as silent.
+        """
+        if threshold is None:
+            return set()
+        silent = set()
+        for start, end, _, _ in windows:
+            chunk = mix[:, :, start:end]
+            rms = ((chunk - chunk.mean(-1, keepdim=True)) ** 2).mean(dim=(1, 2)).sqrt()
+            if bool((rms <= threshold).all()):
+                silent.add(start)
+        return silent
+
+    def iter_sources(
+        self,
+        model: torch.nn.Module,
+        mix: torch.Tensor,
+        sample_rate: int,
+        segment: float = 10.0,
+        overlap: float = 0.1,
+        device: torch.device = None,
+        chunk_fade_shape: str = "linear",
+        batch_size: int = 1,
+        autocast_dtype: torch.dtype | None = None,
+        source_indices: list[int] | None = None,
+        silence_threshold: float | None = None,
+    ) -> Iterator[tuple[int, torch.Tensor]]:
+        """
+        Streaming counterpart of `separate_sources`.
+
+        Only the windows being processed are moved to `device`; model outputs are moved back to
+        `mix.device` and overlap-added into a buffer that never spans more than one window. As
+        soon as a region can no longer receive contributions from later windows it is yielded, so
+        the caller can write it to a preallocated (or memory-mapped) output and drop it.
+
+        Yields:
+            tuple[int, torch.Tensor]: ``(start, region)`` in order, where region has shape
+            [batch, sources, channels, region_frames] and covers ``start:start + region_frames``.
+        """
+        device = mix.device if device is None else torch.device(device)
+        batch, channels, length = mix.shape
+
+        chunk_len = int(sample_rate * segment * (1 + overlap))
+        overlap_frames = overlap * sample_rate
+        fade = Fade(fade_in_len=0, fade_out_len=int(overlap_frames), fade_shape=chunk_fade_shape)
+        num_sources = len(model.sources) if source_indices is None else len(source_indices)
+
+        windows = self.plan_chunks(length, chunk_len, overlap_frames)
+        silent = self.silent_windows(mix, windows, silence_threshold)
+        self.total_windows, self.skipped_windows = len(windows), len(silent)
+
+        pending = None
+        pending_start = 0
+        for group in self.group_chunks(windows, max(1, batch_size), silent):
+            first_start, first_end, fade.fade_in_len, fade.fade_out_len = group[0]
+            if first_start in silent:
+                out = torch.zeros(batch, num_sources, channels, first_end - first_start, device=mix.device)
+            else:
+                chunks = torch.cat([mix[:, :, start:end] for start, end, _, _ in group], dim=0).to(device)
+                out = self._forward(model, chunks, autocast_dtype)
+                if source_indices is not None:
+                    out = out[:, source_indices]
+                out = fade(out).to(mix.device)
+            for i, (start, _, _, _) in enumerate(group):
+                window = out[i * batch : (i + 1) * batch]
+                if pending is not None:
+                    done = start - pending_start
+                    yield pending_start, pending[:, :, :, :done]
+                    window[:, :, :, : pending.shape[-1] - done] += pending[:, :, :, done:]
+                pending = window
+                pending_start = start
+        if pending is not None:
+            yield pending_start, pending
+
     def separate_sources(
         self,
         model: torch.nn.Module,
@@ -133,6 +549,10 @@ class AudioSeparation:
         overlap: float = 0.1,
         device: torch.device = None,
         chunk_fade_shape: str = "linear",
+        batch_size: int = 1,
+        autocast_dtype: torch.dtype | None = None,
+        source_indices: list[int] | None = None,
+        silence_threshold: float | None = None,
     ) -> torch.Tensor:
         """
         From: https://pytorch.org/audio/stable/tutorials/hybrid_demucs_tutorial.html
@@ -145,31 +565,44 @@ class AudioSeparation:
                 execute the computation, otherwise `mix.device` is assumed.
                 When `device` is different from `mix.device`, only local computations will
                 be on `device`, while the entire tracks will be stored on `mix.device`.
+            batch_size (int): number of equally sized windows stacked into a single forward
+                pass. ``1`` runs the model on one window at a time.
+            autocast_dtype (torch.dtype or None): run the model under autocast with this dtype.
+                Model outputs are cast back to fp32 before fading and accumulation.
+            source_indices (list[int] or None): indices into `model.sources` to keep. Only these
+                sources are faded and accumulated; the result has ``len(source_indices)`` sources.
+            silence_threshold (float or None): windows whose RMS (after removing the DC offset) is at
+                or below this value for every batch item are left as zeros without running the
+                model. Neighbouring windows still fade over the overlap, so the output fades into
+                the silence. The counts are stored in `total_windows` and `skipped_windows`.
         """
         device = mix.device if device is None else torch.device(device)
 
         batch, channels, length = mix.shape
 
         chunk_len = int(sample_rate * segment * (1 + overlap))
-        start = 0
-        end = chunk_len
         overlap_frames = overlap * sample_rate
         fade = Fade(fade_in_len=0, fade_out_len=int(overlap_frames), fade_shape=chunk_fade_shape)
 
-        final = torch.zeros(batch, len(model.sources), channels, length, device=device)
+        num_sources = len(model.sources) if source_indices is None else len(source_indices)
+        final = torch.zeros(batch, num_sources, channels, length, device=device)
 
-        while start < length - overlap_frames:
-            chunk = mix[:, :, start:end]
-            with torch.no_grad():
-                out = model.forward(chunk)
+        windows = self.plan_chunks(length, chunk_len, overlap_frames)
+        silent = self.silent_windows(mix, windows, silence_threshold)
+        self.total_windows, self.skipped_windows = len(windows), len(silent)
+
+        active = [window for window in windows if window[0] not in silent]
+        for group in self.group_chunks(active, max(1, batch_size)):
+            _, _, fade.fade_in_len, fade.fade_out_len = group[0]
+            chunks = torch.cat([mix[:, :, start:end] for start, end, _, _ in group], dim=0)
+            out = self._forward(model, chunks, autocast_dtype)
+            if source_indices is not None:
+                out = out[:, source_indices]
             out = fade(out)
-            final[:, :, :, start:end] += out
-            if start == 0:
-                fade.fade_in_len = int(overlap_frames)
-                start += int(chunk_len - overlap_frames)
-            else:
-                start += chunk_len
-            end += chunk_len
-            if end >= length:
-                fade.fade_out_len = 0
+            for i, (start, end, _, _) in enumerate(group):
+                final[:, :, :, start:end] += out[i * batch : (i + 1) * batch]
         return final
+
+
+def _device_type(device: torch.device | str) -> str:
+    return getattr(device, "type", None) or str(device).split(":")[0]
@@ -0,0 +1,125 @@
+"""Disk cache for separated stems, keyed by the content of the input audio."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import folder_paths
+import torch
+
+from .disk_cache import evict_lru, load_entry, save_entry
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+
+
+class StemCache:
+    """
+    Size-bounded LRU cache of separation results stored as ``.pt`` files.
+
+    Keys are SHA-256 digests of the waveform bytes plus every parameter that changes the
+    result, so re-running a workflow on the same song is a single file read instead of a full
+    inference pass. Stems are stored as ``STORAGE_DTYPE``, half the size of float32, and come
+    back as float32. ``root`` defaults to a folder of ComfyUI's user directory, which survives
+    restarts unlike the temp directory. Entries are evicted by least recent use once the files
+    under ``root`` exceed ``max_bytes``; ``max_bytes=0`` disables the cache.
+
+    """
+
+    DEFAULT_MAX_BYTES = 4 * 1024**3
+    SUFFIX = ".pt"
+    STORAGE_DTYPE = torch.float16
+
+    def __init__(self, root: str | os.PathLike | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self._root = Path(root) if root is not None else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = Path(folder_paths.get_user_directory()) / "audio_separation_stems"
+        return self._root
+
+    @staticmethod
+    def waveform_digest(waveform: torch.Tensor) -> str:
+        """SHA-256 of the waveform's shape and float32 bytes."""
+        data = waveform.detach().cpu().float().contiguous().numpy()
+        digest = hashlib.sha256()
+        digest.update(repr((tuple(data.shape), str(data.dtype))).encode())
+        digest.update(memoryview(data).cast("B"))
+        return digest.hexdigest()
+
+    def make_key(self, waveform: torch.Tensor, sample_rate: int, **params: Any) -> str:
+        """Return the cache key for separating *waveform* with *params*."""
+        parts = [str(CACHE_FORMAT_VERSION), self.waveform_digest(waveform), str(sample_rate)]
+        parts += [f"{name}={params[name]!r}" for name in sorted(params)]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> dict[str, torch.Tensor] | None:
+        """Return the cached stems for *key*, or ``None`` on a miss or an unreadable entry."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            entry = load_entry(path, "stem cache")
+            if entry is None:
+                return None
+            try:
+                return dict(zip(entry["names"], entry["sources"].float().unbind(1)))
+            except Exception as e:
+                logger.warning("Discarding unreadable stem cache entry %s: %s", path.name, e)
+                path.unlink(missing_ok=True)
+                return None
+
+    def put(self, key: str, stems: Mapping[str, torch.Tensor]) -> None:
+        """Store *stems* (each ``[batch, channels, frames]``) under *key* and evict old entries.
+
+        Write failures are logged and ignored; the cache never fails a separation.
+        """
+        if not self.enabled:
+            return
+        names = list(stems)
+        entry = {
+            "names": names,
+            "sources": torch.stack([stems[name].detach().cpu() for name in names], dim=1).to(self.STORAGE_DTYPE),
+        }
+        path = self._path(key)
+        with self._lock:
+            if save_entry(path, entry, "stem cache"):
+                evict_lru(self.root, self.max_bytes, self.SUFFIX)
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._root is None or not self._root.is_dir():
+                return
+            for path in self._root.glob(f"*{self.SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+
+STEM_CACHE = StemCache()
+
+
+__all__ = [
+    "CACHE_FORMAT_VERSION",
+    "STEM_CACHE",
+    "StemCache",
+]
@@ -0,0 +1,473 @@
+"""Torch-native tempo analysis: decimated onset strength, autocorrelation tempogram and BPM estimate."""
+
+from __future__ import annotations
+
+import functools
+import math
+from typing import NamedTuple
+
+import torch
+import torchaudio.functional as F
+
+# Analysis settings, following librosa's onset_strength / tempo defaults. Onsets are detected on
+# a mono mix decimated by an integer factor to at least ANALYSIS_SAMPLE_RATE; HOP_SIZE and
+# FFT_SIZE are given at REFERENCE_SAMPLE_RATE and scaled to the rate actually analysed, so the
+# onset envelope has about 43 frames per second whatever the rate.
+ANALYSIS_SAMPLE_RATE = 22050
+REFERENCE_SAMPLE_RATE = 22050
+DECIMATION_TAPS_PER_FACTOR = 8
+HOP_SIZE = 512
+FFT_SIZE = 2048
+N_MELS = 128
+TOP_DB = 80.0
+# Onset frames per tempogram window (about 8.9 s) and the tempo search range.
+TEMPOGRAM_FRAMES = 384
+MIN_BPM = 30.0
+MAX_BPM = 320.0
+# Log-normal prior on the tempo: centered on START_BPM, one standard deviation per STD_OCTAVES.
+START_BPM = 120.0
+STD_OCTAVES = 1.0
+# Length of each excerpt when long tracks are analysed from excerpts instead of in full.
+EXCERPT_SECONDS = 30.0
+# Tooltips of the excerpt options shared by the Get Tempo and Tempo Match nodes.
+EXCERPTS_TOOLTIP = "Estimate the tempo from this many evenly spaced excerpts instead of the whole track, which is much faster on long mixes. 0 analyses the whole track; tracks shorter than the excerpts together are always analysed whole."  # noqa: E501
+EXCERPT_SECONDS_TOOLTIP = "Length of each excerpt in seconds."
+TOLERANCE_BPM_TOOLTIP = "Stop analysing excerpts as soon as two successive excerpts agree on the tempo within this many BPM. 0 always analyses every excerpt."  # noqa: E501
+# Tempo curves: width of the prior around the global tempo for each tempogram window, and the
+# number of windows in the running median that removes outliers.
+CURVE_STD_OCTAVES = 0.25
+CURVE_MEDIAN_WINDOWS = 5
+
+
+class TempoEstimate(NamedTuple):
+    """Tempo of each signal in BPM and the confidence in it, both of the input's leading shape.
+
+    The confidence is the normalized autocorrelation of the onset envelope at the estimated beat
+    period: close to 1 for a steady pulse, close to 0 for audio without a periodic onset pattern.
+    It is exactly 0 when there is no beat to measure at all, e.g. in silence; the tempo is then
+    the center of the tempo prior.
+    """
+
+    bpm: torch.Tensor
+    confidence: torch.Tensor
+
+
+class TempoCurve(NamedTuple):
+    """Local tempo of each signal over time, one value per tempogram window.
+
+    ``times`` holds the center of every window in seconds ``[windows]``; ``bpm`` and
+    ``confidence`` have the input's leading shape followed by ``windows``.
+    """
+
+    times: torch.Tensor
+    bpm: torch.Tensor
+    confidence: torch.Tensor
+
+
+@functools.lru_cache(maxsize=16)
+def _onset_tables(
+    sample_rate: float,
+    fft_size: int,
+    n_mels: int,
+    device: torch.device | str = "cpu",
+    dtype: torch.dtype | None = None,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """STFT window ``[fft_size]`` and mel filter bank ``[n_mels, freq]`` of the onset front end."""
+    window = torch.hann_window(fft_size, device=device, dtype=dtype)
+    filters = F.melscale_fbanks(fft_size // 2 + 1, 0.0, sample_rate / 2, n_mels, sample_rate, "slaney", "slaney")
+    return window, filters.T.to(device=device, dtype=dtype)
+
+
+@functools.lru_cache(maxsize=16)
+def _decimation_filter(
+    factor: int, device: torch.device | str = "cpu", dtype: torch.dtype | None = None
+) -> torch.Tensor:
+    """Hann-windowed sinc low-pass ``[1, 1, taps]`` with its cutoff just below the Nyquist of the decimated rate."""
+    taps = DECIMATION_TAPS_PER_FACTOR * factor + 1
+    cutoff = 0.9 / factor  # fraction of the input Nyquist
+    n = torch.arange(taps, dtype=torch.float64) - taps // 2
+    kernel = cutoff * torch.sinc(cutoff * n) * torch.hann_window(taps, periodic=False, dtype=torch.float64)
+    return (kernel / kernel.sum()).to(device=device, dtype=dtype).reshape(1, 1, taps)
+
+
+@functools.lru_cache(maxsize=16)
+def _tempogram_tables(
+    win_length: int, device: torch.device | str = "cpu", dtype: torch.dtype | None = None
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Tempogram window ``[win_length]`` and its own autocorrelation over the lags ``[0, win_length // 2]``."""
+    window = torch.hann_window(win_length, device=device, dtype=dtype)
+    lags = win_length // 2 + 1
+    overlap = torch.stack([(window[: win_length - lag] * window[lag:]).sum() for lag in range(lags)])
+    return window, overlap / overlap[0]
+
+
+def decimation_factor(sample_rate: int, analysis_rate: int | None = ANALYSIS_SAMPLE_RATE) -> int:
+    """Largest integer factor that keeps *sample_rate* at or above *analysis_rate*; 1 if it is ``None``."""
+    if analysis_rate is None:
+        return 1
+    if analysis_rate <= 0:
+        raise ValueError(f"analysis_rate must be positive, got {analysis_rate}.")
+    return max(1, int(sample_rate // analysis_rate))
+
+
+def _frame_sizes(rate: float, hop_size: int, fft_size: int) -> tuple[int, int]:
+    """Hop and FFT size at *rate* for sizes given at `REFERENCE_SAMPLE_RATE`; the FFT size stays a power of two."""
+    scale = rate / REFERENCE_SAMPLE_RATE
+    return max(1, round(hop_size * scale)), 2 ** max(1, round(math.log2(fft_size * scale)))
+
+
+def onset_frame_rate(
+    sample_rate: int, analysis_rate: int | None = ANALYSIS_SAMPLE_RATE, hop_size: int = HOP_SIZE
+) -> float:
+    """Onset frames per second of `onset_strength` for audio at *sample_rate*."""
+    rate = sample_rate / decimation_factor(sample_rate, analysis_rate)
+    return rate / _frame_sizes(rate, hop_size, FFT_SIZE)[0]
+
+
+def downmix_decimate(
+    waveform: torch.Tensor, sample_rate: int, analysis_rate: int | None = ANALYSIS_SAMPLE_RATE
+) -> tuple[torch.Tensor, float]:
+    """
+    Mono mix of each signal, low-passed and decimated by `decimation_factor`.
+
+    The anti-alias filter is a short windowed sinc applied as one strided convolution, so the
+    decimation costs a few multiply-adds per output sample; onset detection does not need the
+    steep transition band of a resampler.
+
+    Args:
+        waveform (torch.Tensor): Time-domain input of shape [..., channels, frames]
+        sample_rate (int): Sample rate of the waveform
+        analysis_rate (int | None): Lowest acceptable analysis rate, ``None`` to keep *sample_rate*
+
+    Returns:
+        tuple[torch.Tensor, float]: Mono signal [..., ceil(frames / factor)] and its sample rate
+
+    """
+    mono = waveform.mean(dim=-2)  # shape: [..., frames]
+    factor = decimation_factor(sample_rate, analysis_rate)
+    if factor == 1:
+        return mono, sample_rate
+
+    leading = tuple(mono.shape[:-1])
+    kernel = _decimation_filter(factor, waveform.device, waveform.dtype)
+    with torch.no_grad():
+        padded = torch.nn.functional.pad(mono.reshape(-1, 1, mono.shape[-1]), (kernel.shape[-1] // 2,) * 2)
+        decimated = torch.nn.functional.conv1d(padded, kernel, stride=factor)
+    return decimated.reshape(*leading, decimated.shape[-1]), sample_rate / factor
+
+
+def onset_strength(
+    waveform: torch.Tensor,
+    sample_rate: int,
+    hop_size: int = HOP_SIZE,
+    fft_size: int = FFT_SIZE,
+    n_mels: int = N_MELS,
+    analysis_rate: int | None = ANALYSIS_SAMPLE_RATE,
+) -> torch.Tensor:
+    """
+    Spectral-flux onset envelope of the channel mix of each signal.
+
+    The channels are averaged and decimated to the analysis rate (see `downmix_decimate`), and the
+    STFT, mel projection and flux of all signals are computed in one batched pass on the
+    waveform's device.
+
+    Args:
+        waveform (torch.Tensor): Time-domain input of shape [..., channels, frames]
+        sample_rate (int): Sample rate of the waveform
+        hop_size (int): Samples per onset frame at `REFERENCE_SAMPLE_RATE`
+        fft_size (int): Size of the FFT at `REFERENCE_SAMPLE_RATE`
+        n_mels (int): Number of mel bands the flux is averaged over
+        analysis_rate (int | None): Lowest acceptable analysis rate, ``None`` to analyse at *sample_rate*
+
+    Returns:
+        torch.Tensor: Onset strength [..., onset_frames] at `onset_frame_rate` frames per second
+
+    """
+    mono, rate = downmix_decimate(waveform, sample_rate, analysis_rate)  # shape: [..., frames]
+    leading = tuple(mono.shape[:-1])
+    hop_size, fft_size = _frame_sizes(rate, hop_size, fft_size)
+    window, filters = _onset_tables(rate, fft_size, n_mels, waveform.device, waveform.dtype)
+    with torch.no_grad():
+        spectrum = torch.stft(
+            mono.reshape(-1, mono.shape[-1]),
+            n_fft=fft_size,
+            hop_length=hop_size,
+            window=window,
+            return_complex=True,
+        )  # shape: [signals, freq, onset_frames]
+        mel_db = 10 * torch.log10(torch.matmul(filters, spectrum.abs() ** 2).clamp_min(1e-10))
+        mel_db = torch.maximum(mel_db, mel_db.amax(dim=(-2, -1), keepdim=True) - TOP_DB)
+        flux = (mel_db[..., 1:] - mel_db[..., :-1]).clamp_min(0.0).mean(dim=-2)
+        onset = torch.nn.functional.pad(flux, (1, 0))
+    return onset.reshape(*leading, onset.shape[-1])
+
+
+def tempogram(onset: torch.Tensor, win_length: int = TEMPOGRAM_FRAMES, hop_length: int | None = None) -> torch.Tensor:
+    """
+    Local autocorrelation of an onset envelope.
+
+    Each window of *win_length* onset frames has its mean removed and is Hann-windowed; its
+    autocorrelation is computed with an FFT, divided by the autocorrelation of the window itself
+    so a steady pulse scores the same at every lag, and normalized to 1 at lag 0. Silent windows
+    are all zero.
+
+    Args:
+        onset (torch.Tensor): Onset envelope [..., onset_frames], see `onset_strength`
+        win_length (int): Onset frames per window
+        hop_length (int): Onset frames between windows, ``win_length // 4`` by default
+
+    Returns:
+        torch.Tensor: Normalized autocorrelation [..., lags, windows] for the lags
+        ``0 .. win_length // 2`` in onset frames
+
+    """
+    if hop_length is None:
+        hop_length = max(1, win_length // 4)
+    if onset.shape[-1] < win_length:
+        onset = torch.nn.functional.pad(onset, (0, win_length - onset.shape[-1]))
+
+    window, window_overlap = _tempogram_tables(win_length, onset.device, onset.dtype)
+    with torch.no_grad():
+        frames = onset.unfold(-1, win_length, hop_length)  # shape: [..., windows, win_length]
+        frames = (frames - frames.mean(dim=-1, keepdim=True)) * window
+        power = torch.fft.rfft(frames, n=2 * win_length).abs() ** 2
+        autocorrelation = torch.fft.irfft(power, n=2 * win_length)[..., : window_overlap.shape[0]] / window_overlap
+        autocorrelation = autocorrelation / autocorrelation[..., :1].clamp_min(1e-10)
+    return autocorrelation.transpose(-1, -2)
+
+
+def tempo_from_autocorrelation(
+    autocorrelation: torch.Tensor,
+    frame_rate: float,
+    min_bpm: float = MIN_BPM,
+    max_bpm: float = MAX_BPM,
+    start_bpm: float | torch.Tensor = START_BPM,
+    std_octaves: float = STD_OCTAVES,
+) -> TempoEstimate:
+    """
+    Pick the beat period of each onset autocorrelation ``[..., lags]``.
+
+    Every lag is scored by the height of the parabola through it and its neighbours, so a peak
+    that falls between two lags is not penalized against one that happens to sit on a lag. The
+    lag with the largest score under a log-normal tempo prior wins, which settles the usual
+    half/double tempo ambiguity toward *start_bpm*, and the parabola's vertex refines its position.
+    *start_bpm* may be a tensor that broadcasts against ``[..., 1]`` to center the prior per row.
+    Rows without a positive score in the tempo range, such as the all-zero autocorrelation of
+    digital silence, have no beat to measure: they get *start_bpm* with a confidence of 0.
+    """
+    lags = torch.arange(autocorrelation.shape[-1], device=autocorrelation.device, dtype=autocorrelation.dtype)
+    bpm = 60.0 * frame_rate / lags.clamp_min(1.0)
+    prior = torch.exp(-0.5 * (torch.log2(bpm / start_bpm) / std_octaves) ** 2)
+    valid = (lags >= 1) & (bpm >= min_bpm) & (bpm <= max_bpm)
+
+    left = torch.nn.functional.pad(autocorrelation[..., :-1], (1, 0))
+    right = torch.nn.functional.pad(autocorrelation[..., 1:], (0, 1))
+    curvature = left - 2 * autocorrelation + right
+    shift = torch.where(
+        curvature < 0, 0.5 * (left - right) / curvature.clamp_max(-1e-10), torch.zeros_like(autocorrelation)
+    ).clamp(-0.5, 0.5)
+    height = autocorrelation + 0.5 * shift * (right - left) + 0.5 * curvature * shift**2
+
+    weighted = torch.where(valid, height.clamp_min(0.0) * prior, torch.full_like(prior, -1.0))
+    best = weighted.argmax(dim=-1, keepdim=True)
+    found = weighted.gather(-1, best) > 0
+    period = best + shift.gather(-1, best)
+    fallback = torch.as_tensor(start_bpm, device=period.device, dtype=period.dtype).expand_as(period)
+    return TempoEstimate(
+        bpm=torch.where(found, 60.0 * frame_rate / period.clamp_min(1.0), fallback).squeeze(-1),
+        confidence=(height.gather(-1, best).clamp(0.0, 1.0) * found).squeeze(-1),
+    )
+
+
+def excerpt_slices(
+    frames: int, sample_rate: int, excerpts: int, excerpt_seconds: float = EXCERPT_SECONDS
+) -> list[slice]:
+    """
+    Frame slices of *excerpts* evenly spaced excerpts of a track, in the order they are analysed.
+
+    Excerpt ``i`` is centered at ``(i + 0.5) / excerpts`` of the track. A track too short to hold
+    the excerpts without overlap is a single excerpt covering all of it.
+    """
+    length = int(excerpt_seconds * sample_rate)
+    if excerpts < 1 or length < 1:
+        raise ValueError(f"Need at least one excerpt of at least one frame, got {excerpts} x {excerpt_seconds} s.")
+    if excerpts * length >= frames:
+        return [slice(0, frames)]
+    starts = [round((index + 0.5) * frames / excerpts - length / 2) for index in range(excerpts)]
+    return [slice(start, start + length) for start in starts]
+
+
+def analyze_excerpts(
+    waveform: torch.Tensor,
+    sample_rate: int,
+    excerpts: int = 3,
+    excerpt_seconds: float = EXCERPT_SECONDS,
+    tolerance_bpm: float | None = None,
+    min_bpm: float = MIN_BPM,
+    max_bpm: float = MAX_BPM,
+    start_bpm: float = START_BPM,
+    analysis_rate: int | None = ANALYSIS_SAMPLE_RATE,
+) -> tuple[TempoEstimate, torch.Tensor]:
+    """
+    Estimate the tempo of every signal of a batch from evenly spaced excerpts of it.
+
+    The excerpts (see `excerpt_slices`) are analysed one after another and the tempogram windows
+    of all analysed excerpts are pooled into one estimate, so excerpts that disagree lower the
+    confidence. With *tolerance_bpm*, analysis stops at the first excerpt whose own tempo is
+    within *tolerance_bpm* of the previous excerpt's for every signal.
+
+    Args:
+        waveform (torch.Tensor): Time-domain input of shape [channels, frames] or
+            [batch, channels, frames], on any device
+        sample_rate (int): Sample rate of the waveform
+        excerpts (int): Number of excerpts to analyse at most
+        excerpt_seconds (float): Length of each excerpt
+        tolerance_bpm (float | None): Largest tempo difference between successive excerpts that
+            ends the analysis early, ``None`` to analyse every excerpt
+        min_bpm (float): Slowest tempo considered
+        max_bpm (float): Fastest tempo considered
+        start_bpm (float): Center of the tempo prior
+        analysis_rate (int | None): Lowest acceptable onset analysis rate, ``None`` to analyse at
+            *sample_rate*
+
+    Returns:
+        tuple[TempoEstimate, torch.Tensor]: BPM and confidence per signal, and the onset envelopes
+        of the analysed excerpts end to end [..., onset_frames]
+
+    """
+    frame_rate = onset_frame_rate(sample_rate, analysis_rate)
+    onsets, tempograms, previous = [], [], None
+    for excerpt in excerpt_slices(waveform.shape[-1], sample_rate, excerpts, excerpt_seconds):
+        onset = onset_strength(waveform[..., excerpt], sample_rate, analysis_rate=analysis_rate)
+        onsets.append(onset)
+        tempograms.append(tempogram(onset))
+        if tolerance_bpm is None:
+            continue
+        bpm = tempo_from_autocorrelation(tempograms[-1].mean(dim=-1), frame_rate, min_bpm, max_bpm, start_bpm).bpm
+        if previous is not None and float((bpm - previous).abs().max()) <= tolerance_bpm:
+            break
+        previous = bpm
+
+    autocorrelation = torch.cat(tempograms, dim=-1).mean(dim=-1)  # shape: [..., lags]
+    estimate = tempo_from_autocorrelation(autocorrelation, frame_rate, min_bpm, max_bpm, start_bpm)
+    return estimate, torch.cat(onsets, dim=-1)
+
+
+def analyze_tempo(
+    waveform: torch.Tensor,
+    sample_rate: int,
+    min_bpm: float = MIN_BPM,
+    max_bpm: float = MAX_BPM,
+    start_bpm: float = START_BPM,
+    analysis_rate: int | None = ANALYSIS_SAMPLE_RATE,
+    excerpts: int | None = None,
+    excerpt_seconds: float = EXCERPT_SECONDS,
+    tolerance_bpm: float | None = None,
+) -> TempoEstimate:
+    """
+    Estimate the global tempo of every signal of a batch in one pass.
+
+    Args:
+        waveform (torch.Tensor): Time-domain input of shape [channels, frames] or
+            [batch, channels, frames], on any device
+        sample_rate (int): Sample rate of the waveform
+        min_bpm (float): Slowest tempo considered
+        max_bpm (float): Fastest tempo considered
+        start_bpm (float): Center of the tempo prior
+        analysis_rate (int | None): Lowest acceptable onset analysis rate, ``None`` to analyse at
+            *sample_rate*
+        excerpts (int | None): Analyse this many excerpts instead of the whole track, see
+            `analyze_excerpts`
+        excerpt_seconds (float): Length of each excerpt
+        tolerance_bpm (float | None): Stop once successive excerpts agree within this many BPM
+
+    Returns:
+        TempoEstimate: BPM and confidence per signal; 0-dim tensors for [channels, frames] input
+
+    """
+    if excerpts:
+        options = (excerpts, excerpt_seconds, tolerance_bpm, min_bpm, max_bpm, start_bpm, analysis_rate)
+        return analyze_excerpts(waveform, sample_rate, *options)[0]
+    onset = onset_strength(waveform, sample_rate, analysis_rate=analysis_rate)
+    frame_rate = onset_frame_rate(sample_rate, analysis_rate)
+    return tempo_from_onset(onset, frame_rate, min_bpm, max_bpm, start_bpm)
+
+
+def tempo_from_onset(
+    onset: torch.Tensor,
+    frame_rate: float,
+    min_bpm: float = MIN_BPM,
+    max_bpm: float = MAX_BPM,
+    start_bpm: float = START_BPM,
+) -> TempoEstimate:
+    """Global tempo of onset envelopes ``[..., onset_frames]`` from their mean tempogram."""
+    autocorrelation = tempogram(onset).mean(dim=-1)  # shape: [..., lags]
+    return tempo_from_autocorrelation(autocorrelation, frame_rate, min_bpm, max_bpm, start_bpm)
+
+
+def tempo_curve(
+    onset: torch.Tensor,
+    frame_rate: float,
+    min_bpm: float = MIN_BPM,
+    max_bpm: float = MAX_BPM,
+    start_bpm: float = START_BPM,
+) -> TempoCurve:
+    """
+    Local tempo of onset envelopes ``[..., onset_frames]`` in every tempogram window.
+
+    The global tempo and the local tempos come from one tempogram: its mean gives the global
+    tempo as in `tempo_from_onset`, and every window's own autocorrelation is read under a prior
+    centered on that global tempo and ``CURVE_STD_OCTAVES`` wide, so windows do not jump to
+    double or half tempo. A running median over ``CURVE_MEDIAN_WINDOWS`` windows removes the
+    remaining outliers.
+
+    Args:
+        onset (torch.Tensor): Onset envelope [..., onset_frames], see `onset_strength`
+        frame_rate (float): Onset frames per second, see `onset_frame_rate`
+        min_bpm (float): Slowest tempo considered
+        max_bpm (float): Fastest tempo considered
+        start_bpm (float): Center of the prior of the global tempo
+
+    Returns:
+        TempoCurve: Window centers in seconds and the local BPM and confidence of each window
+
+    """
+    hop_length = max(1, TEMPOGRAM_FRAMES // 4)
+    local = tempogram(onset, TEMPOGRAM_FRAMES, hop_length)  # shape: [..., lags, windows]
+    overall = tempo_from_autocorrelation(local.mean(dim=-1), frame_rate, min_bpm, max_bpm, start_bpm)
+    estimate = tempo_from_autocorrelation(
+        local.transpose(-1, -2), frame_rate, min_bpm, max_bpm, overall.bpm[..., None, None], CURVE_STD_OCTAVES
+    )  # shape: [..., windows]
+
+    windows = estimate.bpm.shape[-1]
+    centers = torch.arange(windows, device=onset.device, dtype=onset.dtype) * hop_length + TEMPOGRAM_FRAMES / 2
+    return TempoCurve(
+        times=centers / frame_rate,
+        bpm=_running_median(estimate.bpm, CURVE_MEDIAN_WINDOWS),
+        confidence=estimate.confidence,
+    )
+
+
+def _running_median(values: torch.Tensor, width: int) -> torch.Tensor:
+    """Median of every *width* consecutive values along the last dimension, with replicated edges."""
+    half = width // 2
+    flat = values.reshape(-1, 1, values.shape[-1])
+    padded = torch.nn.functional.pad(flat, (half, half), mode="replicate")
+    return padded.unfold(-1, width, 1).median(dim=-1).values.reshape(values.shape)
+
+
+__all__ = [
+    "TempoCurve",
+    "TempoEstimate",
+    "analyze_excerpts",
+    "analyze_tempo",
+    "decimation_factor",
+    "downmix_decimate",
+    "excerpt_slices",
+    "onset_frame_rate",
+    "onset_strength",
+    "tempo_from_autocorrelation",
+    "tempo_curve",
+    "tempo_from_onset",
+    "tempogram",
+]
@@ -0,0 +1,255 @@
+"""Cache of tempo analyses shared by the tempo nodes, keyed by the content of the audio."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import torch
+
+from . import tempo
+from .disk_cache import evict_lru, load_entry, save_entry
+
+if TYPE_CHECKING:
+    import os
+
+    from .tempo import TempoCurve, TempoEstimate
+
+CACHE_FORMAT_VERSION = 3
+
+
+class TempoCache:
+    """
+    Size-bounded LRU cache of per-signal tempo analyses, in memory and optionally on disk.
+
+    Each entry holds the onset envelope of one ``[channels, frames]`` signal together with its
+    tempo and confidence, so Get Tempo followed by Tempo Match on the same track, or a re-run of
+    the graph, analyses the audio once. Keys are SHA-256 digests of the waveform bytes, the sample
+    rate and the analysis settings. Memory entries are evicted by least recent use once their
+    onset envelopes exceed ``max_bytes``; ``max_bytes=0`` disables the memory cache. When
+    ``root`` is set, entries are also written there as ``.pt`` files, bounded by
+    ``max_disk_bytes``, and survive restarts. Onsets are detected at ``analysis_rate``, see
+    `tempo.downmix_decimate`. Analyses of excerpts (see `tempo.analyze_excerpts`) are keyed by
+    the excerpts alone, so a multi-hour mix is neither analysed nor hashed in full.
+
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024**2
+    DEFAULT_MAX_DISK_BYTES = 256 * 1024**2
+    SUFFIX = ".pt"
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        root: str | os.PathLike | None = None,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+        analysis_rate: int | None = tempo.ANALYSIS_SAMPLE_RATE,
+    ):
+        if max_bytes < 0 or max_disk_bytes < 0:
+            raise ValueError("max_bytes and max_disk_bytes must not be negative.")
+        self.max_bytes = max_bytes
+        self.analysis_rate = analysis_rate
+        self.root = Path(root) if root is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def on_disk(self) -> bool:
+        return self.root is not None and self.max_disk_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(
+        waveform: torch.Tensor,
+        sample_rate: int,
+        analysis_rate: int | None = tempo.ANALYSIS_SAMPLE_RATE,
+        excerpts: int | None = None,
+        excerpt_seconds: float = tempo.EXCERPT_SECONDS,
+        tolerance_bpm: float | None = None,
+    ) -> str:
+        """Return the cache key for analysing *waveform* [channels, frames] at *sample_rate*."""
+        regions = [slice(None)]
+        if excerpts:
+            regions = tempo.excerpt_slices(waveform.shape[-1], sample_rate, excerpts, excerpt_seconds)
+        digest = hashlib.sha256()
+        factor = tempo.decimation_factor(sample_rate, analysis_rate)
+        settings = (
+            CACHE_FORMAT_VERSION,
+            sample_rate,
+            factor,
+            tempo.HOP_SIZE,
+            tempo.FFT_SIZE,
+            tempo.N_MELS,
+            tempo.TOP_DB,
+            (excerpts, excerpt_seconds, tolerance_bpm) if excerpts else None,
+        )
+        digest.update(repr((tuple(waveform.shape), settings)).encode())
+        for region in regions:
+            data = waveform[..., region].detach().cpu().float().contiguous().numpy()
+            digest.update(memoryview(data).cast("B"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the entry for *key* from memory or disk, or ``None`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.on_disk:
+            return None
+
+        entry = load_entry(self._path(key), "tempo cache")
+        if entry is None:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        """Store *entry* (``onset``, ``bpm``, ``confidence``) under *key* and evict old entries."""
+        self._remember(key, entry)
+        if not self.on_disk:
+            return
+        if save_entry(self._path(key), entry, "tempo cache"):
+            evict_lru(self.root, self.max_disk_bytes, self.SUFFIX)
+
+    def analyze(
+        self,
+        waveform: torch.Tensor,
+        sample_rate: int,
+        excerpts: int | None = None,
+        excerpt_seconds: float = tempo.EXCERPT_SECONDS,
+        tolerance_bpm: float | None = None,
+    ) -> TempoEstimate:
+        """
+        `tempo.analyze_tempo` through the cache.
+
+        Every item of a batch is looked up on its own; the items that miss are analysed together
+        in one pass and stored.
+
+        Args:
+            waveform (torch.Tensor): Time-domain input of shape [channels, frames] or
+                [batch, channels, frames]
+            sample_rate (int): Sample rate of the waveform
+            excerpts (int | None): Analyse this many excerpts instead of the whole track
+            excerpt_seconds (float): Length of each excerpt
+            tolerance_bpm (float | None): Stop once successive excerpts agree within this many BPM
+
+        Returns:
+            TempoEstimate: BPM and confidence per item, on the CPU; 0-dim tensors for
+            [channels, frames] input
+
+        """
+        entries = self._entries_for(waveform, sample_rate, excerpts, excerpt_seconds, tolerance_bpm)
+        return self._estimate(entries, batched=waveform.dim() == 3)
+
+    def curve(self, waveform: torch.Tensor, sample_rate: int) -> tuple[TempoEstimate, TempoCurve]:
+        """
+        Global tempo and tempo curve (`tempo.tempo_curve`) of the whole track, from one lookup.
+
+        The curve is computed from the cached onset envelopes, so it costs one tempogram on top
+        of `analyze` and nothing more when the track was analysed before.
+
+        Args:
+            waveform (torch.Tensor): Time-domain input of shape [channels, frames] or
+                [batch, channels, frames]
+            sample_rate (int): Sample rate of the waveform
+
+        Returns:
+            tuple[TempoEstimate, TempoCurve]: As `analyze`, and the local tempo per tempogram
+            window, on the CPU; without the batch dimension for [channels, frames] input
+
+        """
+        entries = self._entries_for(waveform, sample_rate)
+        onset = torch.stack([entry["onset"] for entry in entries])
+        curve = tempo.tempo_curve(onset, tempo.onset_frame_rate(sample_rate, self.analysis_rate))
+        if waveform.dim() != 3:
+            curve = curve._replace(bpm=curve.bpm[0], confidence=curve.confidence[0])
+        return self._estimate(entries, batched=waveform.dim() == 3), curve
+
+    def _entries_for(
+        self,
+        waveform: torch.Tensor,
+        sample_rate: int,
+        excerpts: int | None = None,
+        excerpt_seconds: float = tempo.EXCERPT_SECONDS,
+        tolerance_bpm: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Entry of every item of *waveform*, analysing the items that miss together."""
+        items = waveform if waveform.dim() == 3 else waveform[None]
+        options = (excerpts, excerpt_seconds, tolerance_bpm)
+        keys = [self.make_key(item, sample_rate, self.analysis_rate, *options) for item in items]
+        entries = [self.get(key) for key in keys]
+
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+        if missing:
+            batch = items if len(missing) == items.shape[0] else items[missing]
+            if excerpts:
+                estimate, onset = tempo.analyze_excerpts(batch, sample_rate, *options, analysis_rate=self.analysis_rate)
+            else:
+                onset = tempo.onset_strength(batch, sample_rate, analysis_rate=self.analysis_rate)
+                estimate = tempo.tempo_from_onset(onset, tempo.onset_frame_rate(sample_rate, self.analysis_rate))
+            for row, index in enumerate(missing):
+                entries[index] = {
+                    "onset": onset[row].cpu().clone(),
+                    "bpm": float(estimate.bpm[row]),
+                    "confidence": float(estimate.confidence[row]),
+                }
+                self.put(keys[index], entries[index])
+        return entries
+
+    @staticmethod
+    def _estimate(entries: list[dict[str, Any]], batched: bool) -> TempoEstimate:
+        bpm = torch.tensor([entry["bpm"] for entry in entries])
+        confidence = torch.tensor([entry["confidence"] for entry in entries])
+        if not batched:
+            bpm, confidence = bpm[0], confidence[0]
+        return tempo.TempoEstimate(bpm=bpm, confidence=confidence)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self.root is None or not self.root.is_dir():
+                return
+            for path in self.root.glob(f"*{self.SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{self.SUFFIX}"
+
+    @staticmethod
+    def _entry_bytes(entry: dict[str, Any]) -> int:
+        onset = entry["onset"]
+        return onset.numel() * onset.element_size()
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        size = self._entry_bytes(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= self._entry_bytes(previous)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._entry_bytes(evicted)
+
+
+TEMPO_CACHE = TempoCache()
+
+
+__all__ = [
+    "CACHE_FORMAT_VERSION",
+    "TEMPO_CACHE",
+    "TempoCache",
+]
@@ -2,11 +2,18 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from .utils import estimate_tempo, time_shift
+import torch
+
+from .tempo import EXCERPT_SECONDS_TOOLTIP, EXCERPTS_TOOLTIP, TOLERANCE_BPM_TOOLTIP
+from .tempo_cache import TEMPO_CACHE
+from .utils import estimate_tempo, rate_map, time_shift
 
 if TYPE_CHECKING:
     from ._types import AUDIO
 
+INPUTS = 4
+MODES = ["average", *(f"match to audio_{index}" for index in range(1, INPUTS + 1)), "match to fixed BPM"]
+
 
 class TempoMatch:
     @classmethod
@@ -16,41 +23,237 @@ class TempoMatch:
                 "audio_1": ("AUDIO",),
                 "audio_2": ("AUDIO",),
             },
+            "optional": {
+                "audio_3": ("AUDIO",),
+                "audio_4": ("AUDIO",),
+                "mode": (
+                    MODES,
+                    {
+                        "default": "average",
+                        "tooltip": "Target tempo: the average of all connected tracks, the (mean) tempo of one track, which is passed through unchanged even with follow_tempo_curve, or target_bpm.",  # noqa: E501
+                    },
+                ),
+                "target_bpm": (
+                    "FLOAT",
+                    {
+                        "default": 120.0,
+                        "min": 1.0,
+                        "max": 400.0,
+                        "step": 0.1,
+                        "tooltip": "Target tempo for the 'match to fixed BPM' mode.",
+                    },
+                ),
+                "rate_tolerance": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 0.1,
+                        "step": 0.001,
+                        "tooltip": "Leave a track as it is when its stretch rate is within this much of 1.0, e.g. 0.005 skips tracks that would change by half a percent or less. 0 only skips tracks that are already at the target tempo.",  # noqa: E501
+                    },
+                ),
+                "excerpts": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 64,
+                        "tooltip": EXCERPTS_TOOLTIP,
+                    },
+                ),
+                "excerpt_seconds": (
+                    "FLOAT",
+                    {
+                        "default": 30.0,
+                        "min": 5.0,
+                        "max": 600.0,
+                        "step": 1.0,
+                        "tooltip": EXCERPT_SECONDS_TOOLTIP,
+                    },
+                ),
+                "tolerance_bpm": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 20.0,
+                        "step": 0.1,
+                        "tooltip": TOLERANCE_BPM_TOOLTIP,
+                    },
+                ),
+                "follow_tempo_curve": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Follow tempo changes within each track instead of applying one rate to all of it: the local tempo is tracked over time and every part is stretched to the target tempo in one streamed pass, so drifting live recordings come out at a steady tempo. The whole track is analysed for the tempo curve.",  # noqa: E501
+                    },
+                ),
+            },
         }
 
     FUNCTION = "main"
-    RETURN_TYPES = ("AUDIO", "AUDIO")
+    RETURN_TYPES = ("AUDIO",) * INPUTS
+    RETURN_NAMES = tuple(f"audio_{index}" for index in range(1, INPUTS + 1))
     CATEGORY = "audio"
-    DESCRIPTION = "Match the tempo of two audio tracks by time-stretching them both to match the average tempo between them. E.g., if one audio track is 120 BPM and the other is 100 BPM, both will be time-stretched to 110 BPM."  # noqa: E501
+    DESCRIPTION = "Match the tempo of two to four audio tracks by time-stretching them to a common tempo: the average tempo between them by default (e.g., if one audio track is 120 BPM and the other is 100 BPM, both will be time-stretched to 110 BPM), the tempo of one of the tracks, or a fixed BPM. Tracks already at the target tempo, or within rate_tolerance of it, are passed through without stretching, so matching one track to another stretches only one of them. Tracks without a measurable beat, such as silence, are passed through and left out of the average. Inputs with the same sample rate and length are analysed in one pass, batched inputs are stretched item by item to the average of their mean tempos, and outputs of unconnected inputs are empty. Long tracks can be analysed from a few excerpts instead of in full, and follow_tempo_curve evens out tempo drift within each track."  # noqa: E501
 
     def main(
         self,
         audio_1: AUDIO,
         audio_2: AUDIO,
-    ) -> tuple[AUDIO, AUDIO]:
-        waveform_1 = audio_1["waveform"].squeeze(0)
-        input_sample_rate_1 = audio_1["sample_rate"]
+        audio_3: AUDIO | None = None,
+        audio_4: AUDIO | None = None,
+        mode: str = "average",
+        target_bpm: float = 120.0,
+        rate_tolerance: float = 0.0,
+        excerpts: int = 0,
+        excerpt_seconds: float = 30.0,
+        tolerance_bpm: float = 0.0,
+        follow_tempo_curve: bool = False,
+    ) -> tuple[AUDIO | None, ...]:
+        audios = [audio_1, audio_2, audio_3, audio_4]
+        connected = [index for index, audio in enumerate(audios) if audio is not None]
+        waveforms = [audios[index]["waveform"] for index in connected]
+        waveforms = [waveform.squeeze(0) if waveform.shape[0] == 1 else waveform for waveform in waveforms]
+        sample_rates = [audios[index]["sample_rate"] for index in connected]
 
-        waveform_2 = audio_2["waveform"].squeeze(0)
-        input_sample_rate_2 = audio_2["sample_rate"]
+        options = (excerpts or None, excerpt_seconds, tolerance_bpm or None)
+        tempos = self.tempos(waveforms, sample_rates, *options)
+        reference = None
+        if mode == "average":
+            measured = [mean for mean in map(self.mean, tempos) if mean > 0]
+            target_tempo = sum(measured) / len(measured) if measured else 0.0
+        elif mode == "match to fixed BPM":
+            target_tempo = target_bpm
+        elif mode in MODES:
+            reference = MODES.index(mode) - 1
+            if reference not in connected:
+                raise ValueError(f"Tempo Match mode {mode!r} needs audio_{reference + 1} to be connected.")
+            target_tempo = self.mean(tempos[connected.index(reference)])
+        else:
+            raise ValueError(f"Unknown Tempo Match mode {mode!r}; expected one of {MODES}.")
 
-        tempo_1 = estimate_tempo(waveform_1, input_sample_rate_1)
-        tempo_2 = estimate_tempo(waveform_2, input_sample_rate_2)
-        avg_tempo = (tempo_1 + tempo_2) / 2
+        outputs: list[AUDIO | None] = [None] * INPUTS
+        for index, waveform, sample_rate, tempo in zip(connected, waveforms, sample_rates, tempos):
+            if index == reference:
+                pass  # the reference sets the target tempo and is passed through, also along its own curve
+            elif follow_tempo_curve:
+                waveform = self.follow(waveform, sample_rate, target_tempo, rate_tolerance)
+            else:
+                rate = self.rate(target_tempo, tempo, rate_tolerance)
+                if any(item != 1.0 for item in (rate if isinstance(rate, list) else [rate])):
+                    waveform = time_shift(waveform, rate)
+            outputs[index] = {
+                "waveform": waveform if waveform.ndim == 3 else waveform.unsqueeze(0),
+                "sample_rate": sample_rate,
+            }
+        return tuple(outputs)
 
-        rate_1 = avg_tempo / tempo_1
-        rate_2 = avg_tempo / tempo_2
+    @classmethod
+    def tempos(
+        cls,
+        waveforms: list[torch.Tensor],
+        sample_rates: list[int],
+        excerpts: int | None = None,
+        excerpt_seconds: float = 30.0,
+        tolerance_bpm: float | None = None,
+    ) -> list[float | list[float]]:
+        """
+        `tempo` of every waveform, analysing [channels, frames] inputs that share a sample rate,
+        shape and device as one batch.
+        """
+        options = (excerpts, excerpt_seconds, tolerance_bpm)
+        groups: dict[tuple | int, list[int]] = {}
+        for index, (waveform, sample_rate) in enumerate(zip(waveforms, sample_rates)):
+            group = (sample_rate, tuple(waveform.shape), str(waveform.device)) if waveform.ndim == 2 else index
+            groups.setdefault(group, []).append(index)
 
-        waveform_1 = time_shift(waveform_1, rate_1)
-        waveform_2 = time_shift(waveform_2, rate_2)
+        tempos: list[float | list[float]] = [0.0] * len(waveforms)
+        for indices in groups.values():
+            if len(indices) == 1:
+                tempos[indices[0]] = cls.tempo(waveforms[indices[0]], sample_rates[indices[0]], *options)
+                continue
+            batch = torch.stack([waveforms[index] for index in indices])
+            for index, tempo in zip(indices, cls.tempo(batch, sample_rates[indices[0]], *options)):
+                tempos[index] = tempo
+        return tempos
 
-        return (
-            {
-                "waveform": waveform_1.unsqueeze(0),
-                "sample_rate": input_sample_rate_1,
-            },
-            {
-                "waveform": waveform_2.unsqueeze(0),
-                "sample_rate": input_sample_rate_2,
-            },
-        )
+    @staticmethod
+    def tempo(
+        waveform: torch.Tensor,
+        sample_rate: int,
+        excerpts: int | None = None,
+        excerpt_seconds: float = 30.0,
+        tolerance_bpm: float | None = None,
+    ) -> float | list[float]:
+        """
+        Tempo of a [channels, frames] waveform, or one tempo per item of a batch from one pass;
+        0.0 for audio without a beat to measure, such as silence.
+        """
+        options = (excerpts, excerpt_seconds, tolerance_bpm)
+        if waveform.ndim == 3:
+            estimate = TEMPO_CACHE.analyze(waveform, sample_rate, *options)
+            pairs = zip(estimate.bpm.tolist(), estimate.confidence.tolist())
+            return [max(bpm, 1.0) if confidence > 0 else 0.0 for bpm, confidence in pairs]
+        return estimate_tempo(waveform, sample_rate, *options)
+
+    @staticmethod
+    def follow(
+        waveform: torch.Tensor, sample_rate: int, target_tempo: float, rate_tolerance: float = 0.0
+    ) -> torch.Tensor:
+        """
+        Stretch *waveform* so its tempo curve becomes a steady *target_tempo*.
+
+        Every item of a batch gets its own rate map and is stretched in one streamed pass, unless
+        all of its rates are within *rate_tolerance* of 1.0; items that come out shorter than the
+        longest are zero-padded at the end. Items without a beat to measure are left as they
+        are, and so is everything when *target_tempo* is 0. When no item needs stretching,
+        *waveform* itself is returned, as `rate` and `main` do for a single rate.
+        """
+        if target_tempo <= 0:
+            return waveform
+        estimate, curve = TEMPO_CACHE.curve(waveform, sample_rate)
+        frames = waveform.shape[-1]
+        items = waveform if waveform.ndim == 3 else waveform[None]
+        bpm = curve.bpm if waveform.ndim == 3 else curve.bpm[None]
+        confidence = estimate.confidence if waveform.ndim == 3 else estimate.confidence[None]
+        stretched = []
+        for item in range(items.shape[0]):
+            rates = target_tempo / bpm[item].clamp_min(1.0)
+            if float(confidence[item]) <= 0 or float((rates - 1.0).abs().max()) <= rate_tolerance:
+                stretched.append(None)
+            else:
+                stretched.append(time_shift(items[item], rate_map(curve.times, rates, frames, sample_rate)))
+        if all(signal is None for signal in stretched):
+            return waveform
+        stretched = [items[item] if signal is None else signal for item, signal in enumerate(stretched)]
+        if waveform.ndim != 3:
+            return stretched[0]
+
+        output = waveform.new_zeros((len(stretched), waveform.shape[1], max(item.shape[-1] for item in stretched)))
+        for item, signal in enumerate(stretched):
+            output[item, :, : signal.shape[-1]] = signal
+        return output
+
+    @staticmethod
+    def mean(tempo: float | list[float]) -> float:
+        """Mean of the measured tempos of a batch (0.0 if there are none), or *tempo* itself."""
+        if not isinstance(tempo, list):
+            return tempo
+        measured = [item for item in tempo if item > 0]
+        return sum(measured) / len(measured) if measured else 0.0
+
+    @staticmethod
+    def rate(target_tempo: float, tempo: float | list[float], tolerance: float = 0.0) -> float | list[float]:
+        """
+        Rate that brings *tempo* (or each tempo of a batch) to *target_tempo*, snapped to exactly
+        1.0 when it is within *tolerance* of it. Tracks without a measured tempo, and all tracks
+        when there is no target tempo, keep a rate of 1.0.
+        """
+        if isinstance(tempo, list):
+            return [TempoMatch.rate(target_tempo, item, tolerance) for item in tempo]
+        if tempo <= 0 or target_tempo <= 0:
+            return 1.0
+        rate = target_tempo / tempo
+        return 1.0 if abs(rate - 1.0) <= tolerance else rate
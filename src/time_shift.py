@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import math
+import sys
 from typing import TYPE_CHECKING
 
-from .utils import time_shift
+from .utils import time_shift, wsola_time_shift
 
 if TYPE_CHECKING:
     from ._types import AUDIO
 
 
 class TimeShift:
+    ENGINES = ("phase_vocoder", "phase_locked", "wsola", "varispeed")
+    # Relative speed error varispeed accepts to relabel the input at a rate with a small resampling kernel.
+    VARISPEED_TOLERANCE = 0.001
+
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -19,6 +25,15 @@ class TimeShift:
                     {"default": 1.0, "min": 0.1, "max": 10.0, "step": 0.1},
                 ),
             },
+            "optional": {
+                "engine": (
+                    list(cls.ENGINES),
+                    {
+                        "default": "phase_vocoder",
+                        "tooltip": "Time-stretch algorithm. phase_vocoder is the classic STFT phase vocoder; phase_locked locks each frequency bin to its nearest spectral peak, which sounds less phasey on music at about half the speed; wsola overlap-adds waveform segments without an FFT, somewhat faster than phase_vocoder, and keeps speech and transients crisp; varispeed resamples like a tape speed change, so the pitch moves with the speed, and is by far the fastest.",  # noqa: E501
+                    },
+                ),
+            },
         }
 
     FUNCTION = "main"
@@ -30,15 +45,43 @@ class TimeShift:
         self,
         audio: AUDIO,
         rate: float,
+        engine: str = "phase_vocoder",
     ) -> tuple[AUDIO, AUDIO]:
-        waveform = audio["waveform"].squeeze(0)
+        if engine not in self.ENGINES:
+            raise ValueError(f"TimeShift: Unknown engine {engine}. Choose from {', '.join(self.ENGINES)}.")
+
+        waveform = audio["waveform"]
+        if waveform.shape[0] == 1:
+            waveform = waveform.squeeze(0)
         sample_rate = audio["sample_rate"]
         rate = min(max(rate, 0.1), 10.0)
-        shifted = time_shift(waveform, rate)
+        if engine == "varispeed":
+            # Imported here so the node still registers when the resampler cannot be imported.
+            from .resample import ChunkResampler
+
+            # Relabel the input as recorded at about rate * sample_rate, then resample it back. The
+            # relabelled rate shares a large GCD with sample_rate; the exact product usually does not
+            # and would need a kernel of gigabytes.
+            relabelled_rate = ChunkResampler._find_optimal_freq(
+                sample_rate, sample_rate * rate, self.VARISPEED_TOLERANCE
+            )
+            resampler = ChunkResampler(
+                relabelled_rate,
+                sample_rate,
+                upper_clamp=math.inf,
+                lower_clamp=sys.float_info.min,
+            )
+            shifted = resampler(waveform)
+        elif engine == "wsola":
+            shifted = wsola_time_shift(waveform, rate)
+        elif engine == "phase_locked":
+            shifted = time_shift(waveform, rate, phase_locking=True)
+        else:
+            shifted = time_shift(waveform, rate)
 
         return (
             {
-                "waveform": shifted.unsqueeze(0),
+                "waveform": shifted if shifted.ndim == 3 else shifted.unsqueeze(0),
                 "sample_rate": sample_rate,
             },
         )
@@ -156,6 +156,7 @@ def mock_comfy_modules(tmp_path_factory: pytest.TempPathFactory):
     if "folder_paths" not in sys.modules:
         fp_stub = types.ModuleType("folder_paths")
         fp_stub.get_temp_directory = lambda: str(_tmp)
+        fp_stub.get_user_directory = lambda: str(_tmp)
         sys.modules["folder_paths"] = fp_stub
         installed.append("folder_paths")
 
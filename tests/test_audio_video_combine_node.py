@@ -55,6 +55,7 @@ sys.modules.setdefault("moviepy.editor", editor_module)
 
 folder_paths_module = types.ModuleType("folder_paths")
 folder_paths_module.get_temp_directory = lambda: Path.cwd() / "temp"
+folder_paths_module.get_user_directory = lambda: Path.cwd() / "user"
 sys.modules.setdefault("folder_paths", folder_paths_module)
 
 module = importlib.import_module("src.combine_video_with_audio")
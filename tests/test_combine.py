@@ -105,6 +105,7 @@ for _key in list(sys.modules):
 # Now import the module under test
 module = importlib.import_module("src.combine")
 AudioCombine = module.AudioCombine
+resample_cache_module = importlib.import_module("src.resample_cache")
 
 
 # ---------------------------------------------------------------------------
@@ -232,6 +233,22 @@ class TestDifferentSampleRates:
         (result,) = AudioCombine().main(a1, a2, method="add")
         assert result["waveform"].device == "cpu"
 
+    def test_resample_transform_is_cached(self, monkeypatch):
+        created = []
+
+        class _SpyResample(_MockResample):
+            def __init__(self, orig_freq, new_freq):
+                super().__init__(orig_freq, new_freq)
+                created.append((orig_freq, new_freq))
+
+        monkeypatch.setattr(resample_cache_module, "Resample", _SpyResample)
+        monkeypatch.setattr(module, "RESAMPLE_CACHE", resample_cache_module.ResampleCache())
+        for _ in range(3):
+            AudioCombine().main(_audio([1.0, 2.0], sample_rate=48000), _audio([3.0, 4.0], sample_rate=44100))
+
+        assert created == [(44100, 48000)]
+        assert len(_resample_calls) == 3
+
 
 class TestUnsupportedMethod:
     def test_raises_value_error(self):
@@ -0,0 +1,101 @@
+"""Tests for src.disk_cache."""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import pickle
+import sys
+import types
+
+# ---------------------------------------------------------------------------
+# Mock torch before importing the module under test
+# ---------------------------------------------------------------------------
+
+
+def _save(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def _load(path, map_location=None, weights_only=False):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+torch_mock = types.ModuleType("torch")
+torch_mock.save = _save
+torch_mock.load = _load
+sys.modules["torch"] = torch_mock
+
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+module = importlib.import_module("src.disk_cache")
+
+
+def _write(path, size, mtime):
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+class TestSaveLoad:
+    def test_round_trip_leaves_no_temporary_files(self, tmp_path):
+        path = tmp_path / "nested" / "entry.pt"
+
+        assert module.save_entry(path, {"bpm": 120.0}, "test cache")
+
+        assert module.load_entry(path, "test cache") == {"bpm": 120.0}
+        assert [p.name for p in path.parent.iterdir()] == ["entry.pt"]
+
+    def test_load_marks_entry_as_recently_used(self, tmp_path):
+        path = tmp_path / "entry.pt"
+        module.save_entry(path, [1, 2], "test cache")
+        os.utime(path, (1, 1))
+
+        module.load_entry(path, "test cache")
+
+        assert path.stat().st_mtime > 1
+
+    def test_missing_entry_is_a_miss(self, tmp_path):
+        assert module.load_entry(tmp_path / "missing.pt", "test cache") is None
+
+    def test_unreadable_entry_is_discarded(self, tmp_path, caplog):
+        path = tmp_path / "broken.pt"
+        path.write_bytes(b"not a pickle")
+
+        with caplog.at_level(logging.WARNING, logger="src.disk_cache"):
+            assert module.load_entry(path, "test cache") is None
+
+        assert not path.exists()
+        assert "unreadable test cache entry broken.pt" in caplog.text
+
+    def test_write_failure_is_logged_and_ignored(self, tmp_path, caplog):
+        blocker = tmp_path / "file"
+        blocker.write_bytes(b"")
+
+        with caplog.at_level(logging.WARNING, logger="src.disk_cache"):
+            assert not module.save_entry(blocker / "entry.pt", {}, "test cache")
+
+        assert "Could not write test cache entry" in caplog.text
+
+
+class TestEvictLru:
+    def test_oldest_entries_are_removed_until_within_budget(self, tmp_path):
+        _write(tmp_path / "old.pt", 100, 1)
+        _write(tmp_path / "middle.pt", 100, 2)
+        _write(tmp_path / "new.pt", 100, 3)
+
+        module.evict_lru(tmp_path, 250)
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["middle.pt", "new.pt"]
+
+    def test_only_files_with_the_suffix_count(self, tmp_path):
+        _write(tmp_path / "other.bin", 1000, 1)
+        _write(tmp_path / "entry.pt", 100, 2)
+
+        module.evict_lru(tmp_path, 100)
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["entry.pt", "other.bin"]
@@ -85,6 +85,25 @@ GetTempo = module.GetTempo
 # ---------------------------------------------------------------------------
 
 
+def _estimate(bpm: float, confidence: float):
+    return importlib.import_module("src.tempo").TempoEstimate(bpm=bpm, confidence=confidence)
+
+
+def _values(*values):
+    return types.SimpleNamespace(tolist=lambda: list(values))
+
+
+CURVE = importlib.import_module("src.tempo").TempoCurve(
+    times=_values(4.458, 6.687), bpm=_values(120.5, 121.0), confidence=_values(0.9, 0.8)
+)
+
+
+def _patch_analyze(monkeypatch, analyze):
+    """Let TEMPO_CACHE.analyze return *analyze*'s estimate and TEMPO_CACHE.curve that estimate and CURVE."""
+    cache = types.SimpleNamespace(analyze=analyze, curve=lambda w, sr: (analyze(w, sr), CURVE))
+    monkeypatch.setattr(module, "TEMPO_CACHE", cache)
+
+
 def _make_audio(sample_rate: int = 44100) -> dict:
     """Return a minimal AUDIO dict with a batch-dim waveform."""
     waveform = MockTensor(np.random.randn(1, 2, 16000))
@@ -104,34 +123,55 @@ class TestGetTempoNode:
         assert schema["required"]["audio"] == ("AUDIO",)
 
     def test_return_types(self):
-        assert GetTempo.RETURN_TYPES == ("STRING", "FLOAT", "INTEGER")
+        assert GetTempo.RETURN_TYPES == ("STRING", "FLOAT", "INTEGER", "FLOAT", "STRING")
 
     def test_return_names(self):
-        assert GetTempo.RETURN_NAMES == ("tempo_string", "tempo_float", "tempo_integer")
+        assert GetTempo.RETURN_NAMES == ("tempo_string", "tempo_float", "tempo_integer", "confidence", "tempo_curve")
 
     def test_tempo_120_7(self, monkeypatch):
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: 120.7)
+        _patch_analyze(monkeypatch, lambda w, sr, *options: _estimate(120.7, 0.8))
         node = GetTempo()
         result = node.main(_make_audio())
-        assert result == ("121", 120.7, 120)
+        assert result == ("121", 120.7, 120, 0.8, "4.46,120.50\n6.69,121.00")
 
     def test_tempo_85_3(self, monkeypatch):
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: 85.3)
+        _patch_analyze(monkeypatch, lambda w, sr, *options: _estimate(85.3, 0.4))
         node = GetTempo()
         result = node.main(_make_audio())
-        assert result == ("85", 85.3, 85)
+        assert result[:4] == ("85", 85.3, 85, 0.4)
+
+    def test_tempo_is_clamped_to_one_bpm(self, monkeypatch):
+        _patch_analyze(monkeypatch, lambda w, sr, *options: _estimate(0.5, 0.0))
+        assert GetTempo().main(_make_audio())[1] == 1.0
 
     def test_waveform_is_squeezed_before_call(self, monkeypatch):
-        """estimate_tempo should receive a 2-d tensor (batch dim squeezed)."""
+        """The tempo analysis should receive a 2-d tensor (batch dim squeezed)."""
         received = {}
 
-        def spy(waveform, sample_rate):
+        def spy(waveform, sample_rate, *options):
             received["ndim"] = waveform.ndim
             received["shape"] = waveform.shape
-            return 100.0
+            return _estimate(100.0, 1.0)
 
-        monkeypatch.setattr(module, "estimate_tempo", spy)
+        _patch_analyze(monkeypatch, spy)
         node = GetTempo()
         node.main(_make_audio(44100))
 
         assert received["ndim"] == 2, "waveform should be squeezed to 2-d"
+
+    def test_excerpt_options_are_forwarded(self, monkeypatch):
+        received = []
+        _patch_analyze(monkeypatch, lambda w, sr, *options: received.append(options) or _estimate(100.0, 1.0))
+
+        result = GetTempo().main(_make_audio(), excerpts=3, excerpt_seconds=20.0, tolerance_bpm=0.0)
+
+        assert received == [(3, 20.0, None)], "a tolerance of 0 disables early exit"
+        assert result[4] == "", "no tempo curve from excerpts"
+
+    def test_whole_track_analysis_comes_with_the_curve(self, monkeypatch):
+        received = []
+        _patch_analyze(monkeypatch, lambda w, sr, *options: received.append(options) or _estimate(100.0, 1.0))
+
+        GetTempo().main(_make_audio())
+
+        assert received == [()], "analyzed through TEMPO_CACHE.curve without excerpts"
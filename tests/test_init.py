@@ -26,6 +26,7 @@ _torch.cat = lambda *a, **kw: None
 _torch.zeros = lambda *a, **kw: None
 _torch.linspace = lambda *a, **kw: None
 _torch.cfloat = "torch.cfloat"
+_torch.float16 = "torch.float16"
 _torch.no_grad = type("_NoGrad", (), {"__enter__": lambda s: s, "__exit__": lambda s, *a: None})
 
 _nn = types.ModuleType("torch.nn")
@@ -103,6 +104,7 @@ sys.modules.setdefault("moviepy.editor", _moviepy_editor)
 # -- folder_paths --
 _folder_paths = types.ModuleType("folder_paths")
 _folder_paths.get_temp_directory = lambda: "/tmp"
+_folder_paths.get_user_directory = lambda: "/tmp"
 sys.modules.setdefault("folder_paths", _folder_paths)
 
 # -- librosa --
@@ -130,6 +132,7 @@ ALL_NODE_KEYS = [
     "AudioVideoCombine",
     "AudioSpeedShift",
     "AudioGetTempo",
+    "AudioResample",
 ]
 
 # NODE_CLASS_MAPPINGS key -> fallback source module used by __init__.py
@@ -141,6 +144,7 @@ _KEY_TO_SRC = {
     "AudioVideoCombine": "src.combine_video_with_audio",
     "AudioSpeedShift": "src.time_shift",
     "AudioGetTempo": "src.get_tempo",
+    "AudioResample": "src.resample",
 }
 
 
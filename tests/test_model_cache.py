@@ -0,0 +1,208 @@
+"""Tests for src.model_cache.ModelCache."""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+
+import pytest
+
+# ---------------------------------------------------------------------------
+# Mock comfy.model_management before importing the module under test
+# ---------------------------------------------------------------------------
+
+comfy_mock = types.ModuleType("comfy")
+comfy_mock.__path__ = []
+mm_mock = types.ModuleType("comfy.model_management")
+mm_mock.get_torch_device = lambda: "cpu"
+comfy_mock.model_management = mm_mock
+sys.modules["comfy"] = comfy_mock
+sys.modules["comfy.model_management"] = mm_mock
+
+# Clear any previously-cached src modules so they reimport with our mocks
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+module = importlib.import_module("src.model_cache")
+ModelCache = module.ModelCache
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class _Loader:
+    """Callable loader that counts how many times it built a model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+def _bundle():
+    return types.SimpleNamespace(sample_rate=44100)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+
+class TestGetOrLoad:
+    def test_loads_once_per_key(self):
+        cache = ModelCache()
+        bundle, loader = _bundle(), _Loader()
+
+        first = cache.get_or_load(bundle, "cpu", loader)
+        second = cache.get_or_load(bundle, "cpu", loader)
+
+        assert first is second
+        assert loader.calls == 1
+
+    def test_device_and_dtype_are_part_of_key(self):
+        cache = ModelCache(max_entries=8)
+        bundle, loader = _bundle(), _Loader()
+
+        cache.get_or_load(bundle, "cpu", loader)
+        cache.get_or_load(bundle, "cuda", loader)
+        cache.get_or_load(bundle, "cpu", loader, dtype="torch.bfloat16")
+        cache.get_or_load(bundle, "cpu", loader, dtype="torch.qint8")
+
+        assert loader.calls == 4
+        assert len(cache) == 4
+
+    def test_distinct_bundles_do_not_share_entries(self):
+        cache = ModelCache()
+        loader = _Loader()
+
+        cache.get_or_load(_bundle(), "cpu", loader)
+        cache.get_or_load(_bundle(), "cpu", loader)
+
+        assert loader.calls == 2
+
+    def test_loader_error_is_not_cached(self):
+        cache = ModelCache()
+        bundle = _bundle()
+
+        def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            cache.get_or_load(bundle, "cpu", failing)
+        assert len(cache) == 0
+
+    def test_invalid_max_entries_raises(self):
+        with pytest.raises(ValueError):
+            ModelCache(max_entries=0)
+
+
+class TestEviction:
+    def test_least_recently_used_is_evicted(self):
+        cache = ModelCache(max_entries=2)
+        bundle, loader = _bundle(), _Loader()
+
+        cache.get_or_load(bundle, "cpu", loader)
+        cache.get_or_load(bundle, "cuda:0", loader)
+        cache.get_or_load(bundle, "cpu", loader)  # refresh cpu
+        cache.get_or_load(bundle, "cuda:1", loader)  # evicts cuda:0
+
+        assert loader.calls == 3
+        cache.get_or_load(bundle, "cpu", loader)
+        assert loader.calls == 3
+        cache.get_or_load(bundle, "cuda:0", loader)
+        assert loader.calls == 4
+
+    def test_evict_device(self):
+        cache = ModelCache(max_entries=4)
+        bundle, loader = _bundle(), _Loader()
+        cache.get_or_load(bundle, "cpu", loader)
+        cache.get_or_load(bundle, "cuda:0", loader)
+        cache.get_or_load(bundle, "cuda:0", loader, dtype="torch.float16")
+
+        assert cache.evict_device("cuda:0") == 2
+        assert len(cache) == 1
+
+    def test_clear(self):
+        cache = ModelCache()
+        cache.get_or_load(_bundle(), "cpu", _Loader())
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestComfyHooks:
+    @pytest.fixture(autouse=True)
+    def _comfy_memory_api(self, monkeypatch):
+        self.free_memory_calls = []
+        self.unload_calls = []
+        self.free_bytes = 0
+
+        monkeypatch.setattr(
+            mm_mock,
+            "free_memory",
+            lambda required, device, keep_loaded=(): self.free_memory_calls.append(device),
+            raising=False,
+        )
+        monkeypatch.setattr(mm_mock, "unload_all_models", lambda: self.unload_calls.append(True), raising=False)
+        monkeypatch.setattr(mm_mock, "get_free_memory", lambda device=None: self.free_bytes, raising=False)
+
+    def _filled_cache(self, cache_class=ModelCache):
+        cache = cache_class(max_entries=4)
+        bundle = _bundle()
+        cache.get_or_load(bundle, "cuda:0", _Loader())
+        cache.get_or_load(bundle, "cpu", _Loader())
+        return cache
+
+    def test_free_memory_evicts_device_when_short(self):
+        cache = self._filled_cache()
+        self.free_bytes = 0
+
+        mm_mock.free_memory(1024, "cuda:0")
+
+        assert len(cache) == 1
+        assert self.free_memory_calls == ["cuda:0"], "original free_memory must still run"
+
+    def test_free_memory_keeps_models_when_memory_available(self):
+        cache = self._filled_cache()
+        self.free_bytes = 1 << 30
+
+        mm_mock.free_memory(1024, "cuda:0")
+
+        assert len(cache) == 2
+
+    def test_unload_all_models_clears_cache(self):
+        cache = self._filled_cache()
+
+        mm_mock.unload_all_models()
+
+        assert len(cache) == 0
+        assert self.unload_calls == [True]
+
+    def test_hooks_installed_once(self):
+        cache = self._filled_cache()
+        wrapped = mm_mock.free_memory
+
+        module.install_comfy_hooks(cache)
+
+        assert mm_mock.free_memory is wrapped
+
+    def test_reload_replaces_hooks_instead_of_stacking(self, monkeypatch):
+        self._filled_cache()
+        wrapped = mm_mock.free_memory
+
+        monkeypatch.setitem(sys.modules, "comfy", comfy_mock)
+        monkeypatch.setitem(sys.modules, "comfy.model_management", mm_mock)
+        monkeypatch.delitem(sys.modules, "src.model_cache", raising=False)
+        reloaded = importlib.import_module("src.model_cache")
+        cache = self._filled_cache(reloaded.ModelCache)
+        mm_mock.free_memory(1024, "cuda:0")
+
+        assert mm_mock.free_memory is wrapped
+        assert len(getattr(wrapped, reloaded.HOOKS_ATTRIBUTE)) == 1
+        assert len(cache) == 1
+        assert self.free_memory_calls == ["cuda:0"], "the original runs once"
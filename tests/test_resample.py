@@ -1,8 +1,10 @@
 """Tests for src.resample.ChunkResampler."""
 
+import math
 import sys
 import types
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 
@@ -21,10 +23,54 @@ class MockTensor:
     def shape(self):
         return self._data.shape
 
+    @property
+    def dtype(self):
+        return self._data.dtype
+
     def to(self, device):
         self._last_device = device
         return self
 
+    def reshape(self, *shape):
+        return MockTensor(self._data.reshape(*shape))
+
+    def numel(self):
+        return self._data.size
+
+    def element_size(self):
+        return self._data.itemsize
+
+    def new_zeros(self, shape):
+        return MockTensor(np.zeros(shape, dtype=self._data.dtype))
+
+    def unfold(self, dim, size, step):
+        windows = np.lib.stride_tricks.sliding_window_view(self._data, size, axis=dim)
+        return MockTensor(windows[..., ::step, :])
+
+    def transpose(self, dim0, dim1):
+        return MockTensor(np.swapaxes(self._data, dim0, dim1))
+
+    @property
+    def T(self):
+        return MockTensor(self._data.T)
+
+    def __matmul__(self, other):
+        return MockTensor(self._data @ other._data)
+
+    def __getitem__(self, key):
+        return MockTensor(self._data[key])
+
+
+def _mock_conv1d(x, kernel, stride=1):
+    """[n, 1, frames] * [phases, 1, taps] -> [n, phases, blocks] (cross-correlation, like torch)."""
+    taps = kernel.shape[-1]
+    windows = np.lib.stride_tricks.sliding_window_view(x._data[:, 0], taps, axis=-1)[:, ::stride]
+    return MockTensor(np.einsum("nbt,pt->npb", windows, kernel._data[:, 0]))
+
+
+def _mock_pad(x, pad):
+    return MockTensor(np.pad(x._data, [(0, 0)] * (x._data.ndim - 1) + [pad]))
+
 
 torch_mock.Tensor = MockTensor
 
@@ -38,8 +84,14 @@ class _NoGrad:
 
 
 torch_mock.no_grad = _NoGrad
-torch_mock.split = lambda tensor, size, dim=-1: [tensor]
-torch_mock.cat = lambda tensors, dim=-1: tensors[0]
+torch_mock.split = lambda tensor, size, dim=-1: [
+    MockTensor(tensor._data[..., i : i + size]) for i in range(0, max(tensor.shape[-1], 1), size)
+]
+torch_mock.cat = lambda tensors, dim=-1: MockTensor(np.concatenate([t._data for t in tensors], axis=dim))
+functional_mock = types.ModuleType("torch.nn.functional")
+functional_mock.conv1d = _mock_conv1d
+functional_mock.pad = _mock_pad
+torch_mock.nn = types.SimpleNamespace(functional=functional_mock)
 sys.modules["torch"] = torch_mock
 
 torchaudio_mock = types.ModuleType("torchaudio")
@@ -47,15 +99,38 @@ transforms_mock = types.ModuleType("torchaudio.transforms")
 
 
 class MockResample:
-    def __init__(self, orig, new):
+    """Stores the frequencies and a random polyphase kernel shaped like torchaudio's."""
+
+    width = 3
+
+    def __init__(self, orig, new, **filter_params):
         self.orig = orig
         self.new = new
+        self.filter_params = filter_params
+        self.orig_freq, self.new_freq = int(orig), int(new)
+        self.gcd = math.gcd(self.orig_freq, self.new_freq)
+
+    @property
+    def kernel(self):
+        phases, stride = self.new_freq // self.gcd, self.orig_freq // self.gcd
+        rng = np.random.default_rng(phases * 7919 + stride)
+        return MockTensor(rng.standard_normal((phases, 1, 2 * self.width + stride)).astype(np.float32))
 
     def to(self, device):
         return self
 
     def __call__(self, x):
-        return x
+        """Reference full-signal resampling (same padding and trimming as torchaudio)."""
+        if self.orig_freq == self.new_freq:
+            return x
+        stride = self.orig_freq // self.gcd
+        phases = self.new_freq // self.gcd
+        flat = x._data.reshape(-1, x.shape[-1])
+        padded = np.pad(flat, [(0, 0), (self.width, self.width + stride)])
+        out = _mock_conv1d(MockTensor(padded[:, None]), self.kernel, stride=stride)._data
+        out = out.transpose(0, 2, 1).reshape(flat.shape[0], -1)
+        target = math.ceil(phases * flat.shape[-1] / stride)
+        return MockTensor(out[:, :target].reshape(*x.shape[:-1], -1))
 
 
 transforms_mock.Resample = MockResample
@@ -70,8 +145,17 @@ comfy_mock.model_management = mm_mock
 sys.modules["comfy"] = comfy_mock
 sys.modules["comfy.model_management"] = mm_mock
 
+# Clear any previously-cached src modules so src.resample_cache binds MockResample above
+# instead of the Resample mock of whichever test file imported it first
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
 # Now safe to import -------------------------------------------------------
-from src.resample import ChunkResampler  # noqa: E402
+from src.resample import AudioResample, ChunkResampler  # noqa: E402
+from src.resample_cache import RESAMPLE_CACHE, ResampleCache  # noqa: E402
+
+resample_cache_module = sys.modules["src.resample_cache"]
 
 
 # ===========================================================================
@@ -108,6 +192,16 @@ class TestReduceRatio(unittest.TestCase):
         # Fallback returns int(originals)
         self.assertEqual((a, b), (big1, big2))
 
+    def test_fractional_rate_is_reduced_exactly(self):
+        # 41674.5 / 44100 == 83349 / 88200 == 189 / 200
+        self.assertEqual(ChunkResampler.reduce_ratio(41674.5, 44100), (189, 200))
+
+    def test_results_are_memoized(self):
+        ChunkResampler.reduce_ratio.cache_clear()
+        ChunkResampler.reduce_ratio(48000, 44100)
+        ChunkResampler.reduce_ratio(48000, 44100)
+        self.assertEqual(ChunkResampler.reduce_ratio.cache_info().hits, 1)
+
 
 # ===========================================================================
 # Constructor tests
@@ -155,23 +249,25 @@ class TestConstructor(unittest.TestCase):
 
     # -- chunk_size_seconds adjustment --------------------------------------
 
-    def test_chunk_size_large_diff(self):
-        """diff > 0.08 → chunk_size_seconds capped at 1."""
-        # ratio = 48000/44100 ≈ 1.0884 → diff ≈ 0.0884 > 0.08
+    def test_chunk_size_defaults_to_requested(self):
         r = ChunkResampler(44100, 48000)
-        self.assertEqual(r.chunk_size_seconds, 1)
-
-    def test_chunk_size_medium_diff(self):
-        """0.002 < diff ≤ 0.08 → chunk_size_seconds capped at 2."""
-        # ratio = 44100/43000 ≈ 1.0256 → diff ≈ 0.0256
-        r = ChunkResampler(43000, 44100)
         self.assertEqual(r.chunk_size_seconds, 2)
+        self.assertEqual(r.plan.chunk_size_seconds, 2)
 
-    def test_chunk_size_small_diff(self):
-        """diff ≤ 0.002 → chunk_size_seconds capped at 4."""
-        # ratio = 1.0 → diff = 0
+    def test_chunk_size_is_not_capped_by_rate_difference(self):
         r = ChunkResampler(44100, 44100, chunk_size_seconds=10)
-        self.assertEqual(r.chunk_size_seconds, 4)
+        self.assertEqual(r.chunk_size_seconds, 10)
+
+    def test_chunk_size_fits_memory_budget(self):
+        with patch.object(ChunkResampler, "CHUNK_MEMORY_BYTES", 3 * 1024**2):
+            r = ChunkResampler(44100, 48000, chunk_size_seconds=10)
+        # 44100 * 4 * (161 + 160) / 147 bytes per second of input
+        self.assertEqual(r.chunk_size_seconds, 8)
+        self.assertLessEqual(r.plan.chunk_bytes, 3 * 1024**2)
+
+    def test_chunk_size_at_least_one_second(self):
+        with patch.object(ChunkResampler, "CHUNK_MEMORY_BYTES", 1):
+            self.assertEqual(ChunkResampler(44100, 48000).chunk_size_seconds, 1)
 
     def test_chunk_size_seconds_truncated_to_int(self):
         r = ChunkResampler(44100, 44100, chunk_size_seconds=3.7)
@@ -263,6 +359,21 @@ class TestTolerance(unittest.TestCase):
         # 22050 divides 44100 evenly → gcd = 22050, hard to beat
         self.assertEqual(result, 22050.0)
 
+    def test_find_optimal_freq_picks_nearest_multiple_of_largest_divisor(self):
+        # Within 48000 ± 480 the best candidate is 47775 = 13 * 3675; check against brute force.
+        lo, hi = 48000 - 480, 48000 + 480
+        best_gcd = max(math.gcd(44100, c) for c in range(lo, hi + 1))
+        result = int(ChunkResampler._find_optimal_freq(44100, 48000, 0.01))
+        self.assertEqual(math.gcd(44100, result), best_gcd)
+        nearest = min((c for c in range(lo, hi + 1) if math.gcd(44100, c) == best_gcd), key=lambda c: abs(c - 48000))
+        self.assertEqual(result, nearest)
+
+    def test_find_optimal_freq_is_memoized(self):
+        ChunkResampler._find_optimal_freq.cache_clear()
+        ChunkResampler._find_optimal_freq(44100, 48000, 0.01)
+        ChunkResampler._find_optimal_freq(44100, 48000, 0.01)
+        self.assertEqual(ChunkResampler._find_optimal_freq.cache_info().hits, 1)
+
     def test_tolerance_one_is_max(self):
         """tolerance=1.0 is the maximum allowed value."""
         r = ChunkResampler(44100, 44100, tolerance=1.0)
@@ -278,13 +389,91 @@ class TestTolerance(unittest.TestCase):
         # Result should be within ±1000 of target
         self.assertLessEqual(abs(result - 192000), 1000)
 
-    def test_chunk_size_uses_effective_ratio_after_clamp(self):
-        """chunk_size_seconds should be based on effective ratio after clamping."""
-        # orig=44100, new=40000, ratio=0.907 → below LOWER_CLAMP (0.945)
-        # Clamped to 44100*0.945 = 41674.5, effective diff = |1 - 0.945| = 0.055
-        # 0.002 < 0.055 ≤ 0.08 → chunk_size_seconds capped at 2
+    def test_plan_target_is_clamped_rate(self):
         r = ChunkResampler(44100, 40000)
-        self.assertEqual(r.chunk_size_seconds, 2)
+        self.assertEqual(r.plan.target_freq, 44100 * 0.945)
+        self.assertFalse(r.plan.snapped)
+
+
+# ===========================================================================
+# make_plan tests
+# ===========================================================================
+class TestPlan(unittest.TestCase):
+    """Tests for ChunkResampler.make_plan."""
+
+    def test_kernel_shape_matches_torchaudio(self):
+        plan = ChunkResampler.make_plan(44100, 48000)
+        self.assertEqual((plan.orig_freq, plan.new_freq), (147, 160))
+        # width = ceil(6 * 147 / (147 * 0.99)) = 7
+        self.assertEqual(plan.kernel_width, 7)
+        self.assertEqual(plan.taps, 161)
+        self.assertEqual(plan.kernel_bytes, 160 * 161 * 4)
+        self.assertEqual(plan.macs_per_second, 48000 * 161)
+        self.assertFalse(plan.snapped)
+
+    def test_filter_params_change_kernel_width(self):
+        plan = ChunkResampler.make_plan(44100, 48000, lowpass_filter_width=64, rolloff=0.5, beta=14.0)
+        self.assertEqual(plan.kernel_width, 128)
+
+    def test_identity_ratio_has_no_kernel(self):
+        plan = ChunkResampler.make_plan(44100, 44100)
+        self.assertEqual((plan.taps, plan.kernel_bytes, plan.macs_per_second), (0, 0, 0))
+
+    def test_pathological_ratio_without_tolerance_raises(self):
+        """44100 -> 44101 needs a 44101 x 44115 kernel (~7.8 GB); it is never planned."""
+        with self.assertRaisesRegex(ValueError, "set tolerance to at least 0.001 to resample to 44100 Hz"):
+            ChunkResampler.make_plan(44100, 44101)
+
+    def test_pathological_ratio_is_snapped_within_tolerance(self):
+        with self.assertLogs("src.resample", "INFO") as logs:
+            plan = ChunkResampler.make_plan(44100, 44101, tolerance=0.01)
+        self.assertTrue(plan.snapped)
+        self.assertEqual(plan.target_freq, 44101)
+        self.assertEqual(plan.planned_freq, 44100)
+        self.assertIn("44100 Hz instead of 44101 Hz", logs.output[0])
+        self.assertLessEqual(plan.kernel_bytes, ChunkResampler.MAX_KERNEL_BYTES)
+
+    def test_clamped_target_is_snapped_to_nearest_rate_that_fits(self):
+        target = 44100 * ChunkResampler.DEFAULT_UPPER_CLAMP
+        plan = ChunkResampler(44100, 44100 * 2).plan
+        self.assertTrue(plan.snapped)
+        self.assertLessEqual(plan.kernel_bytes, ChunkResampler.MAX_KERNEL_BYTES)
+
+        def fits(candidate):
+            o, n = ChunkResampler.reduce_ratio(44100, candidate)
+            width = math.ceil(6 * o / (min(o, n) * 0.99))
+            return o == n or n * (2 * width + o) * 4 <= ChunkResampler.MAX_KERNEL_BYTES
+
+        margin = target * ChunkResampler.SNAP_TOLERANCE
+        nearest = min(
+            (c for c in range(int(target - margin), int(target + margin) + 1) if fits(c)),
+            key=lambda c: abs(c - target),
+        )
+        self.assertEqual(plan.planned_freq, nearest)
+
+    def test_snap_respects_wider_tolerance(self):
+        with patch.object(ChunkResampler, "MAX_KERNEL_BYTES", 64):
+            wide = ChunkResampler.make_plan(44100, 48000, tolerance=0.1)
+            with self.assertRaises(ValueError):
+                ChunkResampler.make_plan(44100, 48000, tolerance=0.01)
+        self.assertEqual(wide.planned_freq, 44100)
+
+    def test_unsnappable_ratio_raises(self):
+        with patch.object(ChunkResampler, "MAX_KERNEL_BYTES", 1), self.assertRaisesRegex(ValueError, "common divisor"):
+            ChunkResampler.make_plan(44100, 48000, tolerance=0.05)
+
+    def test_fitting_ratio_is_not_snapped_despite_tolerance(self):
+        r = ChunkResampler(44100, 48000, tolerance=0.05)
+        self.assertFalse(r.plan.snapped)
+        self.assertEqual(r.plan.planned_freq, 48000)
+        self.assertEqual(r.effective_ratio, 48000 / 44100)
+
+    def test_expected_seconds_scales_with_work(self):
+        plan = ChunkResampler.make_plan(44100, 48000)
+        one = plan.expected_seconds(44100)
+        self.assertGreater(one, 0)
+        self.assertAlmostEqual(plan.expected_seconds(44100 * 10, rows=2), 20 * one)
+        self.assertAlmostEqual(one, plan.macs_per_second / ChunkResampler.ASSUMED_MACS_PER_SECOND)
 
 
 # ===========================================================================
@@ -333,5 +522,207 @@ class TestCall(unittest.TestCase):
             torch_mock.cat = orig_cat
 
 
+# ===========================================================================
+# Streaming polyphase tests
+# ===========================================================================
+class TestStream(unittest.TestCase):
+    """The chunked polyphase engine must match resampling the whole signal at once."""
+
+    def _reference(self, resampler, wav):
+        return resampler.resample(wav)._data
+
+    def test_call_matches_full_signal(self):
+        rng = np.random.default_rng(0)
+        for orig, new, shape in [
+            (44100, 48000, (2, 2, 44100 * 3 + 17)),  # matmul path, several chunks
+            (44100, 44100, (1, 3, 10_000)),  # single phase, conv1d path
+            (48000, 45600, (2, 5)),  # shorter than one filter block
+        ]:
+            with self.subTest(orig=orig, new=new):
+                resampler = ChunkResampler(orig, new, chunk_size_seconds=1)
+                wav = MockTensor(rng.standard_normal(shape).astype(np.float32))
+                expected = self._reference(resampler, wav)
+                result = resampler(wav)._data
+                self.assertEqual(result.shape, expected.shape)
+                np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+    def test_uneven_chunks_are_seam_free(self):
+        resampler = ChunkResampler(44100, 48000)
+        wav = np.random.default_rng(1).standard_normal((2, 5000)).astype(np.float32)
+        bounds = [0, 1, 150, 151, 2000, 4999, 5000]
+        chunks = [MockTensor(wav[:, a:b]) for a, b in zip(bounds, bounds[1:])]
+
+        streamed = np.concatenate([out._data for out in resampler.stream(chunks)], axis=-1)
+
+        np.testing.assert_allclose(streamed, self._reference(resampler, MockTensor(wav)), rtol=1e-4, atol=1e-4)
+
+    def test_empty_stream_yields_nothing(self):
+        self.assertEqual(list(ChunkResampler(44100, 48000).stream([])), [])
+
+    def test_chunks_are_measured_in_input_seconds(self):
+        sizes = []
+        original_split = torch_mock.split
+
+        def spy_split(tensor, size, dim=-1):
+            sizes.append(size)
+            return original_split(tensor, size, dim)
+
+        torch_mock.split = spy_split
+        try:
+            ChunkResampler(44100, 48000, chunk_size_seconds=1)(MockTensor(np.zeros((1, 100))))
+        finally:
+            torch_mock.split = original_split
+        self.assertEqual(sizes, [44100])
+
+
+# ===========================================================================
+# ResampleCache tests
+# ===========================================================================
+class TestResampleCache(unittest.TestCase):
+    """Tests for the shared Resample kernel cache."""
+
+    def test_same_key_returns_same_transform(self):
+        cache = ResampleCache()
+        self.assertIs(cache.get(48000, 44100, "cpu"), cache.get(48000, 44100, "cpu"))
+        self.assertEqual(len(cache), 1)
+
+    def test_device_dtype_and_filter_params_are_part_of_key(self):
+        cache = ResampleCache()
+        base = cache.get(48000, 44100, "cpu")
+        self.assertIsNot(base, cache.get(48000, 44100, "cuda"))
+        self.assertIsNot(base, cache.get(48000, 44100, "cpu", dtype="float64"))
+        self.assertEqual(len(cache), 3)
+
+    def test_filter_params_passed_to_resample(self):
+        calls = []
+
+        class _SpyResample(MockResample):
+            def __init__(self, orig, new, **kwargs):
+                super().__init__(orig, new)
+                calls.append(kwargs)
+
+        cache = ResampleCache()
+        original = resample_cache_module.Resample
+        resample_cache_module.Resample = _SpyResample
+        try:
+            cache.get(48000, 44100, lowpass_filter_width=16)
+            cache.get(48000, 44100, lowpass_filter_width=16)
+            cache.get(48000, 44100, lowpass_filter_width=64)
+        finally:
+            resample_cache_module.Resample = original
+        self.assertEqual(calls, [{"lowpass_filter_width": 16}, {"lowpass_filter_width": 64}])
+
+    def test_least_recently_used_is_evicted_by_kernel_size(self):
+        kernel = ResampleCache.kernel_bytes(MockResample(2, 3))
+        cache = ResampleCache(max_bytes=2 * kernel)
+        first = cache.get(2, 3)
+        cache.get(2, 3, "cuda")
+        cache.get(2, 3)  # refresh
+        cache.get(4, 6)  # same kernel size, evicts the cuda entry
+        self.assertIs(cache.get(2, 3), first)
+        self.assertEqual(len(cache), 2)
+
+    def test_kernel_larger_than_budget_is_not_cached(self):
+        cache = ResampleCache(max_bytes=ResampleCache.kernel_bytes(MockResample(2, 3)) - 1)
+        self.assertIsNot(cache.get(2, 3), cache.get(2, 3))
+        self.assertEqual(len(cache), 0)
+
+    def test_evict_device(self):
+        cache = ResampleCache()
+        cache.get(1, 2, "cuda")
+        kept = cache.get(1, 2, "cpu")
+        self.assertEqual(cache.evict_device("cuda"), 1)
+        self.assertIs(cache.get(1, 2, "cpu"), kept)
+        self.assertEqual(len(cache), 1)
+
+    def test_unloading_comfy_models_clears_the_cache(self):
+        unloaded = []
+        mm_mock.unload_all_models = lambda: unloaded.append(True)
+        try:
+            cache = ResampleCache()
+            cache.get(1, 2)
+            mm_mock.unload_all_models()
+        finally:
+            del mm_mock.unload_all_models
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(unloaded, [True])
+
+    def test_clear(self):
+        cache = ResampleCache()
+        cache.get(1, 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_negative_max_bytes_raises(self):
+        with self.assertRaises(ValueError):
+            ResampleCache(max_bytes=-1)
+
+    def test_chunk_resamplers_share_transform(self):
+        RESAMPLE_CACHE.clear()
+        self.assertIs(ChunkResampler(44100, 48000).resample, ChunkResampler(44100, 48000).resample)
+
+
+# ===========================================================================
+# AudioResample node tests
+# ===========================================================================
+class TestAudioResampleNode(unittest.TestCase):
+    """Tests for the AudioResample ComfyUI node."""
+
+    def _audio(self, frames=4800, sample_rate=48000):
+        wav = np.random.default_rng(2).standard_normal((1, 2, frames)).astype(np.float32)
+        return {"waveform": MockTensor(wav), "sample_rate": sample_rate}
+
+    def test_input_types(self):
+        schema = AudioResample.INPUT_TYPES()
+        self.assertIn("audio", schema["required"])
+        self.assertEqual(schema["required"]["sample_rate"][0], "INT")
+        self.assertEqual(schema["optional"]["preset"][0], list(AudioResample.PRESETS))
+        self.assertEqual(schema["optional"]["preset"][1]["default"], "balanced")
+        self.assertEqual(AudioResample.RETURN_TYPES, ("AUDIO", "FLOAT"))
+
+    def test_resamples_to_target_rate(self):
+        audio, ratio = AudioResample().main(self._audio(), sample_rate=16000)
+        self.assertEqual(audio["sample_rate"], 16000)
+        self.assertAlmostEqual(ratio, 1 / 3)
+        self.assertEqual(audio["waveform"].shape, (1, 2, 1600))
+
+    def test_large_ratios_are_not_clamped(self):
+        audio, ratio = AudioResample().main(self._audio(), sample_rate=96000)
+        self.assertEqual(audio["sample_rate"], 96000)
+        self.assertAlmostEqual(ratio, 2.0)
+
+    def test_same_rate_passes_through(self):
+        original = self._audio()
+        audio, ratio = AudioResample().main(original, sample_rate=48000)
+        self.assertIs(audio, original)
+        self.assertEqual(ratio, 1.0)
+
+    def test_preset_filter_params_reach_resample(self):
+        RESAMPLE_CACHE.clear()
+        AudioResample().main(self._audio(), sample_rate=44100, preset="kaiser_best")
+        resampler = RESAMPLE_CACHE.get(160, 147, "cpu", **AudioResample.PRESETS["kaiser_best"])
+        self.assertEqual(resampler.filter_params["resampling_method"], "sinc_interp_kaiser")
+        self.assertEqual(len(RESAMPLE_CACHE), 1)
+
+    def test_tolerance_reports_snapped_rate(self):
+        audio, ratio = AudioResample().main(self._audio(), sample_rate=44101, tolerance=0.01)
+        self.assertEqual(audio["sample_rate"], round(48000 * ratio))
+        self.assertNotEqual(audio["sample_rate"], 44101)
+        self.assertLessEqual(abs(audio["sample_rate"] - 44101), 441)
+
+    def test_tolerance_keeps_exact_rate_when_kernel_fits(self):
+        audio, ratio = AudioResample().main(self._audio(), sample_rate=44100, tolerance=0.05)
+        self.assertEqual(audio["sample_rate"], 44100)
+        self.assertAlmostEqual(ratio, 44100 / 48000)
+
+    def test_oversized_kernel_without_tolerance_raises(self):
+        with self.assertRaisesRegex(ValueError, "tolerance"):
+            AudioResample().main(self._audio(), sample_rate=44101)
+
+    def test_unknown_preset_raises(self):
+        with self.assertRaises(ValueError):
+            AudioResample().main(self._audio(), sample_rate=16000, preset="ultra")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib
+import pickle
 import sys
 import types
 from unittest.mock import MagicMock, patch
@@ -53,12 +54,23 @@ class MockTensor:
 
     # -- device movement ----------------------------------------------------
     def to(self, device):
+        if isinstance(device, np.dtype):
+            return MockTensor(self._data.astype(device), device=self.device)
         t = MockTensor(self._data.copy(), device=str(device))
         return t
 
     def cpu(self):
         return MockTensor(self._data.copy(), device="cpu")
 
+    def detach(self):
+        return self
+
+    def contiguous(self):
+        return self
+
+    def numpy(self):
+        return np.ascontiguousarray(self._data)
+
     # -- shape manipulation -------------------------------------------------
     def squeeze(self, dim=None):
         return MockTensor(np.squeeze(self._data, axis=dim), device=self.device)
@@ -66,17 +78,50 @@ class MockTensor:
     def unsqueeze(self, dim):
         return MockTensor(np.expand_dims(self._data, axis=dim), device=self.device)
 
+    def unbind(self, dim=0):
+        return tuple(MockTensor(np.take(self._data, i, axis=dim), device=self.device) for i in range(self.shape[dim]))
+
     # -- reductions ---------------------------------------------------------
     def mean(self, dim=None, keepdim=False):
         if dim is None:
             return MockTensor(np.array(self._data.mean(), dtype=np.float32), device=self.device)
         return MockTensor(self._data.mean(axis=dim, keepdims=keepdim), device=self.device)
 
-    def std(self, *args, **kwargs):
-        val = self._data.std()
-        if val == 0:
-            val = 1.0
-        return MockTensor(np.array(val, dtype=np.float32), device=self.device)
+    def std(self, dim=None, keepdim=False):
+        val = np.asarray(self._data.std(axis=dim, keepdims=keepdim, ddof=1), dtype=np.float32)
+        val = np.where(val == 0, 1.0, val).astype(np.float32)
+        return MockTensor(val, device=self.device)
+
+    def sum(self, dim=None, keepdim=False):
+        return MockTensor(self._data.sum(axis=dim, keepdims=keepdim), device=self.device)
+
+    def abs(self):
+        return MockTensor(np.abs(self._data), device=self.device)
+
+    def amax(self, dim=None):
+        return MockTensor(self._data.max(axis=dim), device=self.device)
+
+    def argmax(self, dim=None):
+        return _MockIndexTensor(self._data.argmax(axis=dim), device=self.device)
+
+    def flip(self, dim):
+        return _wrap_like(self, np.flip(self._data, axis=dim))
+
+    def all(self):
+        return bool(self._data.all())
+
+    def int(self):
+        return _MockIndexTensor(self._data.astype(np.int64), device=self.device)
+
+    def sqrt(self):
+        return MockTensor(np.sqrt(self._data), device=self.device)
+
+    def clamp_min(self, value):
+        return MockTensor(np.maximum(self._data, value), device=self.device)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
 
     # -- arithmetic ---------------------------------------------------------
     def __sub__(self, other):
@@ -95,6 +140,17 @@ class MockTensor:
         o = other._data if isinstance(other, MockTensor) else other
         return MockTensor(self._data + o, device=self.device)
 
+    def __pow__(self, other):
+        return MockTensor(self._data**other, device=self.device)
+
+    def __gt__(self, other):
+        o = other._data if isinstance(other, MockTensor) else other
+        return _MockIndexTensor(self._data > o, device=self.device)
+
+    def __le__(self, other):
+        o = other._data if isinstance(other, MockTensor) else other
+        return _MockIndexTensor(self._data <= o, device=self.device)
+
     def __iadd__(self, other):
         o = other._data if isinstance(other, MockTensor) else other
         self._data = self._data + o
@@ -111,6 +167,44 @@ class MockTensor:
         return self._data.ndim
 
 
+class _MockIndexTensor(MockTensor):
+    """MockTensor that keeps integer/bool dtypes (used for lengths and masks)."""
+
+    def __init__(self, data, *, device="cpu"):
+        self._data = np.asarray(data)
+        self.device = device
+
+    def __rsub__(self, other):
+        return _MockIndexTensor(other - self._data, device=self.device)
+
+    def __eq__(self, other):
+        o = other._data if isinstance(other, MockTensor) else other
+        return _MockIndexTensor(self._data == o, device=self.device)
+
+    def __lt__(self, other):
+        o = other._data if isinstance(other, MockTensor) else other
+        return _MockIndexTensor(self._data < o, device=self.device)
+
+    def __gt__(self, other):
+        o = other._data if isinstance(other, MockTensor) else other
+        return _MockIndexTensor(self._data > o, device=self.device)
+
+    def __getitem__(self, key):
+        return _MockIndexTensor(self._data[key], device=self.device)
+
+    def max(self):
+        return _MockIndexTensor(self._data.max(), device=self.device)
+
+    def masked_fill(self, mask, value):
+        return _MockIndexTensor(np.where(mask._data, value, self._data), device=self.device)
+
+    __hash__ = MockTensor.__hash__
+
+
+def _wrap_like(tensor, data):
+    return type(tensor)(data, device=tensor.device)
+
+
 # ---------------------------------------------------------------------------
 # Mock torch / torchaudio / comfy – installed before importing separation.py
 # ---------------------------------------------------------------------------
@@ -128,11 +222,49 @@ def _mock_zeros(*shape_args, device="cpu", **kwargs):
 torch_mock = types.ModuleType("torch")
 torch_mock.Tensor = MockTensor
 torch_mock.zeros = _mock_zeros
+torch_mock.arange = lambda n, device="cpu": _MockIndexTensor(np.arange(n), device=device)
+torch_mock.cat = lambda tensors, dim=0: MockTensor(
+    np.concatenate([t._data for t in tensors], axis=dim), device=tensors[0].device
+)
+torch_mock.stack = lambda tensors, dim=0: MockTensor(np.stack([t._data for t in tensors], axis=dim))
+
+
+def _mock_save(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def _mock_load(path, map_location=None, weights_only=False):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+torch_mock.save = _mock_save
+torch_mock.load = _mock_load
 torch_mock.device = str  # torch.device(x) → str(x)
 torch_mock.no_grad = MagicMock(
     return_value=MagicMock(__enter__=MagicMock(return_value=None), __exit__=MagicMock(return_value=False))
 )
-torch_mock.nn = types.SimpleNamespace(Module=object)
+torch_mock.nn = types.SimpleNamespace(Module=object, Linear="nn.Linear", LSTM="nn.LSTM")
+torch_mock.bfloat16 = "torch.bfloat16"
+torch_mock.float16 = "torch.float16"
+torch_mock.qint8 = "torch.qint8"
+torch_mock.cuda = types.SimpleNamespace(is_bf16_supported=lambda: True)
+_autocast_calls = []
+
+
+class _MockAutocast:
+    def __init__(self, device_type, dtype=None):
+        _autocast_calls.append((device_type, dtype))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+torch_mock.autocast = _MockAutocast
 torch_mock.cfloat = "cfloat"
 sys.modules["torch"] = torch_mock
 
@@ -208,11 +340,22 @@ comfy_mod.model_management = comfy_mm
 sys.modules["comfy"] = comfy_mod
 sys.modules["comfy.model_management"] = comfy_mm
 
+# Clear any previously-cached src modules so they reimport with our mocks
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
 # --- src._types (AUDIO is just a TypedDict; stub the import) ---------------
 src_types = types.ModuleType("src._types")
 src_types.AUDIO = dict
 sys.modules["src._types"] = src_types
 
+# --- folder_paths (the stem cache defaults to ComfyUI's user directory) -----
+folder_paths_mock = types.ModuleType("folder_paths")
+folder_paths_mock.get_temp_directory = lambda: "/tmp"
+folder_paths_mock.get_user_directory = lambda: "/tmp"
+sys.modules.setdefault("folder_paths", folder_paths_mock)
+
 # --- src.utils – provide a real-enough ensure_stereo ----------------------
 src_utils = types.ModuleType("src.utils")
 
@@ -230,6 +373,14 @@ sys.modules["src.utils"] = src_utils
 # Now import the module under test
 separation = importlib.import_module("src.separation")
 AudioSeparation = separation.AudioSeparation
+StemCache = importlib.import_module("src.stem_cache").StemCache
+resample_cache_module = importlib.import_module("src.resample_cache")
+
+
+@pytest.fixture(autouse=True)
+def _disabled_stem_cache(monkeypatch, tmp_path):
+    """Run every separation for real unless a test opts into the stem cache."""
+    monkeypatch.setattr(separation, "STEM_CACHE", StemCache(tmp_path / "stems", max_bytes=0))
 
 
 # ===========================================================================
@@ -287,6 +438,13 @@ class TestInputTypes:
         schema = AudioSeparation.INPUT_TYPES()
         assert schema["optional"]["chunk_fade_shape"][1]["default"] == "linear"
 
+    def test_chunk_batch_size_default(self):
+        schema = AudioSeparation.INPUT_TYPES()
+        spec = schema["optional"]["chunk_batch_size"]
+        assert spec[0] == "INT"
+        assert spec[1]["default"] == 1
+        assert spec[1]["min"] == 1
+
 
 # ===========================================================================
 # 2. RETURN_TYPES / RETURN_NAMES
@@ -362,6 +520,12 @@ class TestSourcesToTuple:
         with pytest.raises(ValueError, match="Missing source bass"):
             self.node.sources_to_tuple(sources)
 
+    def test_batched_sources_keep_batch_dim(self):
+        sources = {k: MockTensor(shape=(3, 2, 100)) for k in ["bass", "drums", "other", "vocals"]}
+        result = self.node.sources_to_tuple(sources)
+        for audio in result:
+            assert audio["waveform"].shape == (3, 2, 100)
+
     def test_extra_sources_ignored(self):
         sources = self._make_sources()
         sources["extra"] = MockTensor(shape=(2, 44100))
@@ -479,6 +643,161 @@ class TestSeparateSources:
         assert result.device == "cpu"
 
 
+# ===========================================================================
+# 4b. Chunk planning and batched inference
+# ===========================================================================
+
+
+def _source_scaling_forward(chunk):
+    """Deterministic stand-in for Demucs: source i is the chunk scaled by i + 1."""
+    data = np.stack([chunk._data * (i + 1) for i in range(4)], axis=1)
+    return MockTensor(data)
+
+
+class TestPlanChunks:
+    def test_windows_cover_whole_track(self):
+        sr = 100
+        length = sr * 35
+        windows = AudioSeparation.plan_chunks(length, int(sr * 10 * 1.1), 0.1 * sr)
+        assert windows[0][0] == 0
+        assert windows[-1][1] == length
+        for (_, prev_end, _, _), (start, _, _, _) in zip(windows, windows[1:]):
+            assert start < prev_end, "consecutive windows must overlap"
+
+    def test_fades(self):
+        sr = 100
+        windows = AudioSeparation.plan_chunks(sr * 35, int(sr * 10 * 1.1), 0.1 * sr)
+        assert windows[0][2:] == (0, 10)
+        assert all(w[2] == 10 for w in windows[1:])
+        assert windows[-1][3] == 0
+
+    def test_short_track_single_window(self):
+        windows = AudioSeparation.plan_chunks(500, 1100, 10.0)
+        assert windows == [(0, 500, 0, 10)]
+
+    def test_group_chunks_respects_batch_size(self):
+        windows = [(i * 10, i * 10 + 12, 2, 2) for i in range(7)]
+        groups = AudioSeparation.group_chunks(windows, 3)
+        assert [len(g) for g in groups] == [3, 3, 1]
+
+    def test_group_chunks_splits_on_different_fades(self):
+        windows = [(0, 10, 0, 2), (8, 20, 2, 2), (18, 30, 2, 2), (28, 40, 2, 0)]
+        groups = AudioSeparation.group_chunks(windows, 8)
+        assert [len(g) for g in groups] == [1, 2, 1]
+
+
+class TestBatchedSeparateSources:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        self.model = _MockModel()
+
+    def _mix(self, seconds, sr=100):
+        return MockTensor(np.random.randn(2, 2, int(sr * seconds)).astype(np.float32))
+
+    def test_matches_serial_output(self):
+        mix = self._mix(47)
+        self.model.forward = _source_scaling_forward
+        serial = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1)
+        batched = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=4)
+        np.testing.assert_allclose(batched._data, serial._data, rtol=1e-6)
+
+    def test_fewer_forward_calls(self):
+        mix = self._mix(95)
+        calls = []
+
+        def _forward(chunk):
+            calls.append(chunk.shape[0])
+            return _source_scaling_forward(chunk)
+
+        self.model.forward = _forward
+        self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1)
+        serial_calls = len(calls)
+        calls.clear()
+        self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=8)
+
+        assert len(calls) < serial_calls
+        assert max(calls) <= 8 * mix.shape[0]
+
+    def test_main_forwards_batch_size(self, monkeypatch):
+        captured = {}
+        original_sep = self.node.separate_sources
+
+        def spy_separate(model, mix, sr, **kw):
+            captured.update(kw)
+            return original_sep(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "separate_sources", spy_separate)
+        self.node.main(_make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR), chunk_batch_size=4)
+        assert captured["batch_size"] == 4
+
+
+class TestStreamingSources:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        self.model = _MockModel()
+        self.model.forward = _source_scaling_forward
+
+    def test_regions_are_contiguous_and_ordered(self):
+        mix = MockTensor(np.random.randn(1, 2, 4321).astype(np.float32))
+        regions = list(self.node.iter_sources(self.model, mix, 100, segment=10.0, overlap=0.1))
+        assert regions[0][0] == 0
+        for (start, region), (next_start, _) in zip(regions, regions[1:]):
+            assert start + region.shape[-1] == next_start
+        assert regions[-1][0] + regions[-1][1].shape[-1] == 4321
+
+    @pytest.mark.parametrize("batch_size", [1, 3])
+    def test_matches_in_memory_output(self, batch_size):
+        mix = MockTensor(np.random.randn(2, 2, 4321).astype(np.float32))
+        expected = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1)
+        streamed = np.concatenate(
+            [
+                region._data
+                for _, region in self.node.iter_sources(
+                    self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=batch_size
+                )
+            ],
+            axis=-1,
+        )
+        np.testing.assert_allclose(streamed, expected._data, rtol=1e-5, atol=1e-6)
+
+    def test_only_windows_move_to_device(self):
+        mix = MockTensor(np.random.randn(1, 2, 3000).astype(np.float32), device="cpu")
+        seen = []
+
+        def _forward(chunk):
+            seen.append((chunk.device, chunk.shape[-1]))
+            return _source_scaling_forward(chunk)
+
+        self.model.forward = _forward
+        regions = list(self.node.iter_sources(self.model, mix, 100, segment=10.0, overlap=0.1, device="cuda"))
+
+        assert all(device == "cuda" for device, _ in seen)
+        assert all(frames < 3000 for _, frames in seen)
+        assert all(region.device == "cpu" for _, region in regions)
+
+    def test_main_streaming_matches_default(self):
+        data = np.random.randn(2, 2, 6000).astype(np.float32)
+        data[1, :, 4000:] = 0.0
+        audio = {"waveform": MockTensor(data), "sample_rate": _MODEL_SR}
+
+        default = self.node.main(audio, chunk_length=0.05, chunk_overlap=0.01)
+        streamed = self.node.main(audio, chunk_length=0.05, chunk_overlap=0.01, streaming=True)
+        for a, b in zip(default, streamed):
+            np.testing.assert_allclose(b["waveform"]._data, a["waveform"]._data, rtol=1e-5, atol=1e-6)
+
+    def test_main_streaming_keeps_mix_on_cpu(self, monkeypatch):
+        devices = []
+        original_iter = self.node.iter_sources
+
+        def spy_iter(model, mix, sr, **kw):
+            devices.append((mix.device, kw["device"]))
+            return original_iter(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "iter_sources", spy_iter)
+        self.node.main(_make_audio(channels=2, frames=4410, sample_rate=_MODEL_SR), streaming=True)
+        assert devices == [("cpu", "cuda")]
+
+
 # ===========================================================================
 # 5. main flow – end-to-end with mocked pipeline
 # ===========================================================================
@@ -530,7 +849,8 @@ class TestMainFlow:
                 super().__init__(orig, new)
                 created_resamplers.append((orig, new))
 
-        monkeypatch.setattr(separation, "Resample", _SpyResample)
+        monkeypatch.setattr(resample_cache_module, "Resample", _SpyResample)
+        monkeypatch.setattr(separation, "RESAMPLE_CACHE", resample_cache_module.ResampleCache())
 
         audio = _make_audio(channels=2, frames=22050, sample_rate=22050)
         self.node.main(audio)
@@ -547,12 +867,30 @@ class TestMainFlow:
                 super().__init__(orig, new)
                 created_resamplers.append((orig, new))
 
-        monkeypatch.setattr(separation, "Resample", _SpyResample)
+        monkeypatch.setattr(resample_cache_module, "Resample", _SpyResample)
+        monkeypatch.setattr(separation, "RESAMPLE_CACHE", resample_cache_module.ResampleCache())
 
         audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
         self.node.main(audio)
         assert len(created_resamplers) == 0
 
+    def test_resample_kernel_reused_across_calls(self, monkeypatch):
+        """The Resample transform comes from the shared cache, so its kernel is built once."""
+        created_resamplers = []
+
+        class _SpyResample(_MockResample):
+            def __init__(self, orig, new):
+                super().__init__(orig, new)
+                created_resamplers.append((orig, new))
+
+        monkeypatch.setattr(resample_cache_module, "Resample", _SpyResample)
+        monkeypatch.setattr(separation, "RESAMPLE_CACHE", resample_cache_module.ResampleCache())
+
+        audio = _make_audio(channels=2, frames=22050, sample_rate=22050)
+        self.node.main(audio)
+        AudioSeparation().main(audio)
+        assert created_resamplers == [(22050, _MODEL_SR)]
+
     def test_normalization_applied(self, monkeypatch):
         """waveform should be normalized using ref = waveform.mean(0)."""
         captured = {}
@@ -592,6 +930,463 @@ class TestMainFlow:
             assert r["sample_rate"] == _MODEL_SR
 
 
+# ===========================================================================
+# 5b. Batched AUDIO inputs
+# ===========================================================================
+
+
+class TestBatchedInput:
+    def setup_method(self):
+        self.node = AudioSeparation()
+
+    def test_batch_preserved_in_outputs(self):
+        audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
+        audio["waveform"] = MockTensor(np.random.randn(3, 2, 44100).astype(np.float32))
+        result = self.node.main(audio)
+        for r in result:
+            assert r["waveform"].shape == (3, 2, 44100)
+
+    def test_single_pass_for_whole_batch(self, monkeypatch):
+        shapes = []
+        original_sep = self.node.separate_sources
+
+        def spy_separate(model, mix, sr, **kw):
+            shapes.append(mix.shape)
+            return original_sep(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "separate_sources", spy_separate)
+        audio = {"waveform": MockTensor(np.random.randn(4, 2, 22050)), "sample_rate": _MODEL_SR}
+        self.node.main(audio)
+        assert shapes == [(4, 2, 22050)]
+
+    def test_per_item_normalization(self, monkeypatch):
+        captured = {}
+        original_sep = self.node.separate_sources
+
+        def spy_separate(model, mix, sr, **kw):
+            captured["mix"] = mix
+            return original_sep(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "separate_sources", spy_separate)
+        data = np.random.randn(2, 2, 8000).astype(np.float32)
+        data[1] = data[1] * 50 + 3
+        self.node.main({"waveform": MockTensor(data), "sample_rate": _MODEL_SR})
+
+        mix = captured["mix"]._data
+        for item in range(2):
+            assert abs(mix[item].mean()) < 1e-3
+            assert mix[item].mean(axis=0).std(ddof=1) == pytest.approx(1.0, rel=1e-3)
+
+    def test_2d_waveform_treated_as_single_item(self):
+        audio = {"waveform": MockTensor(np.random.randn(2, 8000)), "sample_rate": _MODEL_SR}
+        result = self.node.main(audio)
+        assert result[0]["waveform"].shape == (1, 2, 8000)
+
+
+class TestRaggedBatch:
+    def _padded_batch(self):
+        data = np.random.randn(2, 2, 1000).astype(np.float32)
+        data[1, :, 600:] = 0.0
+        return MockTensor(data)
+
+    def test_valid_lengths(self):
+        lengths = AudioSeparation.valid_lengths(self._padded_batch())
+        assert list(lengths._data) == [1000, 600]
+
+    def test_single_clip_ending_in_silence_is_not_padding(self):
+        data = np.random.randn(1, 2, 1000).astype(np.float32)
+        data[..., 600:] = 0.0
+        lengths = AudioSeparation.valid_lengths(MockTensor(data))
+        assert list(lengths._data) == [1000]
+
+    def test_longest_items_ending_in_silence_are_not_padding(self):
+        data = self._padded_batch()._data
+        data[0, :, 900:] = 0.0
+        lengths = AudioSeparation.valid_lengths(MockTensor(data))
+        assert list(lengths._data) == [1000, 600]
+
+    def test_silent_item_counts_as_full_length(self):
+        lengths = AudioSeparation.valid_lengths(MockTensor(np.zeros((1, 2, 100))))
+        assert list(lengths._data) == [100]
+
+    def test_equal_lengths_have_no_mask(self):
+        ref = MockTensor(np.random.randn(2, 1, 500))
+        _, _, mask = AudioSeparation.normalization_stats(ref, _MockIndexTensor(np.array([500, 500])))
+        assert mask is None
+
+    def test_stats_ignore_padding(self):
+        waveform = self._padded_batch()
+        ref = waveform.mean(1, keepdim=True)
+        mean, std, mask = AudioSeparation.normalization_stats(ref, AudioSeparation.valid_lengths(waveform))
+
+        valid = ref._data[1, 0, :600]
+        assert mean._data[1, 0, 0] == pytest.approx(valid.mean(), abs=1e-5)
+        assert std._data[1, 0, 0] == pytest.approx(valid.std(ddof=1), rel=1e-4)
+        assert mask._data[1, 0, 599] == 1.0
+        assert mask._data[1, 0, 600] == 0.0
+
+    def test_padding_stays_silent_in_outputs(self):
+        node = AudioSeparation()
+        data = np.random.randn(2, 2, 4000).astype(np.float32) + 1.0
+        data[1, :, 2500:] = 0.0
+
+        result = node.main({"waveform": MockTensor(data), "sample_rate": _MODEL_SR})
+        for r in result:
+            assert np.all(r["waveform"]._data[1, :, 2500:] == 0.0)
+
+
+# ===========================================================================
+# 5c. Stem selection
+# ===========================================================================
+
+
+class TestStemSelection:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        self.model = _MockModel()
+        self.model.forward = _source_scaling_forward
+
+    def test_stems_option_defaults_to_all(self):
+        spec = AudioSeparation.INPUT_TYPES()["optional"]["stems"]
+        assert spec[0] == "STRING"
+        assert AudioSeparation.parse_stems(spec[1]["default"]) == set(AudioSeparation.STEMS)
+
+    @pytest.mark.parametrize(
+        ("stems", "expected"),
+        [
+            ("vocals", {"vocals"}),
+            (" Drums ,bass,", {"drums", "bass"}),
+            ("", {"bass", "drums", "other", "vocals"}),
+        ],
+    )
+    def test_parse_stems(self, stems, expected):
+        assert AudioSeparation.parse_stems(stems) == expected
+
+    def test_unknown_stem_raises(self):
+        with pytest.raises(ValueError, match="guitar"):
+            AudioSeparation.parse_stems("vocals, guitar")
+
+    @pytest.mark.parametrize("batch_size", [1, 3])
+    def test_separate_sources_keeps_only_selected(self, batch_size):
+        mix = MockTensor(np.random.randn(1, 2, 4321).astype(np.float32))
+        full = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=batch_size)
+        selected = self.node.separate_sources(
+            self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=batch_size, source_indices=[3, 0]
+        )
+        assert selected.shape == (1, 2, 2, 4321)
+        np.testing.assert_allclose(selected._data, full._data[:, [3, 0]], rtol=1e-5, atol=1e-6)
+
+    def test_iter_sources_keeps_only_selected(self):
+        mix = MockTensor(np.random.randn(1, 2, 4321).astype(np.float32))
+        regions = list(self.node.iter_sources(self.model, mix, 100, segment=10.0, overlap=0.1, source_indices=[1]))
+        assert all(region.shape[1] == 1 for _, region in regions)
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_main_returns_silence_for_unselected(self, streaming, monkeypatch):
+        monkeypatch.setattr(_MockModel, "forward", staticmethod(_source_scaling_forward))
+        data = np.random.randn(1, 2, 6000).astype(np.float32)
+        audio = {"waveform": MockTensor(data), "sample_rate": _MODEL_SR}
+
+        full = self.node.main(audio, chunk_length=0.05, chunk_overlap=0.01, streaming=streaming)
+        vocals_only = self.node.main(audio, chunk_length=0.05, chunk_overlap=0.01, streaming=streaming, stems="vocals")
+
+        assert np.any(full[3]["waveform"]._data != 0.0)
+        np.testing.assert_allclose(vocals_only[3]["waveform"]._data, full[3]["waveform"]._data, rtol=1e-5, atol=1e-6)
+        for r in vocals_only[:3]:
+            assert r["waveform"].shape == (1, 2, 6000)
+            assert np.all(r["waveform"]._data == 0.0)
+
+    def test_main_passes_no_indices_when_all_selected(self, monkeypatch):
+        captured = {}
+        original_sep = self.node.separate_sources
+
+        def spy_separate(model, mix, sr, **kw):
+            captured.update(kw)
+            return original_sep(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "separate_sources", spy_separate)
+        self.node.main(_make_audio(frames=44100, sample_rate=_MODEL_SR))
+        assert captured["source_indices"] is None
+
+
+# ===========================================================================
+# 5d. Silence-aware chunk skipping
+# ===========================================================================
+
+
+class TestSilenceSkipping:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        self.model = _MockModel()
+        self.calls = []
+
+        def _forward(chunk):
+            self.calls.append(chunk.shape[0] * chunk.shape[-1])
+            return _source_scaling_forward(chunk)
+
+        self.model.forward = _forward
+
+    def _mix(self, silent=slice(1500, 3500), batch=1, offset=0.0):
+        data = np.random.randn(batch, 2, 5000).astype(np.float32)
+        data[..., silent] = offset
+        return MockTensor(data)
+
+    def test_threshold_conversion(self):
+        assert AudioSeparation.silence_threshold(-100.0) is None
+        assert AudioSeparation.silence_threshold(-40.0) == pytest.approx(0.01)
+
+    def test_silent_windows_ignore_dc_offset(self):
+        mix = self._mix(offset=-0.3)
+        windows = AudioSeparation.plan_chunks(5000, 1100, 10)
+        silent = AudioSeparation.silent_windows(mix, windows, 1e-3)
+        assert silent == {start for start, end, _, _ in windows if start >= 1500 and end <= 3500}
+        assert AudioSeparation.silent_windows(mix, windows, None) == set()
+
+    def test_window_is_only_silent_when_every_batch_item_is(self):
+        mix = self._mix(batch=2)
+        mix._data[1, :, 1500:3500] = np.random.randn(2, 2000)
+        windows = AudioSeparation.plan_chunks(5000, 1100, 10)
+        assert AudioSeparation.silent_windows(mix, windows, 1e-3) == set()
+
+    def test_group_chunks_isolates_windows(self):
+        windows = AudioSeparation.plan_chunks(5000, 1100, 10)
+        groups = AudioSeparation.group_chunks(windows, 8, {windows[2][0]})
+        assert [windows[2]] in groups
+        assert sum(len(group) for group in groups) == len(windows)
+
+    @pytest.mark.parametrize("batch_size", [1, 3])
+    def test_skipped_windows_are_zero_and_model_is_not_run(self, batch_size):
+        mix = self._mix()
+        full = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=batch_size)
+        full_frames = sum(self.calls)
+        self.calls.clear()
+
+        gated = self.node.separate_sources(
+            self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=batch_size, silence_threshold=1e-3
+        )
+
+        assert self.node.skipped_windows > 0
+        assert self.node.total_windows == len(AudioSeparation.plan_chunks(5000, 1100, 10))
+        assert sum(self.calls) < full_frames
+        assert np.all(gated._data[..., 1600:3400] == 0.0)
+        np.testing.assert_allclose(gated._data[..., :1500], full._data[..., :1500], rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(gated._data[..., 3600:], full._data[..., 3600:], rtol=1e-5, atol=1e-6)
+
+    def test_streaming_matches_in_memory(self):
+        mix = self._mix()
+        expected = self.node.separate_sources(self.model, mix, 100, segment=10.0, overlap=0.1, silence_threshold=1e-3)
+        regions = self.node.iter_sources(
+            self.model, mix, 100, segment=10.0, overlap=0.1, batch_size=2, silence_threshold=1e-3
+        )
+        streamed = np.concatenate([region._data for _, region in regions], axis=-1)
+
+        np.testing.assert_allclose(streamed, expected._data, rtol=1e-5, atol=1e-6)
+        assert self.node.skipped_windows > 0
+
+    def test_main_logs_skipped_windows(self, monkeypatch, caplog):
+        monkeypatch.setattr(_MockModel, "forward", staticmethod(_source_scaling_forward))
+        data = np.random.randn(1, 2, 6000).astype(np.float32)
+        data[..., 1000:5000] = 0.0
+        audio = {"waveform": MockTensor(data), "sample_rate": _MODEL_SR}
+
+        with caplog.at_level("INFO", logger=separation.logger.name):
+            result = self.node.main(audio, chunk_length=0.01, chunk_overlap=0.001, silence_threshold_db=-60.0)
+
+        assert "skipped" in caplog.text
+        assert self.node.skipped_windows > 0
+        assert result[0]["waveform"].shape == (1, 2, 6000)
+
+    def test_threshold_is_part_of_cache_key(self):
+        audio = _make_audio()
+        settings = ("linear", 10.0, 0.1, "fp32", "")
+        assert AudioSeparation.cache_key(audio, *settings) != AudioSeparation.cache_key(audio, *settings, -50.0)
+
+
+# ===========================================================================
+# 5e. Stem cache
+# ===========================================================================
+
+
+class TestStemCache:
+    @pytest.fixture(autouse=True)
+    def _enabled_stem_cache(self, monkeypatch, tmp_path):
+        self.cache = StemCache(tmp_path / "stems")
+        monkeypatch.setattr(separation, "STEM_CACHE", self.cache)
+        monkeypatch.setattr(_MockModel, "forward", staticmethod(_source_scaling_forward))
+        self.node = AudioSeparation()
+
+    def _spy_separate(self, monkeypatch):
+        calls = []
+        original_sep = self.node.separate_sources
+
+        def spy_separate(model, mix, sr, **kw):
+            calls.append(mix.shape)
+            return original_sep(model, mix, sr, **kw)
+
+        monkeypatch.setattr(self.node, "separate_sources", spy_separate)
+        return calls
+
+    def test_cache_stems_option(self):
+        spec = AudioSeparation.INPUT_TYPES()["optional"]["cache_stems"]
+        assert spec[0] == "BOOLEAN"
+        assert spec[1]["default"] is True
+
+    def test_second_run_is_a_cache_hit(self, monkeypatch):
+        calls = self._spy_separate(monkeypatch)
+        audio = _make_audio(frames=44100, sample_rate=_MODEL_SR)
+
+        first = self.node.main(audio)
+        second = self.node.main(audio, chunk_batch_size=4)
+
+        assert len(calls) == 1
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(b["waveform"]._data, a["waveform"]._data)
+            assert b["sample_rate"] == _MODEL_SR
+
+    def test_changed_settings_miss(self, monkeypatch):
+        calls = self._spy_separate(monkeypatch)
+        audio = _make_audio(frames=44100, sample_rate=_MODEL_SR)
+
+        self.node.main(audio)
+        self.node.main(audio, chunk_overlap=0.2)
+        self.node.main(audio, stems="vocals")
+
+        assert len(calls) == 3
+
+    def test_hit_restores_unselected_stems_as_silence(self):
+        audio = _make_audio(frames=44100, sample_rate=_MODEL_SR)
+        self.node.main(audio, stems="drums")
+        result = self.node.main(audio, stems="drums")
+
+        assert np.any(result[1]["waveform"]._data != 0.0)
+        for i in (0, 2, 3):
+            assert result[i]["waveform"].shape == (1, 2, 44100)
+            assert np.all(result[i]["waveform"]._data == 0.0)
+
+    def test_cache_stems_false_bypasses_cache(self, monkeypatch):
+        calls = self._spy_separate(monkeypatch)
+        audio = _make_audio(frames=44100, sample_rate=_MODEL_SR)
+
+        self.node.main(audio, cache_stems=False)
+        self.node.main(audio, cache_stems=False)
+
+        assert len(calls) == 2
+        assert not self.cache.root.exists()
+
+    def test_comfy_cache_is_not_overridden(self):
+        """ComfyUI never passes linked inputs such as ``audio`` to IS_CHANGED, so the stem cache lives in main."""
+        assert not hasattr(AudioSeparation, "IS_CHANGED")
+
+
+# ===========================================================================
+# 5f. Precision
+# ===========================================================================
+
+
+class TestPrecision:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        _autocast_calls.clear()
+
+    def test_precision_option(self):
+        spec = AudioSeparation.INPUT_TYPES()["optional"]["precision"]
+        assert spec[0] == ["fp32", "bf16", "fp16", "int8"]
+        assert spec[1]["default"] == "fp32"
+
+    @pytest.mark.parametrize(
+        ("precision", "device", "expected"),
+        [
+            ("fp32", "cuda", None),
+            ("bf16", "cpu", "torch.bfloat16"),
+            ("bf16", "cuda:0", "torch.bfloat16"),
+            ("fp16", "cuda", "torch.float16"),
+            ("fp16", "cpu", None),
+            ("bf16", "mps", None),
+            ("int8", "cpu", "torch.qint8"),
+            ("int8", "cuda", None),
+        ],
+    )
+    def test_resolve_precision(self, precision, device, expected):
+        assert AudioSeparation.resolve_precision(precision, device) == expected
+
+    def test_bf16_unsupported_on_gpu_falls_back(self, monkeypatch):
+        monkeypatch.setattr(torch_mock, "cuda", types.SimpleNamespace(is_bf16_supported=lambda: False))
+        assert AudioSeparation.resolve_precision("bf16", "cuda") is None
+
+    def test_unknown_precision_raises(self):
+        with pytest.raises(ValueError, match="Unsupported precision"):
+            AudioSeparation.resolve_precision("int4", "cpu")
+
+    def test_fp32_does_not_autocast(self):
+        self.node.main(_make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR))
+        assert _autocast_calls == []
+
+    def test_reduced_precision_model_and_autocast(self, monkeypatch):
+        model = _MockModel()
+        model.to = MagicMock(return_value=model)
+        bundle = types.SimpleNamespace(get_model=MagicMock(return_value=model), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+
+        result = self.node.main(_make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR), precision="bf16")
+
+        model.to.assert_any_call("torch.bfloat16")
+        assert _autocast_calls == [("cuda", "torch.bfloat16")]
+        assert result[0]["waveform"].dtype == np.float32
+
+    def test_precisions_cached_separately(self, monkeypatch):
+        bundle = types.SimpleNamespace(get_model=MagicMock(side_effect=lambda: _MockModel()), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+        audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
+
+        self.node.main(audio, precision="bf16")
+        self.node.main(audio)
+        self.node.main(audio, precision="bf16")
+
+        assert bundle.get_model.call_count == 2
+
+
+class TestInt8Quantization:
+    @pytest.fixture(autouse=True)
+    def _quantization_module(self, monkeypatch):
+        self.quantize_calls = []
+
+        def quantize_dynamic(model, qconfig_spec, dtype):
+            self.quantize_calls.append((qconfig_spec, dtype))
+            return model
+
+        quantization = types.ModuleType("torch.ao.quantization")
+        quantization.quantize_dynamic = quantize_dynamic
+        monkeypatch.setitem(sys.modules, "torch.ao.quantization", quantization)
+        monkeypatch.setattr(comfy_mm, "get_torch_device", lambda: "cpu")
+        _autocast_calls.clear()
+
+    def test_int8_quantizes_linear_and_lstm(self, monkeypatch):
+        bundle = types.SimpleNamespace(get_model=MagicMock(side_effect=lambda: _MockModel()), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+
+        result = AudioSeparation().main(_make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR), precision="int8")
+
+        assert self.quantize_calls == [({"nn.Linear", "nn.LSTM"}, "torch.qint8")]
+        assert _autocast_calls == [], "quantized models run without autocast"
+        assert len(result) == 4
+
+    def test_quantized_model_cached_next_to_fp32(self, monkeypatch):
+        bundle = types.SimpleNamespace(get_model=MagicMock(side_effect=lambda: _MockModel()), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+        audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
+
+        for precision in ("int8", "fp32", "int8", "fp32"):
+            AudioSeparation().main(audio, precision=precision)
+
+        assert bundle.get_model.call_count == 2
+        assert len(self.quantize_calls) == 1
+
+    def test_missing_quantization_support_raises(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "torch.ao.quantization", None)
+        with pytest.raises(RuntimeError, match="int8 precision requires"):
+            AudioSeparation.quantize_model(_MockModel())
+
+
 # ===========================================================================
 # 6. Corrupted model checkpoint handling (#21)
 # ===========================================================================
@@ -653,3 +1448,35 @@ class TestCorruptedModelCheckpoint:
         audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
         with pytest.raises(RuntimeError, match="CUDA out of memory"):
             self.node.main(audio)
+
+
+# ===========================================================================
+# 7. Model cache
+# ===========================================================================
+
+
+class TestModelCache:
+    def setup_method(self):
+        self.node = AudioSeparation()
+        separation.MODEL_CACHE.clear()
+
+    def test_model_loaded_once_across_calls(self, monkeypatch):
+        bundle = types.SimpleNamespace(get_model=MagicMock(return_value=_MockModel()), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+
+        audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
+        self.node.main(audio)
+        AudioSeparation().main(audio)
+
+        assert bundle.get_model.call_count == 1
+
+    def test_model_reloaded_after_clear(self, monkeypatch):
+        bundle = types.SimpleNamespace(get_model=MagicMock(return_value=_MockModel()), sample_rate=_MODEL_SR)
+        monkeypatch.setattr(separation, "HDEMUCS_HIGH_MUSDB_PLUS", bundle)
+
+        audio = _make_audio(channels=2, frames=44100, sample_rate=_MODEL_SR)
+        self.node.main(audio)
+        separation.MODEL_CACHE.clear()
+        self.node.main(audio)
+
+        assert bundle.get_model.call_count == 2
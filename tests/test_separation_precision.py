@@ -0,0 +1,104 @@
+"""Output quality of the reduced AudioSeparation precisions against fp32, with real torch.
+
+The other test modules replace torch with numpy-backed mocks in ``sys.modules``, so the
+separation runs in a fresh interpreter: the test launches this file as a script, which separates
+a short synthetic mix through `AudioSeparation.main` with a randomly initialised ``hdemucs_low``
+(no checkpoint download) and prints the SDR of every stem against the fp32 stems as JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+PRECISIONS = ("int8", "bf16")
+MIN_SDR = 20.0  # dB of every stem against the fp32 stems
+
+
+def _sdr(reference, estimate) -> float:
+    noise = (reference - estimate).pow(2).sum().item()
+    signal = reference.pow(2).sum().item()
+    return math.inf if noise == 0.0 else 10.0 * math.log10(max(signal, 1e-12) / noise)
+
+
+def _separate() -> dict[str, dict[str, float]]:
+    """SDR of every stem of every supported reduced precision against fp32."""
+    import tempfile
+    import types
+
+    import torch
+    from torchaudio.models import hdemucs_low
+
+    comfy = types.ModuleType("comfy")
+    comfy.__path__ = []
+    comfy.model_management = types.ModuleType("comfy.model_management")
+    comfy.model_management.get_torch_device = lambda: torch.device("cpu")
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_temp_directory = tempfile.gettempdir
+    folder_paths.get_user_directory = tempfile.gettempdir
+    sys.modules.update({"comfy": comfy, "comfy.model_management": comfy.model_management})
+    sys.modules["folder_paths"] = folder_paths
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    from src import separation
+
+    def random_model():
+        torch.manual_seed(0)
+        return hdemucs_low(sources=["drums", "bass", "other", "vocals"]).eval()
+
+    sample_rate = 44100
+    separation.HDEMUCS_HIGH_MUSDB_PLUS = types.SimpleNamespace(sample_rate=sample_rate, get_model=random_model)
+
+    generator = torch.Generator().manual_seed(0)
+    t = torch.arange(3 * sample_rate) / sample_rate
+    mix = 0.3 * torch.sin(2 * math.pi * 110.0 * t) + 0.2 * torch.sin(2 * math.pi * 440.0 * t)
+    mix = mix + 0.05 * torch.randn(t.shape[0], generator=generator) * (torch.sin(2 * math.pi * 2.0 * t) > 0)
+    audio = {"waveform": (mix * torch.tensor([[0.9], [1.1]]))[None], "sample_rate": sample_rate}
+
+    node = separation.AudioSeparation()
+    device = torch.device("cpu")
+
+    def stems(precision):
+        outputs = node.main(audio, chunk_length=1.5, precision=precision, cache_stems=False)
+        return {name: output["waveform"] for name, output in zip(node.STEMS, outputs)}
+
+    reference = stems("fp32")
+    results = {}
+    for precision in PRECISIONS:
+        if node.resolve_precision(precision, device) is None:
+            continue
+        separated = stems(precision)
+        results[precision] = {name: _sdr(reference[name], separated[name]) for name in node.STEMS}
+    return results
+
+
+def test_reduced_precisions_match_fp32():
+    process = subprocess.run(
+        [sys.executable, __file__], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=300, check=False
+    )
+    if process.returncode == 2:
+        pytest.skip(process.stdout.strip())
+    assert process.returncode == 0, process.stderr
+
+    results = json.loads(process.stdout.splitlines()[-1])
+    assert "int8" in results
+    for precision, sdrs in results.items():
+        for stem, value in sdrs.items():
+            assert value >= MIN_SDR, f"{precision} {stem}: {value:.1f} dB against fp32"
+
+
+if __name__ == "__main__":
+    try:
+        import torch  # noqa: F401
+        import torchaudio  # noqa: F401
+    except ImportError as e:
+        print(f"real torch/torchaudio not available: {e}")
+        sys.exit(2)
+    print(json.dumps(_separate()))
@@ -0,0 +1,192 @@
+"""Tests for src.stem_cache.StemCache."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import pickle
+import sys
+import types
+
+import numpy as np
+import pytest
+
+# ---------------------------------------------------------------------------
+# Mock torch / folder_paths before importing the module under test
+# ---------------------------------------------------------------------------
+
+
+class _Tensor:
+    """Numpy-backed tensor with the handful of methods the stem cache uses."""
+
+    def __init__(self, data, dtype=np.float32):
+        self._data = np.asarray(data, dtype=dtype)
+
+    @property
+    def shape(self):
+        return self._data.shape
+
+    def detach(self):
+        return self
+
+    def cpu(self):
+        return self
+
+    def float(self):
+        return _Tensor(self._data)
+
+    def to(self, dtype):
+        return _Tensor(self._data, dtype=dtype)
+
+    def contiguous(self):
+        return self
+
+    def numpy(self):
+        return np.ascontiguousarray(self._data)
+
+    def unbind(self, dim=0):
+        return tuple(_Tensor(np.take(self._data, i, axis=dim)) for i in range(self.shape[dim]))
+
+
+def _save(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def _load(path, map_location=None, weights_only=False):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+torch_mock = types.ModuleType("torch")
+torch_mock.Tensor = _Tensor
+torch_mock.float16 = np.float16
+torch_mock.stack = lambda tensors, dim=0: _Tensor(np.stack([t._data for t in tensors], axis=dim))
+torch_mock.save = _save
+torch_mock.load = _load
+sys.modules["torch"] = torch_mock
+
+folder_paths_mock = types.ModuleType("folder_paths")
+folder_paths_mock.get_temp_directory = lambda: "/tmp"
+folder_paths_mock.get_user_directory = lambda: "/tmp"
+sys.modules.setdefault("folder_paths", folder_paths_mock)
+
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+module = importlib.import_module("src.stem_cache")
+StemCache = module.StemCache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stem_cache(monkeypatch, tmp_path):
+    """Reset the module-level STEM_CACHE singleton and user directory for every test."""
+    monkeypatch.setattr(module.folder_paths, "get_user_directory", lambda: str(tmp_path))
+    monkeypatch.setattr(module, "STEM_CACHE", StemCache())
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _waveform(seed=0, frames=1000):
+    return _Tensor(np.random.default_rng(seed).standard_normal((1, 2, frames)))
+
+
+def _stems(frames=1000):
+    return {name: _Tensor(np.full((1, 2, frames), i, dtype=np.float32)) for i, name in enumerate(["bass", "vocals"])}
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+
+class TestKeys:
+    def test_same_content_same_key(self):
+        cache = StemCache("/unused")
+        assert cache.make_key(_waveform(), 44100, a=1) == cache.make_key(_waveform(), 44100, a=1)
+
+    @pytest.mark.parametrize(
+        ("waveform", "sample_rate", "params"),
+        [
+            (_waveform(seed=1), 44100, {"a": 1}),
+            (_waveform(), 48000, {"a": 1}),
+            (_waveform(), 44100, {"a": 2}),
+            (_waveform(frames=999), 44100, {"a": 1}),
+        ],
+    )
+    def test_content_rate_and_params_change_key(self, waveform, sample_rate, params):
+        cache = StemCache("/unused")
+        assert cache.make_key(waveform, sample_rate, **params) != cache.make_key(_waveform(), 44100, a=1)
+
+
+class TestGetPut:
+    def test_round_trip(self, tmp_path):
+        cache = StemCache(tmp_path)
+        key = cache.make_key(_waveform(), 44100)
+        cache.put(key, _stems())
+
+        hit = cache.get(key)
+        assert list(hit) == ["bass", "vocals"]
+        np.testing.assert_array_equal(hit["vocals"]._data, np.ones((1, 2, 1000)))
+
+    def test_stems_are_stored_as_half_precision(self, tmp_path):
+        cache = StemCache(tmp_path)
+        stems = {"vocals": _Tensor(np.random.default_rng(0).uniform(-1.0, 1.0, (1, 2, 1000)))}
+        cache.put("key", stems)
+
+        assert _load(tmp_path / "key.pt")["sources"]._data.dtype == np.float16
+        hit = cache.get("key")["vocals"]._data
+        assert hit.dtype == np.float32
+        np.testing.assert_allclose(hit, stems["vocals"]._data, atol=1e-3)
+
+    def test_miss_returns_none(self, tmp_path):
+        assert StemCache(tmp_path).get("missing") is None
+
+    def test_disabled_cache_is_a_no_op(self, tmp_path):
+        cache = StemCache(tmp_path, max_bytes=0)
+        cache.put("key", _stems())
+        assert not cache.enabled
+        assert cache.get("key") is None
+        assert not any(tmp_path.iterdir())
+
+    def test_corrupted_entry_is_discarded(self, tmp_path):
+        cache = StemCache(tmp_path)
+        (tmp_path / "key.pt").write_bytes(b"not a checkpoint")
+
+        assert cache.get("key") is None
+        assert not (tmp_path / "key.pt").exists()
+
+    def test_negative_max_bytes_raises(self):
+        with pytest.raises(ValueError):
+            StemCache("/unused", max_bytes=-1)
+
+    def test_default_root_is_comfy_user_directory(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(module.folder_paths, "get_user_directory", lambda: str(tmp_path))
+        assert StemCache().root == tmp_path / "audio_separation_stems"
+
+    def test_clear(self, tmp_path):
+        cache = StemCache(tmp_path)
+        cache.put("key", _stems())
+        cache.clear()
+        assert cache.get("key") is None
+
+
+class TestEviction:
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        cache = StemCache(tmp_path)
+        cache.put("old", _stems())
+        cache.put("recent", _stems())
+        os.utime(tmp_path / "old.pt", (1, 1))
+        cache.get("old")  # refreshes "old"
+        os.utime(tmp_path / "recent.pt", (2, 2))
+
+        cache.max_bytes = 2 * (tmp_path / "old.pt").stat().st_size + 1
+        cache.put("new", _stems())
+
+        assert cache.get("recent") is None
+        assert cache.get("old") is not None
+        assert cache.get("new") is not None
@@ -0,0 +1,484 @@
+"""Numerical tests for the torch-native tempo analysis in src.tempo.
+
+torch is replaced by a small numpy-backed implementation of the operations the module uses, so
+estimates on synthetic click tracks can be checked without the real dependency.
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+
+import numpy as np
+import pytest
+
+# ---------------------------------------------------------------------------
+# numpy-backed torch mock
+# ---------------------------------------------------------------------------
+
+
+def _unwrap(value):
+    return value._data if isinstance(value, MockTensor) else value
+
+
+class MockTensor:
+    def __init__(self, data):
+        self._data = np.asarray(data)
+
+    shape = property(lambda self: self._data.shape)
+    dtype = property(lambda self: self._data.dtype)
+    ndim = property(lambda self: self._data.ndim)
+    T = property(lambda self: MockTensor(self._data.T))
+    device = "cpu"
+
+    def __float__(self):
+        return float(self._data)
+
+    def __getitem__(self, key):
+        return MockTensor(self._data[key])
+
+    def _binary(op):
+        return lambda self, other: MockTensor(op(self._data, _unwrap(other)))
+
+    __add__ = __radd__ = _binary(np.add)
+    __sub__ = _binary(np.subtract)
+    __rsub__ = _binary(lambda a, b: b - a)
+    __mul__ = __rmul__ = _binary(np.multiply)
+    __truediv__ = _binary(np.divide)
+    __rtruediv__ = _binary(lambda a, b: b / a)
+    __pow__ = _binary(np.power)
+    __lt__ = _binary(np.less)
+    __gt__ = _binary(np.greater)
+    __ge__ = _binary(np.greater_equal)
+    __le__ = _binary(np.less_equal)
+    __and__ = _binary(np.logical_and)
+
+    def dim(self):
+        return self._data.ndim
+
+    def expand_as(self, other):
+        return MockTensor(np.broadcast_to(self._data, other.shape))
+
+    def reshape(self, *shape):
+        return MockTensor(self._data.reshape(*shape))
+
+    def transpose(self, dim0, dim1):
+        return MockTensor(np.swapaxes(self._data, dim0, dim1))
+
+    def squeeze(self, dim):
+        return MockTensor(np.squeeze(self._data, axis=dim))
+
+    def to(self, device=None, dtype=None):
+        return MockTensor(self._data.astype(dtype or self._data.dtype))
+
+    def abs(self):
+        return MockTensor(np.abs(self._data))
+
+    def sum(self):
+        return MockTensor(self._data.sum())
+
+    def mean(self, dim, keepdim=False):
+        return MockTensor(np.mean(self._data, axis=dim, keepdims=keepdim))
+
+    def amax(self, dim, keepdim=False):
+        return MockTensor(np.amax(self._data, axis=dim, keepdims=keepdim))
+
+    def argmax(self, dim, keepdim=False):
+        return MockTensor(np.argmax(self._data, axis=dim, keepdims=keepdim))
+
+    def gather(self, dim, index):
+        return MockTensor(np.take_along_axis(self._data, index._data, axis=dim))
+
+    def clamp(self, min, max):
+        return MockTensor(np.clip(self._data, min, max))
+
+    def clamp_min(self, value):
+        return MockTensor(np.maximum(self._data, value))
+
+    def clamp_max(self, value):
+        return MockTensor(np.minimum(self._data, value))
+
+    def unfold(self, dim, size, step):
+        count = 1 + (self._data.shape[dim] - size) // step
+        frames = [np.take(self._data, range(i * step, i * step + size), axis=dim) for i in range(count)]
+        return MockTensor(np.stack(frames, axis=-2))
+
+    def max(self):
+        return MockTensor(self._data.max())
+
+    def median(self, dim):
+        return types.SimpleNamespace(values=MockTensor(np.median(self._data, axis=dim)))
+
+    def tolist(self):
+        return self._data.tolist()
+
+
+def _hann_window(length, periodic=True, device=None, dtype=None):
+    return MockTensor(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / (length if periodic else length - 1)))
+
+
+def _stft(x, n_fft, hop_length, window, return_complex):
+    data = np.pad(x._data, [(0, 0), (n_fft // 2, n_fft // 2)], mode="reflect")
+    count = 1 + (data.shape[-1] - n_fft) // hop_length
+    frames = np.stack([data[:, i * hop_length : i * hop_length + n_fft] for i in range(count)], axis=-1)
+    return MockTensor(np.fft.rfft(frames * window._data[:, None], axis=-2))
+
+
+def _melscale_fbanks(n_freqs, f_min, f_max, n_mels, sample_rate, norm=None, mel_scale="htk"):
+    """Triangular HTK mel filters [n_freqs, n_mels]."""
+    mel = np.linspace(2595 * np.log10(1 + f_min / 700), 2595 * np.log10(1 + f_max / 700), n_mels + 2)
+    edges = 700 * (10 ** (mel / 2595) - 1)
+    freqs = np.linspace(0, sample_rate / 2, n_freqs)[:, None]
+    rising = (freqs - edges[:-2]) / (edges[1:-1] - edges[:-2])
+    falling = (edges[2:] - freqs) / (edges[2:] - edges[1:-1])
+    return MockTensor(np.maximum(0, np.minimum(rising, falling)))
+
+
+def _pad(x, pad, mode="constant"):
+    width = [(0, 0)] * (x._data.ndim - 1) + [tuple(pad)]
+    return MockTensor(np.pad(x._data, width, mode="edge" if mode == "replicate" else mode))
+
+
+def _conv1d(x, weight, stride=1):
+    kernel = weight._data[0, 0]
+    frames = np.lib.stride_tricks.sliding_window_view(x._data, kernel.shape[0], axis=-1)[..., ::stride, :]
+    return MockTensor(frames @ kernel)
+
+
+class _NoGrad:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+torch_mock = types.ModuleType("torch")
+torch_mock.Tensor = MockTensor
+torch_mock.float64 = np.float64
+torch_mock.no_grad = _NoGrad
+torch_mock.hann_window = _hann_window
+torch_mock.stft = _stft
+torch_mock.cat = lambda tensors, dim: MockTensor(np.concatenate([t._data for t in tensors], axis=dim))
+torch_mock.stack = lambda tensors: MockTensor(np.stack([t._data for t in tensors]))
+torch_mock.matmul = lambda a, b: MockTensor(np.matmul(a._data, b._data))
+torch_mock.log10 = lambda x: MockTensor(np.log10(x._data))
+torch_mock.log2 = lambda x: MockTensor(np.log2(x._data))
+torch_mock.exp = lambda x: MockTensor(np.exp(x._data))
+torch_mock.sinc = lambda x: MockTensor(np.sinc(x._data))
+torch_mock.maximum = lambda a, b: MockTensor(np.maximum(a._data, b._data))
+torch_mock.where = lambda condition, x, y: MockTensor(np.where(condition._data, _unwrap(x), _unwrap(y)))
+torch_mock.as_tensor = lambda x, device=None, dtype=None: MockTensor(np.asarray(_unwrap(x), dtype=dtype))
+torch_mock.full_like = lambda x, value: MockTensor(np.full_like(x._data, value))
+torch_mock.zeros_like = lambda x: MockTensor(np.zeros_like(x._data))
+torch_mock.arange = lambda n, device=None, dtype=None: MockTensor(np.arange(n, dtype=dtype))
+torch_mock.fft = types.SimpleNamespace(
+    rfft=lambda x, n: MockTensor(np.fft.rfft(x._data, n=n)),
+    irfft=lambda x, n: MockTensor(np.fft.irfft(x._data, n=n)),
+)
+torch_mock.nn = types.SimpleNamespace(functional=types.SimpleNamespace(pad=_pad, conv1d=_conv1d))
+sys.modules["torch"] = torch_mock
+
+torchaudio_mock = types.ModuleType("torchaudio")
+torchaudio_functional_mock = types.ModuleType("torchaudio.functional")
+torchaudio_functional_mock.melscale_fbanks = _melscale_fbanks
+torchaudio_mock.functional = torchaudio_functional_mock
+sys.modules["torchaudio"] = torchaudio_mock
+sys.modules["torchaudio.functional"] = torchaudio_functional_mock
+
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+import src.tempo as tempo  # noqa: E402
+from src.tempo import (  # noqa: E402
+    analyze_excerpts,
+    analyze_tempo,
+    decimation_factor,
+    downmix_decimate,
+    excerpt_slices,
+    onset_frame_rate,
+    onset_strength,
+    tempo_curve,
+    tempo_from_autocorrelation,
+    tempogram,
+)
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+SAMPLE_RATE = 22050
+
+
+def _click_track(bpm, seconds=12.0, channels=2, seed=0, sample_rate=SAMPLE_RATE):
+    """Decaying noise bursts on every beat, accented on the downbeat, over a quiet noise floor."""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    signal = 0.01 * rng.standard_normal(frames)
+    length = int(0.05 * sample_rate)
+    burst = rng.standard_normal(length) * np.exp(-np.arange(length) / (0.005 * sample_rate))
+    for beat, onset in enumerate(np.arange(0, frames - burst.shape[0], 60.0 / bpm * sample_rate).astype(int)):
+        signal[onset : onset + burst.shape[0]] += burst * (1.0 if beat % 4 == 0 else 0.6)
+    return np.tile(signal, (channels, 1))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_tables():
+    tempo._onset_tables.cache_clear()
+    tempo._decimation_filter.cache_clear()
+    tempo._tempogram_tables.cache_clear()
+
+
+# ===========================================================================
+# analyze_tempo
+# ===========================================================================
+
+
+class TestAnalyzeTempo:
+    @pytest.mark.parametrize("bpm", [90.0, 120.0, 140.0])
+    def test_click_track_tempo(self, bpm):
+        estimate = analyze_tempo(MockTensor(_click_track(bpm)), SAMPLE_RATE)
+
+        assert float(estimate.bpm) == pytest.approx(bpm, abs=1.5)
+        assert float(estimate.confidence) > 0.5
+
+    def test_noise_has_low_confidence(self):
+        noise = np.random.default_rng(1).standard_normal((2, 12 * SAMPLE_RATE))
+        assert float(analyze_tempo(MockTensor(noise), SAMPLE_RATE).confidence) < 0.3
+
+    def test_silence_has_zero_confidence(self):
+        estimate = analyze_tempo(MockTensor(np.zeros((2, 5 * SAMPLE_RATE))), SAMPLE_RATE)
+
+        assert float(estimate.confidence) == 0.0
+        assert float(estimate.bpm) == tempo.START_BPM
+
+    def test_batch_is_analyzed_per_item(self):
+        batch = np.stack([_click_track(100.0, seed=2), _click_track(150.0, seed=3)])
+        estimate = analyze_tempo(MockTensor(batch), SAMPLE_RATE)
+
+        assert estimate.bpm.shape == (2,)
+        assert estimate.bpm.tolist() == pytest.approx([100.0, 150.0], abs=1.5)
+
+    def test_channels_are_downmixed(self):
+        mono = _click_track(120.0, channels=1)
+        onset_mono = onset_strength(MockTensor(mono), SAMPLE_RATE)._data
+        onset_stereo = onset_strength(MockTensor(np.concatenate([mono, mono])), SAMPLE_RATE)._data
+
+        assert onset_stereo.shape == onset_mono.shape == (1 + 12 * SAMPLE_RATE // tempo.HOP_SIZE,)
+        np.testing.assert_allclose(onset_stereo, onset_mono)
+
+
+# ===========================================================================
+# downmix_decimate
+# ===========================================================================
+
+
+class TestDecimation:
+    @pytest.mark.parametrize(
+        ("sample_rate", "analysis_rate", "factor"),
+        [
+            (44100, 22050, 2),
+            (48000, 22050, 2),
+            (44100, 11025, 4),
+            (22050, 22050, 1),
+            (16000, 22050, 1),
+            (44100, None, 1),
+        ],
+    )
+    def test_factor_keeps_at_least_the_analysis_rate(self, sample_rate, analysis_rate, factor):
+        assert decimation_factor(sample_rate, analysis_rate) == factor
+
+    def test_non_positive_analysis_rate_raises(self):
+        with pytest.raises(ValueError):
+            decimation_factor(44100, 0)
+
+    def test_output_is_mono_at_the_decimated_rate(self):
+        mono, rate = downmix_decimate(MockTensor(np.ones((3, 2, 1001))), 44100, 11025)
+
+        assert rate == 11025
+        assert mono.shape == (3, 251)
+        np.testing.assert_allclose(mono._data[:, 10:-10], 1.0, rtol=1e-6)
+
+    def test_passband_is_kept_and_aliases_are_attenuated(self):
+        t = np.arange(44100) / 44100
+
+        def level(frequency):
+            mono, _ = downmix_decimate(MockTensor(np.sin(2 * np.pi * frequency * t)[None]), 44100, 22050)
+            return np.sqrt(2 * np.mean(mono._data[100:-100] ** 2))
+
+        assert level(1000.0) == pytest.approx(1.0, abs=0.01)
+        assert level(18000.0) < 0.05, "would alias to 4050 Hz"
+
+    @pytest.mark.parametrize("analysis_rate", [None, 22050, 11025])
+    def test_click_track_tempo_at_analysis_rate(self, analysis_rate):
+        waveform = MockTensor(_click_track(128.0, sample_rate=44100))
+        estimate = analyze_tempo(waveform, 44100, analysis_rate=analysis_rate)
+
+        assert float(estimate.bpm) == pytest.approx(128.0, abs=1.5)
+        assert float(estimate.confidence) > 0.5
+
+
+# ===========================================================================
+# excerpt_slices / analyze_excerpts
+# ===========================================================================
+
+
+class TestExcerpts:
+    def test_excerpts_are_evenly_spaced(self):
+        assert excerpt_slices(900, 10, 3, excerpt_seconds=10.0) == [slice(100, 200), slice(400, 500), slice(700, 800)]
+
+    def test_short_track_is_one_excerpt(self):
+        assert excerpt_slices(900, 10, 3, excerpt_seconds=30.0) == [slice(0, 900)]
+
+    @pytest.mark.parametrize(("excerpts", "seconds"), [(0, 30.0), (3, 0.0)])
+    def test_empty_excerpts_raise(self, excerpts, seconds):
+        with pytest.raises(ValueError):
+            excerpt_slices(900, 10, excerpts, seconds)
+
+    @pytest.fixture
+    def analysed_frames(self, monkeypatch):
+        frames = []
+        original = tempo.onset_strength
+
+        def spy(waveform, sample_rate, **kwargs):
+            frames.append(waveform.shape[-1])
+            return original(waveform, sample_rate, **kwargs)
+
+        monkeypatch.setattr(tempo, "onset_strength", spy)
+        return frames
+
+    def test_steady_track_stops_once_excerpts_agree(self, analysed_frames):
+        waveform = MockTensor(_click_track(120.0, seconds=40.0))
+        estimate, onset = analyze_excerpts(waveform, SAMPLE_RATE, 4, excerpt_seconds=9.0, tolerance_bpm=2.0)
+
+        assert analysed_frames == [9 * SAMPLE_RATE] * 2
+        assert onset.shape == (2 * (1 + 9 * SAMPLE_RATE // tempo.HOP_SIZE),)
+        assert float(estimate.bpm) == pytest.approx(120.0, abs=1.5)
+        assert float(estimate.confidence) > 0.5
+
+    def test_disagreeing_excerpts_are_all_analysed_and_lower_the_confidence(self, analysed_frames):
+        steady = analyze_excerpts(MockTensor(_click_track(100.0, seconds=30.0)), SAMPLE_RATE, 3, 9.0)[0]
+        drifting = np.concatenate([_click_track(100.0, seconds=15.0), _click_track(135.0, seconds=15.0)], axis=-1)
+        estimate, _ = analyze_excerpts(MockTensor(drifting), SAMPLE_RATE, 3, 9.0, tolerance_bpm=2.0)
+
+        assert len(analysed_frames) == 3 + 3
+        assert float(estimate.confidence) < float(steady.confidence)
+
+    def test_analyze_tempo_delegates_to_excerpts(self, analysed_frames):
+        waveform = MockTensor(_click_track(90.0, seconds=30.0))
+        estimate = analyze_tempo(waveform, SAMPLE_RATE, excerpts=2, excerpt_seconds=9.0)
+
+        assert analysed_frames == [9 * SAMPLE_RATE] * 2
+        assert float(estimate.bpm) == pytest.approx(90.0, abs=1.5)
+
+
+# ===========================================================================
+# tempogram / tempo_from_autocorrelation
+# ===========================================================================
+
+
+class TestTempogram:
+    def test_shape_and_normalization(self):
+        onset = np.random.default_rng(0).random((3, 1000))
+        result = tempogram(MockTensor(onset), win_length=200, hop_length=50)._data
+
+        assert result.shape == (3, 101, 1 + (1000 - 200) // 50)
+        np.testing.assert_allclose(result[:, 0], 1.0)
+
+    def test_short_envelope_is_padded_to_one_window(self):
+        assert tempogram(MockTensor(np.ones(100)), win_length=200).shape == (101, 1)
+
+    def test_pulse_train_peaks_at_its_period(self):
+        onset = np.zeros(2000)
+        onset[::25] = 1.0
+        result = tempogram(MockTensor(onset), win_length=384)._data.mean(axis=-1)
+
+        assert result[1:].argmax() + 1 == 25
+        assert result[25] == pytest.approx(1.0, abs=0.05)
+
+
+class TestTempoFromAutocorrelation:
+    def _autocorrelation(self, *peaks, lags=200):
+        autocorrelation = np.zeros(lags)
+        autocorrelation[0] = 1.0
+        for lag, height in peaks:
+            autocorrelation[lag] = height
+        return MockTensor(autocorrelation)
+
+    def test_prior_resolves_octave_ambiguity(self):
+        # 60 BPM at lag 100 and 120 BPM at lag 50 are equally periodic; the prior prefers 120.
+        estimate = tempo_from_autocorrelation(self._autocorrelation((50, 0.8), (100, 0.8)), frame_rate=100.0)
+
+        assert float(estimate.bpm) == pytest.approx(120.0)
+        assert float(estimate.confidence) == pytest.approx(0.8)
+
+    def test_bpm_range_is_respected(self):
+        autocorrelation = self._autocorrelation((50, 0.8), (100, 0.5))
+        estimate = tempo_from_autocorrelation(autocorrelation, frame_rate=100.0, max_bpm=100.0)
+
+        assert float(estimate.bpm) == pytest.approx(60.0)
+
+    def test_prior_can_be_centered_per_row(self):
+        rows = MockTensor(np.stack([self._autocorrelation((50, 0.8), (100, 0.8))._data] * 2))
+        start = MockTensor(np.array([[120.0], [60.0]]))
+        estimate = tempo_from_autocorrelation(rows, frame_rate=100.0, start_bpm=start, std_octaves=0.25)
+
+        assert estimate.bpm.tolist() == pytest.approx([120.0, 60.0])
+
+    def test_flat_autocorrelation_falls_back_to_the_prior_center(self):
+        rows = MockTensor(np.stack([np.zeros(200), self._autocorrelation((50, 0.8))._data]))
+        start = MockTensor(np.array([[90.0], [90.0]]))
+        estimate = tempo_from_autocorrelation(rows, frame_rate=100.0, start_bpm=start)
+
+        assert estimate.bpm.tolist() == pytest.approx([90.0, 120.0])
+        assert estimate.confidence.tolist() == pytest.approx([0.0, 0.8])
+
+    def test_peak_between_lags_is_interpolated(self):
+        autocorrelation = self._autocorrelation((49, 0.6), (50, 0.9), (51, 0.9), (52, 0.6))
+        estimate = tempo_from_autocorrelation(autocorrelation, frame_rate=100.0)
+
+        assert float(estimate.bpm) == pytest.approx(6000.0 / 50.5, rel=1e-3)
+
+
+# ===========================================================================
+# tempo_curve
+# ===========================================================================
+
+
+class TestTempoCurve:
+    def _curve(self, waveform):
+        onset = onset_strength(MockTensor(waveform), SAMPLE_RATE)
+        return tempo_curve(onset, onset_frame_rate(SAMPLE_RATE))
+
+    def test_steady_track_has_a_flat_curve(self):
+        curve = self._curve(_click_track(120.0, seconds=20.0))
+
+        hop = tempo.TEMPOGRAM_FRAMES // 4
+        windows = 1 + (1 + 20 * SAMPLE_RATE // tempo.HOP_SIZE - tempo.TEMPOGRAM_FRAMES) // hop
+        assert curve.bpm.shape == curve.confidence.shape == curve.times.shape == (windows,)
+        np.testing.assert_allclose(np.diff(curve.times._data), hop * tempo.HOP_SIZE / SAMPLE_RATE)
+        np.testing.assert_allclose(curve.bpm._data, 120.0, atol=1.5)
+
+    def test_curve_follows_a_tempo_change(self):
+        drifting = np.concatenate([_click_track(100.0, seconds=20.0), _click_track(112.0, seconds=20.0)], axis=-1)
+        curve = self._curve(drifting)
+
+        assert curve.bpm._data[0] == pytest.approx(100.0, abs=1.5)
+        assert curve.bpm._data[-1] == pytest.approx(112.0, abs=1.5)
+        assert np.all(np.diff(curve.bpm._data) > -1.0), "no octave jumps or outliers"
+
+    def test_silent_windows_keep_the_global_tempo(self):
+        track = _click_track(120.0, seconds=30.0)
+        track[..., 15 * SAMPLE_RATE :] = 0.0
+        curve = self._curve(track)
+
+        assert curve.confidence._data[-1] == 0.0
+        np.testing.assert_allclose(curve.bpm._data, 120.0, atol=1.5)
+
+    def test_batches_share_the_window_times(self):
+        batch = np.stack([_click_track(100.0, seconds=12.0), _click_track(140.0, seconds=12.0, seed=1)])
+        curve = self._curve(batch)
+
+        assert curve.bpm.shape == (2, curve.times.shape[0])
+        np.testing.assert_allclose(curve.bpm._data.mean(axis=-1), [100.0, 140.0], atol=1.5)
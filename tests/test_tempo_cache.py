@@ -0,0 +1,282 @@
+"""Tests for src.tempo_cache.TempoCache."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import pickle
+import sys
+import types
+
+import numpy as np
+import pytest
+
+# ---------------------------------------------------------------------------
+# Mock torch / torchaudio before importing the module under test
+# ---------------------------------------------------------------------------
+
+
+class _Tensor:
+    """Numpy-backed tensor with the handful of methods the tempo cache uses."""
+
+    def __init__(self, data):
+        self._data = np.asarray(data, dtype=np.float32)
+
+    @property
+    def shape(self):
+        return self._data.shape
+
+    def __getitem__(self, key):
+        return _Tensor(self._data[key])
+
+    def __float__(self):
+        return float(self._data)
+
+    def dim(self):
+        return self._data.ndim
+
+    def detach(self):
+        return self
+
+    def cpu(self):
+        return self
+
+    def float(self):
+        return self
+
+    def contiguous(self):
+        return self
+
+    def clone(self):
+        return _Tensor(self._data.copy())
+
+    def numpy(self):
+        return np.ascontiguousarray(self._data)
+
+    def numel(self):
+        return self._data.size
+
+    def element_size(self):
+        return self._data.itemsize
+
+
+def _save(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def _load(path, map_location=None, weights_only=False):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+torch_mock = types.ModuleType("torch")
+torch_mock.Tensor = _Tensor
+torch_mock.tensor = _Tensor
+torch_mock.stack = lambda tensors: _Tensor(np.stack([t._data for t in tensors]))
+torch_mock.save = _save
+torch_mock.load = _load
+sys.modules["torch"] = torch_mock
+
+torchaudio_mock = types.ModuleType("torchaudio")
+torchaudio_mock.functional = types.ModuleType("torchaudio.functional")
+sys.modules["torchaudio"] = torchaudio_mock
+sys.modules["torchaudio.functional"] = torchaudio_mock.functional
+
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+module = importlib.import_module("src.tempo_cache")
+TempoCache = module.TempoCache
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _waveform(seed=0, frames=1000, batch=None):
+    shape = (2, frames) if batch is None else (batch, 2, frames)
+    return _Tensor(np.random.default_rng(seed).standard_normal(shape))
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    """Fake onset/tempo analysis: the tempo of each item is 100 + its first sample."""
+    batches = []
+
+    def onset_strength(batch, sample_rate, analysis_rate=None):
+        batches.append(batch.shape)
+        return _Tensor(batch._data[:, 0, :10])
+
+    def tempo_from_onset(onset, frame_rate):
+        return module.tempo.TempoEstimate(bpm=_Tensor(100 + onset._data[:, 0]), confidence=_Tensor(onset._data[:, 1]))
+
+    monkeypatch.setattr(module.tempo, "onset_strength", onset_strength)
+    monkeypatch.setattr(module.tempo, "tempo_from_onset", tempo_from_onset)
+    return batches
+
+
+def _entry(frames=10):
+    return {"onset": _Tensor(np.zeros(frames)), "bpm": 120.0, "confidence": 0.5}
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+
+class TestKeys:
+    def test_same_content_same_key(self):
+        assert TempoCache.make_key(_waveform(), 44100) == TempoCache.make_key(_waveform(), 44100)
+
+    @pytest.mark.parametrize(("waveform", "sample_rate"), [(_waveform(seed=1), 44100), (_waveform(), 48000)])
+    def test_content_and_rate_change_key(self, waveform, sample_rate):
+        assert TempoCache.make_key(waveform, sample_rate) != TempoCache.make_key(_waveform(), 44100)
+
+    def test_excerpt_key_only_hashes_the_excerpts(self):
+        # 1000 frames at 10 Hz, two 10 s excerpts: frames 200-300 and 700-800.
+        waveform = _waveform()
+        outside, inside = waveform.clone(), waveform.clone()
+        outside._data[:, 0] += 1.0
+        inside._data[:, 250] += 1.0
+        key = TempoCache.make_key(waveform, 10, None, 2, 10.0)
+
+        assert TempoCache.make_key(outside, 10, None, 2, 10.0) == key
+        assert TempoCache.make_key(inside, 10, None, 2, 10.0) != key
+        assert TempoCache.make_key(waveform, 10, None, 2, 10.0, 1.0) != key
+        assert TempoCache.make_key(waveform, 10, None) != key
+
+    def test_analysis_rate_changes_key_only_when_the_decimation_does(self):
+        key = TempoCache.make_key(_waveform(), 44100, 22050)
+
+        assert TempoCache.make_key(_waveform(), 44100, 20000) == key
+        assert TempoCache.make_key(_waveform(), 44100, 11025) != key
+
+
+class TestAnalyze:
+    def test_second_call_is_a_hit(self, analysis):
+        cache = TempoCache()
+        waveform = _waveform()
+
+        first = cache.analyze(waveform, 44100)
+        second = cache.analyze(waveform, 44100)
+
+        assert float(first.bpm) == float(second.bpm) == pytest.approx(100 + waveform._data[0, 0])
+        assert len(analysis) == 1
+
+    def test_batch_misses_are_analyzed_together(self, analysis):
+        cache = TempoCache()
+        batch = _waveform(batch=3)
+        cache.analyze(batch[1], 44100)
+
+        estimate = cache.analyze(batch, 44100)
+
+        assert analysis == [(1, 2, 1000), (2, 2, 1000)], "only the two uncached items are analyzed"
+        np.testing.assert_allclose(estimate.bpm._data, 100 + batch._data[:, 0, 0], rtol=1e-6)
+        assert len(cache) == 3
+
+    def test_excerpts_are_analyzed_through_analyze_excerpts(self, analysis, monkeypatch):
+        calls = []
+
+        def analyze_excerpts(batch, sample_rate, *options, analysis_rate):
+            calls.append((batch.shape, options))
+            return module.tempo.TempoEstimate(bpm=_Tensor([90.0]), confidence=_Tensor([0.7])), _Tensor(np.zeros((1, 5)))
+
+        monkeypatch.setattr(module.tempo, "analyze_excerpts", analyze_excerpts)
+        cache = TempoCache()
+        estimate = cache.analyze(_waveform(), 10, 2, 10.0, 1.0)
+        cache.analyze(_waveform(), 10, 2, 10.0, 1.0)
+
+        assert calls == [((1, 2, 1000), (2, 10.0, 1.0))]
+        assert analysis == [], "the whole-track analysis is not run"
+        assert float(estimate.bpm) == 90.0
+        assert float(estimate.confidence) == pytest.approx(0.7)
+
+    def test_curve_reuses_the_cached_onset_envelopes(self, analysis, monkeypatch):
+        received = []
+
+        def tempo_curve(onset, frame_rate):
+            received.append((onset.shape, frame_rate))
+            return module.tempo.TempoCurve(times=_Tensor([1.0, 2.0]), bpm=onset[:, :2], confidence=onset[:, 2:4])
+
+        monkeypatch.setattr(module.tempo, "tempo_curve", tempo_curve)
+        cache = TempoCache()
+        waveform = _waveform()
+        cache.analyze(waveform, 44100)
+
+        estimate, curve = cache.curve(waveform, 44100)
+
+        assert len(analysis) == 1, "the onset envelope comes from the cache"
+        assert received == [((1, 10), module.tempo.onset_frame_rate(44100))]
+        assert float(estimate.bpm) == pytest.approx(100 + waveform._data[0, 0])
+        np.testing.assert_array_equal(curve.bpm._data, waveform._data[0, :2])
+
+    def test_entries_hold_the_onset_envelope(self, analysis):
+        cache = TempoCache()
+        waveform = _waveform()
+        cache.analyze(waveform, 44100)
+
+        entry = cache.get(TempoCache.make_key(waveform, 44100))
+        np.testing.assert_array_equal(entry["onset"]._data, waveform._data[0, :10])
+
+
+class TestMemory:
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TempoCache(max_bytes=2 * 40)
+        cache.put("old", _entry())
+        cache.put("recent", _entry())
+        cache.get("old")
+        cache.put("new", _entry())
+
+        assert cache.get("recent") is None
+        assert cache.get("old") is not None
+        assert cache.get("new") is not None
+
+    def test_disabled_memory_cache_stores_nothing(self):
+        cache = TempoCache(max_bytes=0)
+        cache.put("key", _entry())
+        assert cache.get("key") is None
+
+    def test_negative_sizes_raise(self):
+        with pytest.raises(ValueError):
+            TempoCache(max_bytes=-1)
+
+
+class TestDisk:
+    def test_entries_survive_a_new_cache(self, tmp_path):
+        TempoCache(root=tmp_path).put("key", _entry())
+
+        entry = TempoCache(root=tmp_path).get("key")
+
+        assert entry["bpm"] == 120.0
+        assert (tmp_path / "key.pt").is_file()
+
+    def test_memory_only_cache_writes_nothing(self, tmp_path):
+        cache = TempoCache(root=tmp_path, max_disk_bytes=0)
+        cache.put("key", _entry())
+        assert not any(tmp_path.iterdir())
+
+    def test_corrupted_entry_is_discarded(self, tmp_path):
+        (tmp_path / "key.pt").write_bytes(b"not a checkpoint")
+
+        assert TempoCache(root=tmp_path).get("key") is None
+        assert not (tmp_path / "key.pt").exists()
+
+    def test_disk_is_size_bounded(self, tmp_path):
+        cache = TempoCache(root=tmp_path)
+        cache.put("first", _entry())
+        cache.max_disk_bytes = (tmp_path / "first.pt").stat().st_size
+        os.utime(tmp_path / "first.pt", (1, 1))
+        cache.put("second", _entry())
+
+        assert [path.name for path in tmp_path.iterdir()] == ["second.pt"]
+
+    def test_clear(self, tmp_path):
+        cache = TempoCache(root=tmp_path)
+        cache.put("key", _entry())
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.get("key") is None
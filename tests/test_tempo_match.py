@@ -15,6 +15,8 @@ torch_mock = types.ModuleType("torch")
 
 
 class MockTensor:
+    device = "cpu"
+
     def __init__(self, data):
         self._data = np.array(data) if not isinstance(data, np.ndarray) else data
 
@@ -26,6 +28,33 @@ class MockTensor:
     def ndim(self):
         return self._data.ndim
 
+    def __getitem__(self, key):
+        return MockTensor(self._data[key])
+
+    def __setitem__(self, key, value):
+        self._data[key] = value._data
+
+    def __rtruediv__(self, other):
+        return MockTensor(other / self._data)
+
+    def __sub__(self, other):
+        return MockTensor(self._data - other)
+
+    def __float__(self):
+        return float(self._data)
+
+    def abs(self):
+        return MockTensor(np.abs(self._data))
+
+    def max(self):
+        return MockTensor(self._data.max())
+
+    def clamp_min(self, value):
+        return MockTensor(np.maximum(self._data, value))
+
+    def new_zeros(self, shape):
+        return MockTensor(np.zeros(shape))
+
     def squeeze(self, dim=0):
         return MockTensor(np.squeeze(self._data, axis=dim))
 
@@ -43,6 +72,7 @@ class MockTensor:
 
 
 torch_mock.Tensor = MockTensor
+torch_mock.stack = lambda tensors: MockTensor(np.stack([t._data for t in tensors]))
 torch_mock.device = str
 torch_mock.hann_window = lambda *a, **kw: MockTensor(np.ones(2048))
 torch_mock.stft = lambda *a, **kw: MockTensor(np.zeros((2, 1025, 10)))
@@ -86,11 +116,49 @@ TempoMatch = module.TempoMatch
 # ---------------------------------------------------------------------------
 
 
-def _make_audio(sample_rate: int = 44100) -> dict:
-    waveform = MockTensor(np.random.randn(1, 2, 16000))
+def _make_audio(sample_rate: int = 44100, batch: int = 1, frames: int = 16000) -> dict:
+    waveform = MockTensor(np.random.randn(batch, 2, frames))
     return {"waveform": waveform, "sample_rate": sample_rate}
 
 
+def _patch_tempo(monkeypatch, tempos: dict[int, float]) -> list:
+    """Analyse every input at the tempo *tempos* gives for its length; returns the analysis passes."""
+    passes = []
+
+    def analyze(waveform, sample_rate, *options):
+        passes.append((waveform.shape, options))
+        bpm = [tempos[waveform.shape[-1]]] * waveform.shape[0]
+        confidence = [float(value > 0) for value in bpm]
+        return types.SimpleNamespace(
+            bpm=types.SimpleNamespace(tolist=lambda: bpm), confidence=types.SimpleNamespace(tolist=lambda: confidence)
+        )
+
+    def estimate_tempo(waveform, sample_rate, *options):
+        passes.append((waveform.shape, options))
+        return tempos[waveform.shape[-1]]
+
+    monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(analyze=analyze))
+    monkeypatch.setattr(module, "estimate_tempo", estimate_tempo)
+    return passes
+
+
+def _estimate(waveform):
+    """Global estimate that comes with a fake tempo curve: a beat was found in every item."""
+    return types.SimpleNamespace(confidence=MockTensor(np.ones(waveform.shape[:-2])))
+
+
+def _patch_time_shift(monkeypatch) -> list:
+    """Pass waveforms through unchanged; returns the (frames, rate) of every stretch."""
+    calls = []
+
+    def fake_time_shift(waveform, rate):
+        calls.append((waveform.shape[-1], rate))
+        return waveform
+
+    monkeypatch.setattr(module, "time_shift", fake_time_shift)
+    return calls
+
+
 # ---------------------------------------------------------------------------
 # Tests
 # ---------------------------------------------------------------------------
@@ -108,14 +176,20 @@ class TestTempoMatchNode:
         assert required["audio_2"] == ("AUDIO",)
 
     def test_return_types(self):
-        assert TempoMatch.RETURN_TYPES == ("AUDIO", "AUDIO")
+        assert TempoMatch.RETURN_TYPES == ("AUDIO",) * 4
+        assert TempoMatch.RETURN_NAMES == ("audio_1", "audio_2", "audio_3", "audio_4")
+
+    def test_modes(self):
+        modes, options = TempoMatch.INPUT_TYPES()["optional"]["mode"]
+        assert modes[0] == options["default"] == "average"
+        assert {"match to audio_1", "match to audio_2", "match to fixed BPM"} <= set(modes)
 
     # -- main logic tests ---------------------------------------------------
 
     def test_different_tempos_120_and_80(self, monkeypatch):
         """120 and 80 → avg 100, rate_1 = 100/120, rate_2 = 100/80."""
         tempo_values = iter([120.0, 80.0])
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: next(tempo_values))
+        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr, *options: next(tempo_values))
 
         ts_calls = []
 
@@ -126,51 +200,250 @@ class TestTempoMatchNode:
         monkeypatch.setattr(module, "time_shift", fake_time_shift)
 
         node = TempoMatch()
-        result_1, result_2 = node.main(_make_audio(44100), _make_audio(22050))
+        result_1, result_2, *_ = node.main(_make_audio(44100), _make_audio(22050))
 
         assert ts_calls[0] == pytest.approx(100.0 / 120.0)
         assert ts_calls[1] == pytest.approx(100.0 / 80.0)
         assert result_1["sample_rate"] == 44100
         assert result_2["sample_rate"] == 22050
 
-    def test_same_tempo_rates_are_one(self, monkeypatch):
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: 100.0)
+    def test_same_tempo_is_not_stretched(self, monkeypatch):
+        _patch_tempo(monkeypatch, {16000: 100.0})
+        calls = _patch_time_shift(monkeypatch)
+
+        result_1, result_2, result_3, result_4 = TempoMatch().main(_make_audio(), _make_audio())
+
+        assert calls == []
+        assert result_1["waveform"].ndim == 3
+        assert result_1["waveform"].shape[0] == 1
+        assert result_2["waveform"].shape == (1, 2, 16000)
+        assert result_3 is None and result_4 is None, "unconnected inputs have no output"
+
+    def test_time_shift_receives_squeezed_waveforms(self, monkeypatch):
+        _patch_tempo(monkeypatch, {16000: 120.0, 8000: 80.0})
+
+        received_ndims = []
+
+        def spy(waveform, rate):
+            received_ndims.append(waveform.ndim)
+            return waveform
+
+        monkeypatch.setattr(module, "time_shift", spy)
+
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000))
+
+        assert received_ndims == [2, 2], "both waveforms should be 2-d (batch squeezed)"
+
+    def test_batched_inputs_get_per_item_rates(self, monkeypatch):
+        """Items at 120/100 and 80 BPM → mean tempos 110 and 80 → every item stretched to 95 BPM."""
+        received = []
+
+        def fake_analyze_tempo(waveform, sample_rate, *options):
+            received.append(waveform.ndim)
+            return types.SimpleNamespace(
+                bpm=types.SimpleNamespace(tolist=lambda: [120.0, 100.0]),
+                confidence=types.SimpleNamespace(tolist=lambda: [0.9, 0.9]),
+            )
 
         ts_calls = []
 
         def fake_time_shift(waveform, rate):
-            ts_calls.append(rate)
+            ts_calls.append((waveform.ndim, rate))
             return waveform
 
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(analyze=fake_analyze_tempo))
+        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr, *options: 80.0)
         monkeypatch.setattr(module, "time_shift", fake_time_shift)
 
-        TempoMatch().main(_make_audio(), _make_audio())
+        result_1, result_2, *_ = TempoMatch().main(_make_audio(batch=2), _make_audio())
 
-        assert ts_calls[0] == pytest.approx(1.0)
-        assert ts_calls[1] == pytest.approx(1.0)
+        assert received == [3], "the batch is analyzed in one pass"
+        assert ts_calls[0][0] == 3
+        assert ts_calls[0][1] == pytest.approx([95.0 / 120.0, 95.0 / 100.0])
+        assert ts_calls[1] == (2, pytest.approx(95.0 / 80.0))
+        assert result_1["waveform"].shape == (2, 2, 16000)
+        assert result_2["waveform"].shape == (1, 2, 16000)
 
-    def test_output_waveforms_unsqueezed(self, monkeypatch):
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: 100.0)
-        monkeypatch.setattr(module, "time_shift", lambda w, r: w)
+    def test_excerpt_options_are_forwarded(self, monkeypatch):
+        passes = _patch_tempo(monkeypatch, {16000: 100.0})
+        _patch_time_shift(monkeypatch)
 
-        result_1, result_2 = TempoMatch().main(_make_audio(), _make_audio())
+        TempoMatch().main(_make_audio(), _make_audio(), excerpts=3, excerpt_seconds=20.0, tolerance_bpm=0.0)
 
-        assert result_1["waveform"].ndim == 3
-        assert result_1["waveform"].shape[0] == 1
-        assert result_2["waveform"].ndim == 3
-        assert result_2["waveform"].shape[0] == 1
+        assert passes == [((2, 2, 16000), (3, 20.0, None))], "a tolerance of 0 disables early exit"
 
-    def test_time_shift_receives_squeezed_waveforms(self, monkeypatch):
-        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr: 100.0)
+    # -- target modes -------------------------------------------------------
 
-        received_ndims = []
+    @pytest.mark.parametrize(
+        ("mode", "expected"),
+        [
+            ("match to audio_1", [(8000, pytest.approx(1.2))]),
+            ("match to audio_2", [(16000, pytest.approx(100.0 / 120.0))]),
+            ("match to fixed BPM", [(16000, pytest.approx(90.0 / 120.0)), (8000, pytest.approx(0.9))]),
+        ],
+    )
+    def test_target_modes_only_stretch_tracks_off_the_target(self, monkeypatch, mode, expected):
+        _patch_tempo(monkeypatch, {16000: 120.0, 8000: 100.0})
+        calls = _patch_time_shift(monkeypatch)
+        audio_1 = _make_audio()
 
-        def spy(waveform, rate):
-            received_ndims.append(waveform.ndim)
-            return waveform
+        result_1, *_ = TempoMatch().main(audio_1, _make_audio(frames=8000), mode=mode, target_bpm=90.0)
 
-        monkeypatch.setattr(module, "time_shift", spy)
+        assert calls == expected
+        if mode == "match to audio_1":
+            np.testing.assert_array_equal(result_1["waveform"]._data, audio_1["waveform"]._data)
 
-        TempoMatch().main(_make_audio(), _make_audio())
+    def test_rate_tolerance_skips_small_stretches(self, monkeypatch):
+        """100 and 101 BPM → average 100.5, rates 1.005 and 0.995."""
+        _patch_tempo(monkeypatch, {16000: 100.0, 8000: 101.0})
+        calls = _patch_time_shift(monkeypatch)
 
-        assert received_ndims == [2, 2], "both waveforms should be 2-d (batch squeezed)"
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), rate_tolerance=0.01)
+        assert calls == []
+
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), rate_tolerance=0.001)
+        assert [frames for frames, _ in calls] == [16000, 8000]
+
+    def test_tracks_without_a_beat_are_left_out(self, monkeypatch):
+        """120 and 100 BPM with a silent track → target 110; the silent track is not stretched."""
+        _patch_tempo(monkeypatch, {16000: 120.0, 8000: 100.0, 4000: 0.0})
+        calls = _patch_time_shift(monkeypatch)
+
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), _make_audio(frames=4000))
+
+        assert calls == [(16000, pytest.approx(110.0 / 120.0)), (8000, pytest.approx(1.1))]
+
+    def test_silent_reference_stretches_nothing(self, monkeypatch):
+        _patch_tempo(monkeypatch, {16000: 0.0, 8000: 100.0})
+        calls = _patch_time_shift(monkeypatch)
+
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), mode="match to audio_1")
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), mode="match to audio_1", follow_tempo_curve=True)
+
+        assert calls == []
+
+    def test_batch_rates_within_tolerance_snap_to_one(self):
+        assert TempoMatch.rate(100.0, [100.2, 80.0], 0.01) == [1.0, pytest.approx(1.25)]
+
+    def test_four_inputs_share_analysis_passes(self, monkeypatch):
+        passes = _patch_tempo(monkeypatch, {16000: 120.0, 8000: 80.0})
+        calls = _patch_time_shift(monkeypatch)
+
+        outputs = TempoMatch().main(
+            _make_audio(), _make_audio(frames=8000), _make_audio(), _make_audio(), mode="match to audio_2"
+        )
+
+        assert sorted(shape for shape, _ in passes) == [(2, 8000), (3, 2, 16000)]
+        assert calls == [(16000, pytest.approx(80.0 / 120.0))] * 3
+        assert [output["waveform"].shape[-1] for output in outputs] == [16000, 8000, 16000, 16000]
+
+    def test_inputs_with_different_rates_are_analyzed_apart(self, monkeypatch):
+        passes = _patch_tempo(monkeypatch, {16000: 100.0})
+        _patch_time_shift(monkeypatch)
+
+        TempoMatch().main(_make_audio(44100), _make_audio(48000))
+
+        assert [shape for shape, _ in passes] == [(2, 16000), (2, 16000)]
+
+    def test_missing_reference_raises(self, monkeypatch):
+        _patch_tempo(monkeypatch, {16000: 100.0})
+        with pytest.raises(ValueError, match="audio_3"):
+            TempoMatch().main(_make_audio(), _make_audio(), mode="match to audio_3")
+
+    def test_unknown_mode_raises(self, monkeypatch):
+        _patch_tempo(monkeypatch, {16000: 100.0})
+        with pytest.raises(ValueError, match="mode"):
+            TempoMatch().main(_make_audio(), _make_audio(), mode="double time")
+
+    # -- follow mode --------------------------------------------------------
+
+    def test_follow_tempo_curve_stretches_with_rate_maps(self, monkeypatch):
+        """A curve at 100 then 125 BPM against a steady 80 BPM track → target 90 BPM everywhere."""
+        curve = types.SimpleNamespace(times=MockTensor(np.array([1.0, 2.0])), bpm=MockTensor(np.array([100.0, 125.0])))
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=lambda w, sr: (_estimate(w), curve)))
+        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr, *options: 100.0 if w.shape[-1] == 16000 else 80.0)
+
+        maps = []
+        monkeypatch.setattr(
+            module, "rate_map", lambda times, rates, frames, sr: maps.append((rates, frames, sr)) or rates
+        )
+        monkeypatch.setattr(module, "time_shift", lambda w, r: w)
+
+        TempoMatch().main(_make_audio(), _make_audio(frames=8000), follow_tempo_curve=True)
+
+        assert [(frames, sr) for _, frames, sr in maps] == [(16000, 44100), (8000, 44100)]
+        np.testing.assert_allclose(maps[0][0]._data, [0.9, 0.72])
+
+    def test_follow_tempo_curve_pads_batch_items(self, monkeypatch):
+        def curve(waveform, sample_rate):
+            bpm = [[100.0], [50.0]] if waveform.ndim == 3 else [75.0]
+            return _estimate(waveform), types.SimpleNamespace(
+                times=MockTensor(np.array([1.0])), bpm=MockTensor(np.array(bpm))
+            )
+
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=curve))
+        tempo = staticmethod(lambda w, sr, *options: [100.0, 50.0] if w.ndim == 3 else 75.0)
+        monkeypatch.setattr(TempoMatch, "tempo", tempo)
+        monkeypatch.setattr(module, "rate_map", lambda times, rates, frames, sr: float(rates._data[0]))
+        monkeypatch.setattr(module, "time_shift", lambda w, r: MockTensor(w._data[..., : int(w.shape[-1] / r)]))
+
+        result, *_ = TempoMatch().main(_make_audio(batch=2), _make_audio(), follow_tempo_curve=True)
+
+        # Target 75 BPM: the 100 BPM item is slowed to 0.75 (kept whole), the 50 BPM item sped up 1.5x.
+        assert result["waveform"].shape == (2, 2, 16000)
+        assert np.all(result["waveform"]._data[1, :, 16000 * 2 // 3 + 1 :] == 0.0)
+
+    def test_follow_tempo_curve_skips_tracks_within_tolerance(self, monkeypatch):
+        curve = types.SimpleNamespace(times=MockTensor(np.array([1.0, 2.0])), bpm=MockTensor(np.array([99.5, 100.5])))
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=lambda w, sr: (_estimate(w), curve)))
+        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr, *options: 100.0)
+        calls = _patch_time_shift(monkeypatch)
+
+        TempoMatch().main(
+            _make_audio(),
+            _make_audio(frames=8000),
+            mode="match to audio_1",
+            rate_tolerance=0.01,
+            follow_tempo_curve=True,
+        )
+
+        assert calls == []
+
+    def test_follow_tempo_curve_passes_the_reference_through(self, monkeypatch):
+        """A reference drifting from 100 to 114 BPM sets the target and is not flattened itself."""
+        curve = types.SimpleNamespace(times=MockTensor(np.array([1.0, 2.0])), bpm=MockTensor(np.array([100.0, 114.0])))
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=lambda w, sr: (_estimate(w), curve)))
+        monkeypatch.setattr(module, "estimate_tempo", lambda w, sr, *options: 107.0 if w.shape[-1] == 16000 else 90.0)
+        monkeypatch.setattr(module, "rate_map", lambda times, rates, frames, sr: rates)
+        calls = _patch_time_shift(monkeypatch)
+        audio_1 = _make_audio()
+
+        result_1, *_ = TempoMatch().main(
+            audio_1, _make_audio(frames=8000), mode="match to audio_1", follow_tempo_curve=True
+        )
+
+        assert [frames for frames, _ in calls] == [8000]
+        np.testing.assert_array_equal(result_1["waveform"]._data, audio_1["waveform"]._data)
+
+    @pytest.mark.parametrize(("bpm", "rate_tolerance"), [([100.0, 100.0], 0.0), ([99.5, 100.5], 0.01)])
+    def test_follow_tempo_curve_returns_flat_batches_unchanged(self, monkeypatch, bpm, rate_tolerance):
+        curve = types.SimpleNamespace(times=MockTensor(np.array([1.0, 2.0])), bpm=MockTensor(np.array([bpm, bpm])))
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=lambda w, sr: (_estimate(w), curve)))
+        calls = _patch_time_shift(monkeypatch)
+        waveform = MockTensor(np.random.randn(2, 2, 16000))
+
+        result = TempoMatch.follow(waveform, 44100, 100.0, rate_tolerance)
+
+        assert calls == []
+        assert result is waveform
+
+    def test_follow_tempo_curve_leaves_items_without_a_beat(self, monkeypatch):
+        curve = types.SimpleNamespace(times=MockTensor(np.array([1.0])), bpm=MockTensor(np.array([[80.0], [120.0]])))
+        estimate = types.SimpleNamespace(confidence=MockTensor(np.array([0.8, 0.0])))
+        monkeypatch.setattr(module, "TEMPO_CACHE", types.SimpleNamespace(curve=lambda w, sr: (estimate, curve)))
+        monkeypatch.setattr(module, "rate_map", lambda times, rates, frames, sr: float(rates._data[0]))
+        calls = _patch_time_shift(monkeypatch)
+
+        TempoMatch.follow(MockTensor(np.random.randn(2, 2, 16000)), 44100, 100.0)
+
+        assert calls == [(16000, pytest.approx(1.25))]
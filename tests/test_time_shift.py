@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib
+import math
 import sys
 import types
 
@@ -55,9 +56,21 @@ sys.modules["torch"] = torch_mock
 torchaudio_mock = types.ModuleType("torchaudio")
 torchaudio_functional = types.ModuleType("torchaudio.functional")
 torchaudio_functional.phase_vocoder = lambda *a, **kw: MockTensor(np.zeros((2, 1025, 10)))
+torchaudio_transforms = types.ModuleType("torchaudio.transforms")
+torchaudio_transforms.Resample = object
 torchaudio_mock.functional = torchaudio_functional
+torchaudio_mock.transforms = torchaudio_transforms
 sys.modules["torchaudio"] = torchaudio_mock
 sys.modules["torchaudio.functional"] = torchaudio_functional
+sys.modules["torchaudio.transforms"] = torchaudio_transforms
+
+comfy_mock = types.ModuleType("comfy")
+comfy_mock.__path__ = []
+comfy_mm = types.ModuleType("comfy.model_management")
+comfy_mm.get_torch_device = lambda: "cpu"
+comfy_mock.model_management = comfy_mm
+sys.modules["comfy"] = comfy_mock
+sys.modules["comfy.model_management"] = comfy_mm
 
 librosa_mock = types.ModuleType("librosa")
 librosa_onset = types.ModuleType("librosa.onset")
@@ -86,8 +99,8 @@ TimeShift = module.TimeShift
 # ---------------------------------------------------------------------------
 
 
-def _make_audio(sample_rate: int = 44100) -> dict:
-    waveform = MockTensor(np.random.randn(1, 2, 16000))
+def _make_audio(sample_rate: int = 44100, batch: int = 1) -> dict:
+    waveform = MockTensor(np.random.randn(batch, 2, 16000))
     return {"waveform": waveform, "sample_rate": sample_rate}
 
 
@@ -178,3 +191,90 @@ class TestTimeShiftNode:
         (result,) = TimeShift().main(_make_audio(), rate=1.0)
         assert result["waveform"].ndim == 3, "output should have batch dim restored"
         assert result["waveform"].shape[0] == 1
+
+    def test_batched_audio_is_stretched_as_batch(self, monkeypatch):
+        spy, calls, _ = _stub_time_shift(np.random.randn(3, 2, 8000))
+        monkeypatch.setattr(module, "time_shift", spy)
+
+        (result,) = TimeShift().main(_make_audio(batch=3), rate=1.5)
+
+        assert calls[0]["waveform_ndim"] == 3
+        assert result["waveform"].shape == (3, 2, 8000)
+
+    # -- engine tests -------------------------------------------------------
+
+    def test_engine_is_optional_with_phase_vocoder_default(self):
+        engine = TimeShift.INPUT_TYPES()["optional"]["engine"]
+        assert engine[0] == ["phase_vocoder", "phase_locked", "wsola", "varispeed"]
+        assert engine[1]["default"] == "phase_vocoder"
+
+    def test_phase_locked_engine(self, monkeypatch):
+        calls = []
+
+        def spy(waveform, rate, phase_locking=False):
+            calls.append(phase_locking)
+            return MockTensor(np.zeros((2, 8000)))
+
+        monkeypatch.setattr(module, "time_shift", spy)
+        TimeShift().main(_make_audio(), rate=1.5, engine="phase_locked")
+
+        assert calls == [True]
+
+    def test_wsola_engine(self, monkeypatch):
+        spy, calls, _ = _stub_time_shift()
+        monkeypatch.setattr(module, "wsola_time_shift", spy)
+        monkeypatch.setattr(module, "time_shift", None)
+
+        (result,) = TimeShift().main(_make_audio(), rate=0.8, engine="wsola")
+
+        assert calls[0]["rate"] == pytest.approx(0.8)
+        assert result["waveform"].shape == (1, 2, 8000)
+
+    def test_varispeed_engine_resamples_relabelled_input(self, monkeypatch):
+        resamplers = []
+
+        resample_module = importlib.import_module("src.resample")
+
+        class FakeResampler:
+            _find_optimal_freq = resample_module.ChunkResampler._find_optimal_freq
+
+            def __init__(self, orig_freq, new_freq, **kwargs):
+                self.args = (orig_freq, new_freq)
+                resamplers.append(self)
+
+            def __call__(self, waveform):
+                return MockTensor(np.zeros((2, 8000)))
+
+        monkeypatch.setattr(resample_module, "ChunkResampler", FakeResampler)
+        monkeypatch.setattr(module, "time_shift", None)
+
+        (result,) = TimeShift().main(_make_audio(22050), rate=2.0, engine="varispeed")
+
+        assert resamplers[0].args == (44100, 22050)
+        assert result["sample_rate"] == 22050
+        assert result["waveform"].shape == (1, 2, 8000)
+
+    def test_varispeed_relabels_at_rate_with_small_kernel(self, monkeypatch):
+        resample_module = importlib.import_module("src.resample")
+        resamplers = []
+
+        class FakeResampler:
+            _find_optimal_freq = resample_module.ChunkResampler._find_optimal_freq
+
+            def __init__(self, orig_freq, new_freq, **kwargs):
+                resamplers.append((orig_freq, new_freq))
+
+            def __call__(self, waveform):
+                return MockTensor(np.zeros((2, 8000)))
+
+        monkeypatch.setattr(resample_module, "ChunkResampler", FakeResampler)
+
+        TimeShift().main(_make_audio(44100), rate=1.2345, engine="varispeed")
+
+        orig_freq, new_freq = resamplers[0]
+        assert orig_freq == pytest.approx(44100 * 1.2345, rel=TimeShift.VARISPEED_TOLERANCE)
+        assert math.gcd(int(orig_freq), new_freq) >= 100
+
+    def test_unknown_engine_raises(self):
+        with pytest.raises(ValueError, match="Unknown engine"):
+            TimeShift().main(_make_audio(), rate=1.0, engine="granular")
@@ -7,7 +7,7 @@ import numpy as np
 import pytest
 
 # ---------------------------------------------------------------------------
-# Mock torch, torchaudio, and librosa BEFORE importing src.utils
+# Mock torch and torchaudio BEFORE importing src.utils
 # ---------------------------------------------------------------------------
 
 
@@ -96,18 +96,6 @@ torchaudio_mock.functional = torchaudio_functional_mock
 sys.modules["torchaudio"] = torchaudio_mock
 sys.modules["torchaudio.functional"] = torchaudio_functional_mock
 
-# -- librosa mock -----------------------------------------------------------
-librosa_mock = types.ModuleType("librosa")
-librosa_onset_mock = types.ModuleType("librosa.onset")
-librosa_beat_mock = types.ModuleType("librosa.beat")
-librosa_onset_mock.onset_strength = MagicMock()
-librosa_beat_mock.beat_track = MagicMock()
-librosa_mock.onset = librosa_onset_mock
-librosa_mock.beat = librosa_beat_mock
-sys.modules["librosa"] = librosa_mock
-sys.modules["librosa.onset"] = librosa_onset_mock
-sys.modules["librosa.beat"] = librosa_beat_mock
-
 # Clear any previously-cached src modules so they reimport with our mocks
 for _key in list(sys.modules):
     if _key.startswith("src."):
@@ -116,7 +104,8 @@ for _key in list(sys.modules):
 # ---------------------------------------------------------------------------
 # Now import the module under test
 # ---------------------------------------------------------------------------
-from src.utils import ensure_stereo, estimate_tempo, time_shift
+import src.utils as utils
+from src.utils import ensure_stereo, estimate_tempo, stft_plan, time_shift
 
 # ===========================================================================
 # ensure_stereo
@@ -190,39 +179,46 @@ class TestEnsureStereo:
 
 
 class TestEstimateTempo:
-    def test_returns_tempo(self):
-        librosa_onset_mock.onset_strength.return_value = np.ones(10)
-        librosa_beat_mock.beat_track.return_value = (np.array([[120.0]]), None)
+    confidence = 1.0
 
-        waveform = MockTensor(np.random.rand(2, 22050))
-        tempo = estimate_tempo(waveform, 22050)
+    @pytest.fixture
+    def analyze(self, monkeypatch):
+        calls = []
 
-        assert tempo == 120.0
-        librosa_onset_mock.onset_strength.assert_called_once()
-        librosa_beat_mock.beat_track.assert_called_once()
+        def spy(waveform, sample_rate, *options):
+            calls.append((waveform.ndim, sample_rate, *options))
+            return types.SimpleNamespace(bpm=self.bpm, confidence=self.confidence)
+
+        monkeypatch.setattr(utils, "TEMPO_CACHE", types.SimpleNamespace(analyze=spy))
+        return calls
 
-    def test_3d_input_gets_squeezed(self):
-        librosa_onset_mock.onset_strength.reset_mock()
-        librosa_beat_mock.beat_track.reset_mock()
-        librosa_onset_mock.onset_strength.return_value = np.ones(10)
-        librosa_beat_mock.beat_track.return_value = (np.array([[90.0]]), None)
+    def test_returns_tempo(self, analyze):
+        self.bpm = 120.0
+        tempo = estimate_tempo(MockTensor(np.random.rand(2, 22050)), 22050)
+
+        assert tempo == 120.0
+        assert analyze == [(2, 22050, None, 30.0, None)]
 
-        waveform = MockTensor(np.random.rand(1, 2, 22050))
-        tempo = estimate_tempo(waveform, 22050)
+    def test_3d_input_gets_squeezed(self, analyze):
+        self.bpm = 90.0
+        tempo = estimate_tempo(MockTensor(np.random.rand(1, 2, 22050)), 22050)
 
         assert tempo == 90.0
-        call_kwargs = librosa_onset_mock.onset_strength.call_args
-        # After squeeze(0) the array should be 2D
-        assert call_kwargs.kwargs["y"].ndim == 2
+        assert analyze == [(2, 22050, None, 30.0, None)], "analyzed as [channels, frames]"
 
-    def test_min_clamp(self):
-        librosa_onset_mock.onset_strength.return_value = np.ones(10)
-        librosa_beat_mock.beat_track.return_value = (np.array([[0.5]]), None)
+    def test_excerpt_options_are_forwarded(self, analyze):
+        self.bpm = 120.0
+        estimate_tempo(MockTensor(np.random.rand(2, 22050)), 22050, excerpts=3, excerpt_seconds=10.0, tolerance_bpm=1.0)
 
-        waveform = MockTensor(np.random.rand(2, 22050))
-        tempo = estimate_tempo(waveform, 22050)
+        assert analyze == [(2, 22050, 3, 10.0, 1.0)]
 
-        assert tempo == 1.0
+    def test_min_clamp(self, analyze):
+        self.bpm = 0.5
+        assert estimate_tempo(MockTensor(np.random.rand(2, 22050)), 22050) == 1.0
+
+    def test_no_beat_is_zero(self, analyze):
+        self.bpm, self.confidence = 120.0, 0.0
+        assert estimate_tempo(MockTensor(np.zeros((2, 22050))), 22050) == 0.0
 
     def test_wrong_ndim_raises(self):
         waveform = MockTensor(np.random.rand(22050))
@@ -245,6 +241,8 @@ class TestTimeShift:
         torch_mock.istft.reset_mock()
         torchaudio_functional_mock.phase_vocoder.reset_mock()
         torch_mock.linspace.reset_mock()
+        torch_mock.hann_window.reset_mock()
+        stft_plan.cache_clear()
 
         torch_mock.stft.return_value = stft_result
 
@@ -295,3 +293,42 @@ class TestTimeShift:
         waveform = MockTensor(np.zeros((2, 44100)))
         with pytest.raises(TypeError, match="Expected complex-valued STFT"):
             time_shift(waveform, 1.0)
+
+
+class TestStftPlan:
+    def setup_method(self):
+        stft_plan.cache_clear()
+        torch_mock.hann_window.reset_mock()
+        torch_mock.linspace.reset_mock()
+
+    def test_same_configuration_is_memoized(self):
+        assert stft_plan(2048, 512, 2048, "cpu") is stft_plan(2048, 512, 2048, "cpu")
+        torch_mock.hann_window.assert_called_once()
+        torch_mock.linspace.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "args",
+        [(1024, 512, 2048, "cpu"), (2048, 256, 2048, "cpu"), (2048, 512, 1024, "cpu"), (2048, 512, 2048, "cuda:0")],
+    )
+    def test_configuration_is_part_of_key(self, args):
+        assert stft_plan(*args) is not stft_plan(2048, 512, 2048, "cpu")
+
+    def test_tables_built_on_requested_device_and_dtype(self):
+        stft_plan(2048, 512, 2048, "cuda:0", "torch.float16")
+
+        assert torch_mock.hann_window.call_args.kwargs == {"device": "cuda:0", "dtype": "torch.float16"}
+        args, kwargs = torch_mock.linspace.call_args
+        assert args == (0, math.pi * 512, 1025)
+        assert kwargs == {"device": "cuda:0", "dtype": "torch.float16"}
+
+    def test_time_shift_reuses_plan_across_calls(self):
+        TestTimeShift()._setup_stft_mocks()
+        waveform = MockTensor(np.zeros((2, 44100)))
+
+        time_shift(waveform, 1.0)
+        time_shift(waveform, 1.0)
+
+        torch_mock.hann_window.assert_called_once()
+        plan = stft_plan(2048, 512, 2048, waveform.device, waveform.dtype)
+        assert torchaudio_functional_mock.phase_vocoder.call_args[0][2] is plan.phase_advance
+        assert torch_mock.istft.call_args.kwargs["window"] is plan.window
@@ -0,0 +1,620 @@
+"""Numerical tests for the streaming and batched time_shift paths in src.utils.
+
+torch is replaced by a small numpy-backed implementation of the operations these paths use, so
+their output can be checked against a whole-signal numpy reference.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+import types
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+# ---------------------------------------------------------------------------
+# numpy-backed torch mock
+# ---------------------------------------------------------------------------
+
+
+def _unwrap(value):
+    return value._data if isinstance(value, MockTensor) else value
+
+
+class MockTensor:
+    def __init__(self, data):
+        self._data = np.asarray(data)
+
+    shape = property(lambda self: self._data.shape)
+    dtype = property(lambda self: self._data.dtype)
+    device = "cpu"
+
+    def __int__(self):
+        return int(self._data)
+
+    def item(self):
+        return self._data.item()
+
+    def __getitem__(self, key):
+        key = tuple(_unwrap(k) for k in key) if isinstance(key, tuple) else _unwrap(key)
+        return MockTensor(self._data[key])
+
+    def __setitem__(self, key, value):
+        key = tuple(_unwrap(k) for k in key) if isinstance(key, tuple) else _unwrap(key)
+        self._data[key] = _unwrap(value)
+
+    def __iadd__(self, other):
+        self._data += _unwrap(other)
+        return self
+
+    def _binary(op):
+        return lambda self, other: MockTensor(op(self._data, _unwrap(other)))
+
+    __add__ = __radd__ = _binary(np.add)
+    __sub__ = _binary(np.subtract)
+    __rsub__ = _binary(lambda a, b: b - a)
+    __mul__ = __rmul__ = _binary(np.multiply)
+    __truediv__ = _binary(np.divide)
+    __rtruediv__ = _binary(lambda a, b: b / a)
+    __mod__ = _binary(np.mod)
+    __pow__ = _binary(np.power)
+    __gt__ = _binary(np.greater)
+    __ge__ = _binary(np.greater_equal)
+    __le__ = _binary(np.less_equal)
+    __and__ = _binary(np.logical_and)
+
+    def reshape(self, *shape):
+        return MockTensor(self._data.reshape(*shape))
+
+    def dim(self):
+        return self._data.ndim
+
+    def new_empty(self, shape):
+        return MockTensor(np.empty(shape, dtype=self._data.dtype))
+
+    def new_zeros(self, shape):
+        return MockTensor(np.zeros(shape, dtype=self._data.dtype))
+
+    def expand(self, *shape):
+        shape = [old if new == -1 else new for old, new in zip(self._data.shape, shape)]
+        return MockTensor(np.broadcast_to(self._data, shape))
+
+    def transpose(self, dim0, dim1):
+        return MockTensor(np.swapaxes(self._data, dim0, dim1))
+
+    def flip(self, dim):
+        return MockTensor(np.flip(self._data, axis=dim))
+
+    def cummax(self, dim):
+        return types.SimpleNamespace(values=MockTensor(np.maximum.accumulate(self._data, axis=dim)))
+
+    def cummin(self, dim):
+        return types.SimpleNamespace(values=MockTensor(np.minimum.accumulate(self._data, axis=dim)))
+
+    def any(self, dim, keepdim=False):
+        return MockTensor(np.any(self._data, axis=dim, keepdims=keepdim))
+
+    def mean(self, dim, keepdim=False):
+        return MockTensor(np.mean(self._data, axis=dim, keepdims=keepdim, dtype=self._data.dtype))
+
+    def argmax(self, dim, keepdim=False):
+        return MockTensor(np.argmax(self._data, axis=dim, keepdims=keepdim))
+
+    def gather(self, dim, index):
+        return MockTensor(np.take_along_axis(self._data, index._data, axis=dim))
+
+    def double(self):
+        return MockTensor(self._data.astype(np.float64))
+
+    def to(self, dtype=None, device=None):
+        return MockTensor(self._data.astype(dtype or self._data.dtype))
+
+    def float(self):
+        return MockTensor(self._data.astype(np.float32))
+
+    def clone(self):
+        return MockTensor(self._data.copy())
+
+    def all(self):
+        return MockTensor(np.all(self._data))
+
+    def __bool__(self):
+        return bool(self._data)
+
+    def clamp(self, min, max):
+        return MockTensor(np.clip(self._data, min, max))
+
+    def clamp_max(self, value):
+        return MockTensor(np.minimum(self._data, value))
+
+    def sqrt(self):
+        return MockTensor(np.sqrt(self._data))
+
+    def rsqrt(self):
+        return MockTensor(1 / np.sqrt(self._data))
+
+    def long(self):
+        return MockTensor(self._data.astype(np.int64))
+
+    def index_select(self, dim, index):
+        return MockTensor(np.take(self._data, index._data, axis=dim))
+
+    def angle(self):
+        return MockTensor(np.angle(self._data).astype(np.float32))
+
+    def abs(self):
+        return MockTensor(np.abs(self._data).astype(np.float32))
+
+    def clamp_min(self, value):
+        return MockTensor(np.maximum(self._data, value))
+
+
+def _pad(x, pad, mode="constant", value=0.0):
+    pairs = [tuple(pad[i : i + 2]) for i in range(0, len(pad), 2)][::-1]
+    width = [(0, 0)] * (x._data.ndim - len(pairs)) + pairs
+    if mode == "reflect":
+        return MockTensor(np.pad(x._data, width, mode="reflect"))
+    return MockTensor(np.pad(x._data, width, constant_values=value))
+
+
+def _conv1d(x, weight, groups):
+    """Grouped cross-correlation of x [1, groups, length] with weight [groups, 1, kernel]."""
+    rows = [np.correlate(x._data[0, g], weight._data[g, 0], mode="valid") for g in range(groups)]
+    return MockTensor(np.stack(rows)[None])
+
+
+def _np_window(fft_size, win_length):
+    left = (fft_size - win_length) // 2
+    window = np.zeros(fft_size)
+    window[left : left + win_length] = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(win_length) / win_length)
+    return window
+
+
+def _np_stft(data, fft_size, hop_size, window, center=True):
+    if center:
+        data = np.pad(data, [(0, 0)] * (data.ndim - 1) + [(fft_size // 2, fft_size // 2)], mode="reflect")
+    count = 1 + (data.shape[-1] - fft_size) // hop_size
+    frames = np.stack([data[..., i * hop_size : i * hop_size + fft_size] for i in range(count)], axis=-1)
+    return np.fft.rfft(frames * window[:, None], axis=-2)
+
+
+def _np_lock_phases(phase, magnitude, analysis_phase):
+    """Identity phase locking, frame by frame: each bin follows the phase of its nearest peak."""
+    locked = phase.copy()
+    for index in np.ndindex(*magnitude.shape[:-2], magnitude.shape[-1]):
+        *lead, frame = index
+        mag = magnitude[(*lead, slice(None), frame)]
+        padded = np.pad(mag, 2, constant_values=-1.0)
+        peaks = [
+            k
+            for k in range(mag.shape[0])
+            if mag[k] > padded[k] and mag[k] > padded[k + 1] and mag[k] >= padded[k + 3] and mag[k] >= padded[k + 4]
+        ]
+        if not peaks:
+            continue
+        for k in range(mag.shape[0]):
+            peak = min(peaks, key=lambda p, k=k: (abs(p - k), p))
+            key = (*lead, k, frame)
+            peak_key = (*lead, peak, frame)
+            locked[key] = phase[peak_key] + analysis_phase[key] - analysis_phase[peak_key]
+    return locked
+
+
+def _np_time_steps(rate_map):
+    """Read position of every output frame when input frame i is read at rate_map[i] frames per output frame."""
+    steps, start = [], 0.0
+    for frame, rate in enumerate(rate_map):
+        end = start + 1.0 / rate
+        steps += [frame + (k - start) * rate for k in range(math.ceil(start - 1e-9), math.ceil(end - 1e-9))]
+        start = end
+    return np.asarray(steps, dtype=np.float32).astype(np.float64)
+
+
+def _np_phase_vocoder(spec, rate, advance, lock=False):
+    """torchaudio.functional.phase_vocoder in numpy, optionally with identity phase locking.
+
+    *rate* may also be a rate map with one rate per frame of *spec*.
+    """
+    if np.isscalar(rate) and rate == 1.0:
+        return spec
+    if np.isscalar(rate):
+        steps = np.arange(0, spec.shape[-1], rate, dtype=np.float32).astype(np.float64)
+    else:
+        steps = _np_time_steps(rate)
+    spec = np.pad(spec, [(0, 0)] * (spec.ndim - 1) + [(0, 2)])
+    spec_0, spec_1 = spec[..., steps.astype(int)], spec[..., steps.astype(int) + 1]
+    phase = np.angle(spec_1) - np.angle(spec_0) - advance
+    phase = phase - 2 * np.pi * np.round(phase / (2 * np.pi)) + advance
+    phase = np.cumsum(np.concatenate([np.angle(spec[..., :1]), phase[..., :-1]], axis=-1), axis=-1)
+    alphas = steps % 1.0
+    magnitude = alphas * np.abs(spec_1) + (1 - alphas) * np.abs(spec_0)
+    if lock:
+        phase = _np_lock_phases(phase, magnitude, np.angle(spec_0))
+    return magnitude * np.exp(1j * phase)
+
+
+def _np_istft(spec, fft_size, hop_size, window):
+    frames = np.fft.irfft(spec, n=fft_size, axis=-2) * window[:, None]
+    length = (spec.shape[-1] - 1) * hop_size + fft_size
+    signal, envelope = np.zeros((*spec.shape[:-2], length)), np.zeros(length)
+    for i in range(spec.shape[-1]):
+        signal[..., i * hop_size : i * hop_size + fft_size] += frames[..., i]
+        envelope[i * hop_size : i * hop_size + fft_size] += window**2
+    half = fft_size // 2
+    return signal[..., half:-half] / envelope[half:-half]
+
+
+def _stft(x, n_fft, hop_length, win_length, window, return_complex, center=True):
+    window = np.pad(window._data, ((n_fft - win_length) // 2, n_fft - win_length - (n_fft - win_length) // 2))
+    return MockTensor(_np_stft(x._data, n_fft, hop_length, window, center).astype(np.complex64))
+
+
+def _istft(x, n_fft, hop_length, win_length, window):
+    window = np.pad(window._data, ((n_fft - win_length) // 2, n_fft - win_length - (n_fft - win_length) // 2))
+    return MockTensor(_np_istft(x._data, n_fft, hop_length, window).astype(np.float32))
+
+
+def _phase_vocoder(spec, rate, phase_advance):
+    return MockTensor(_np_phase_vocoder(spec._data, rate, phase_advance._data).astype(np.complex64))
+
+
+def _fold(x, output_size, kernel_size, stride):
+    data = x._data  # [n, kernel, blocks]
+    out = np.zeros((data.shape[0], output_size[1]), dtype=data.dtype)
+    for i in range(data.shape[-1]):
+        out[:, i * stride[1] : i * stride[1] + kernel_size[1]] += data[..., i]
+    return MockTensor(out[:, None, None, :])
+
+
+def _hann_window(length, device=None, dtype=None):
+    return MockTensor((0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / length)).astype(np.float32))
+
+
+def _linspace(start, end, steps, device=None, dtype=None):
+    return MockTensor(np.linspace(start, end, steps, dtype=np.float32))
+
+
+class _NoGrad:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+torch_mock = types.ModuleType("torch")
+torch_mock.Tensor = MockTensor
+torch_mock.float32 = np.float32
+torch_mock.float64 = np.float64
+torch_mock.cfloat = np.complex64
+torch_mock.no_grad = _NoGrad
+torch_mock.hann_window = _hann_window
+torch_mock.linspace = _linspace
+torch_mock.stft = MagicMock(side_effect=_stft)
+torch_mock.istft = _istft
+torch_mock.tensor = lambda data, device=None: MockTensor(np.asarray(data))
+torch_mock.long = np.int64
+torch_mock.arange = lambda *args, device=None, dtype=None: MockTensor(np.arange(*args, dtype=dtype))
+torch_mock.full = lambda shape, value, device=None: MockTensor(np.full(shape, value))
+torch_mock.zeros = lambda shape, dtype=None, device=None: MockTensor(np.zeros(shape, dtype=dtype))
+torch_mock.where = lambda condition, x, y: MockTensor(np.where(condition._data, _unwrap(x), _unwrap(y)))
+torch_mock.round = lambda x: MockTensor(np.round(x._data))
+torch_mock.searchsorted = lambda sorted_sequence, values, right=False: MockTensor(
+    np.searchsorted(sorted_sequence._data, values._data, side="right" if right else "left")
+)
+torch_mock.cumsum = lambda x, dim: MockTensor(np.cumsum(x._data, axis=dim, dtype=x._data.dtype))
+torch_mock.cat = lambda tensors, dim=0: MockTensor(np.concatenate([t._data for t in tensors], axis=dim))
+torch_mock.remainder = lambda x, other: MockTensor(np.remainder(x._data, other))
+torch_mock.polar = lambda abs, angle: MockTensor((abs._data * np.exp(1j * angle._data)).astype(np.complex64))
+torch_mock.fft = types.SimpleNamespace(
+    irfft=lambda x, n, dim: MockTensor(np.fft.irfft(x._data, n=n, axis=dim).astype(np.float32))
+)
+torch_mock.nn = types.SimpleNamespace(functional=types.SimpleNamespace(pad=_pad, fold=_fold, conv1d=_conv1d))
+sys.modules["torch"] = torch_mock
+
+torchaudio_mock = types.ModuleType("torchaudio")
+torchaudio_functional_mock = types.ModuleType("torchaudio.functional")
+torchaudio_functional_mock.phase_vocoder = MagicMock(side_effect=_phase_vocoder)
+torchaudio_mock.functional = torchaudio_functional_mock
+sys.modules["torchaudio"] = torchaudio_mock
+sys.modules["torchaudio.functional"] = torchaudio_functional_mock
+
+librosa_mock = types.ModuleType("librosa")
+sys.modules["librosa"] = librosa_mock
+
+for _key in list(sys.modules):
+    if _key.startswith("src."):
+        del sys.modules[_key]
+
+import src.utils as utils  # noqa: E402
+from src.utils import batch_time_shift, rate_map, stream_time_shift, time_shift, wsola_time_shift  # noqa: E402
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _reference(waveform, rate, fft_size, hop_size, win_length=None, lock=False):
+    """Whole-signal stft -> phase_vocoder -> istft in float64 numpy, following torch/torchaudio."""
+    window = _np_window(fft_size, win_length or fft_size)
+    spec = _np_stft(waveform.astype(np.float64), fft_size, hop_size, window)
+    advance = np.linspace(0, math.pi * hop_size, spec.shape[-2])[:, None]
+    return _np_istft(_np_phase_vocoder(spec, rate, advance, lock), fft_size, hop_size, window)
+
+
+def _waveform(shape, seed=0):
+    return np.random.default_rng(seed).standard_normal(shape).astype(np.float32)
+
+
+def _streamed(waveform, *args, **kwargs):
+    pieces = [piece._data for piece in stream_time_shift(MockTensor(waveform), *args, **kwargs)]
+    return np.concatenate(pieces, axis=-1), pieces
+
+
+@pytest.fixture(autouse=True)
+def _fresh_plans():
+    utils.stft_plan.cache_clear()
+    torch_mock.stft.reset_mock()
+    torchaudio_functional_mock.phase_vocoder.reset_mock()
+
+
+# ===========================================================================
+# stream_time_shift
+# ===========================================================================
+
+
+class TestStreamTimeShift:
+    @pytest.mark.parametrize("rate", [0.75, 1.3, 2.0])
+    @pytest.mark.parametrize("block_frames", [1, 4, 1000])
+    def test_matches_whole_signal_reference(self, rate, block_frames):
+        waveform = _waveform((2, 4000))
+        result, _ = _streamed(waveform, rate, fft_size=256, hop_size=64, block_frames=block_frames)
+
+        expected = _reference(waveform, rate, 256, 64)
+        assert result.shape == expected.shape
+        np.testing.assert_allclose(result, expected, atol=5e-3)
+
+    def test_unit_rate_reconstructs_input(self):
+        waveform = _waveform((2, 3000))
+        result, _ = _streamed(waveform, 1.0, fft_size=256, hop_size=64, block_frames=5)
+
+        np.testing.assert_allclose(result, waveform[:, : result.shape[-1]], atol=1e-5)
+
+    def test_short_window_is_centered(self):
+        waveform = _waveform((1, 3000))
+        result, _ = _streamed(waveform, 1.25, fft_size=256, hop_size=50, win_length=200, block_frames=3)
+
+        np.testing.assert_allclose(result, _reference(waveform, 1.25, 256, 50, 200), atol=5e-3)
+
+    def test_output_is_emitted_per_block(self):
+        waveform = _waveform((2, 6400))
+        _, pieces = _streamed(waveform, 1.0, fft_size=256, hop_size=64, block_frames=10)
+
+        assert len(pieces) == math.ceil((1 + 6400 // 64) / 10)
+        assert all(piece.shape[-1] <= 10 * 64 for piece in pieces)
+
+    def test_leading_dimensions_are_kept(self):
+        waveform = _waveform((2, 2, 2000))
+        result, _ = _streamed(waveform, 1.5, fft_size=256, hop_size=64, block_frames=8)
+
+        flat = _reference(waveform.reshape(4, -1), 1.5, 256, 64)
+        assert result.shape == (2, 2, flat.shape[-1])
+        np.testing.assert_allclose(result.reshape(4, -1), flat, atol=5e-3)
+
+    @pytest.mark.parametrize("block_frames", [1, 7])
+    def test_phase_locking_matches_reference(self, block_frames):
+        waveform = _waveform((2, 3000))
+        result, _ = _streamed(waveform, 1.3, fft_size=256, hop_size=64, block_frames=block_frames, phase_locking=True)
+
+        np.testing.assert_allclose(result, _reference(waveform, 1.3, 256, 64, lock=True), atol=5e-3)
+        assert np.abs(result - _reference(waveform, 1.3, 256, 64)).max() > 0.05, "locking changes the output"
+
+    def test_invalid_block_frames_raises(self):
+        with pytest.raises(ValueError, match="block_frames"):
+            next(stream_time_shift(MockTensor(_waveform((1, 2000))), 1.5, block_frames=0))
+
+    @pytest.mark.parametrize("rate", [0.75, 1.25])
+    def test_constant_rate_map_matches_fixed_rate(self, rate):
+        waveform = _waveform((2, 4000))
+        rates = MockTensor(np.full(1 + 4000 // 64, rate))
+        result, _ = _streamed(waveform, rates, fft_size=256, hop_size=64, block_frames=7)
+
+        fixed, _ = _streamed(waveform, rate, fft_size=256, hop_size=64, block_frames=7)
+        assert result.shape == fixed.shape
+        np.testing.assert_allclose(result, fixed, atol=1e-4)
+
+    @pytest.mark.parametrize("block_frames", [1, 9])
+    def test_rate_map_matches_reference(self, block_frames):
+        waveform = _waveform((2, 4000))
+        rates = np.linspace(0.7, 1.6, 1 + 4000 // 64)
+        result, _ = _streamed(waveform, MockTensor(rates), fft_size=256, hop_size=64, block_frames=block_frames)
+
+        expected = _reference(waveform, rates, 256, 64)
+        assert result.shape == expected.shape
+        np.testing.assert_allclose(result, expected, atol=5e-3)
+
+    @pytest.mark.parametrize("rates", [np.ones(10), np.r_[np.ones(62), 0.0]], ids=["length", "zero"])
+    def test_invalid_rate_map_raises(self, rates):
+        with pytest.raises(ValueError, match="[Rr]ate map"):
+            next(stream_time_shift(MockTensor(_waveform((1, 4000))), MockTensor(rates), 256, 64))
+
+
+# ===========================================================================
+# rate_map
+# ===========================================================================
+
+
+class TestRateMap:
+    def test_rates_are_interpolated_and_held_at_the_ends(self):
+        times, rates = MockTensor(np.array([1.0, 2.0])), MockTensor(np.array([1.0, 2.0]))
+        result = rate_map(times, rates, frames=400, sample_rate=100, hop_size=50)._data
+
+        assert result.shape == (1 + 400 // 50,)
+        np.testing.assert_allclose(result, [1.0, 1.0, 1.0, 1.5, 2.0, 2.0, 2.0, 2.0, 2.0])
+
+    def test_single_rate_is_constant(self):
+        result = rate_map(MockTensor(np.array([3.0])), MockTensor(np.array([1.25])), 1000, 100, 100)._data
+        np.testing.assert_allclose(result, np.full(11, 1.25))
+
+
+# ===========================================================================
+# time_shift dispatch
+# ===========================================================================
+
+
+class TestTimeShiftStreaming:
+    def test_rate_map_streams_into_one_output(self):
+        waveform = _waveform((2, 2, 3000))
+        rates = np.linspace(0.8, 1.2, 1 + 3000 // 64)
+        result = time_shift(MockTensor(waveform), MockTensor(rates), fft_size=256, hop_size=64)
+
+        flat = _reference(waveform.reshape(4, -1), rates, 256, 64)
+        np.testing.assert_allclose(result._data.reshape(4, -1), flat, atol=5e-3)
+        torchaudio_functional_mock.phase_vocoder.assert_not_called()
+
+    def test_block_frames_streams_into_one_output(self):
+        waveform = _waveform((2, 4000))
+        result = time_shift(MockTensor(waveform), 1.3, fft_size=256, hop_size=64, block_frames=6)
+
+        np.testing.assert_allclose(result._data, _reference(waveform, 1.3, 256, 64), atol=5e-3)
+        torchaudio_functional_mock.phase_vocoder.assert_not_called()
+
+    def test_long_inputs_stream_by_default(self, monkeypatch):
+        monkeypatch.setattr(utils, "STREAM_MIN_FRAMES", 16)
+        calls = []
+
+        def spy(waveform, rate, fft_size, hop_size, win_length, block_frames, phase_locking=False):
+            calls.append(block_frames)
+            return stream_time_shift(waveform, rate, fft_size, hop_size, win_length, block_frames, phase_locking)
+
+        monkeypatch.setattr(utils, "stream_time_shift", spy)
+        time_shift(MockTensor(_waveform((2, 4000))), 1.3, fft_size=256, hop_size=64)
+
+        assert calls == [utils.DEFAULT_BLOCK_FRAMES // 2], "block size is shared by the channels"
+
+    def test_phase_locking_always_streams(self):
+        waveform = _waveform((2, 3000))
+        result = time_shift(MockTensor(waveform), 0.8, fft_size=256, hop_size=64, phase_locking=True)
+
+        np.testing.assert_allclose(result._data, _reference(waveform, 0.8, 256, 64, lock=True), atol=5e-3)
+        torchaudio_functional_mock.phase_vocoder.assert_not_called()
+
+    def test_short_inputs_use_phase_vocoder(self):
+        waveform = _waveform((2, 4000))
+        result = time_shift(MockTensor(waveform), 1.3, fft_size=256, hop_size=64)
+
+        np.testing.assert_allclose(result._data, _reference(waveform, 1.3, 256, 64), atol=5e-3)
+        torchaudio_functional_mock.phase_vocoder.assert_called_once()
+
+
+# ===========================================================================
+# batch_time_shift
+# ===========================================================================
+
+
+class TestBatchTimeShift:
+    RATES = [1.3, 0.8, 1.3]
+
+    def _check_items(self, waveform, output, lengths, rates):
+        for item, rate in enumerate(rates):
+            expected = _reference(waveform[item], rate, 256, 64)
+            assert lengths[item] == expected.shape[-1]
+            np.testing.assert_allclose(output[item, :, : lengths[item]], expected, atol=5e-3)
+            assert not output[item, :, lengths[item] :].any(), "shorter items are zero-padded"
+
+    def test_per_item_rates(self):
+        waveform = _waveform((3, 2, 3000))
+        output, lengths = batch_time_shift(MockTensor(waveform), self.RATES, fft_size=256, hop_size=64)
+
+        assert output.shape == (3, 2, max(lengths))
+        self._check_items(waveform, output._data, lengths, self.RATES)
+
+    def test_one_stft_and_one_vocoder_call_per_rate(self):
+        batch_time_shift(MockTensor(_waveform((3, 2, 3000))), self.RATES, fft_size=256, hop_size=64)
+
+        torch_mock.stft.assert_called_once()
+        assert torch_mock.stft.call_args[0][0].shape == (6, 3000)
+        rates = [call[0][1] for call in torchaudio_functional_mock.phase_vocoder.call_args_list]
+        assert rates == [1.3, 0.8]
+
+    def test_shared_rate(self):
+        waveform = _waveform((2, 1, 3000))
+        output, lengths = batch_time_shift(MockTensor(waveform), 1.5, fft_size=256, hop_size=64)
+
+        assert lengths[0] == lengths[1]
+        self._check_items(waveform, output._data, lengths, [1.5, 1.5])
+        torchaudio_functional_mock.phase_vocoder.assert_called_once()
+
+    def test_streamed_per_item_rates(self):
+        waveform = _waveform((3, 2, 3000))
+        output, lengths = batch_time_shift(MockTensor(waveform), self.RATES, fft_size=256, hop_size=64, block_frames=7)
+
+        self._check_items(waveform, output._data, lengths, self.RATES)
+        torchaudio_functional_mock.phase_vocoder.assert_not_called()
+
+    def test_time_shift_accepts_batches(self):
+        waveform = _waveform((3, 2, 3000))
+        result = time_shift(MockTensor(waveform), self.RATES, fft_size=256, hop_size=64)
+
+        self._check_items(
+            waveform, result._data, batch_time_shift(MockTensor(waveform), self.RATES, 256)[1], self.RATES
+        )
+
+    def test_rate_count_must_match_batch(self):
+        with pytest.raises(ValueError, match="one rate per batch item"):
+            batch_time_shift(MockTensor(_waveform((3, 2, 3000))), [1.0, 2.0])
+
+
+# ===========================================================================
+# wsola_time_shift
+# ===========================================================================
+
+
+class TestWsolaTimeShift:
+    def test_unit_rate_reconstructs_input(self):
+        waveform = _waveform((2, 3000))
+        result = wsola_time_shift(MockTensor(waveform), 1.0, frame_size=256)
+
+        np.testing.assert_allclose(result._data, waveform, atol=1e-5)
+
+    @pytest.mark.parametrize("rate", [0.7, 1.6])
+    def test_periodic_signal_stays_in_phase(self, rate):
+        t = np.arange(4000)
+        waveform = np.sin(2 * np.pi * t / 50)[None].astype(np.float32)
+        result = wsola_time_shift(MockTensor(waveform), rate, frame_size=256)._data
+
+        assert result.shape == (1, math.ceil(4000 / rate))
+        expected = np.sin(2 * np.pi * np.arange(result.shape[-1]) / 50)[None]
+        # The last frame reads past the end of the input.
+        np.testing.assert_allclose(result[:, :-256], expected[:, :-256], atol=0.05)
+
+    def test_channels_share_offsets_and_leading_dimensions_are_kept(self):
+        mono = _waveform((2, 1, 3000))
+        result = wsola_time_shift(MockTensor(np.concatenate([mono, 2 * mono], axis=1)), 1.4, frame_size=128)._data
+
+        assert result.shape == (2, 2, math.ceil(3000 / 1.4))
+        np.testing.assert_allclose(result[:, 1], 2 * result[:, 0], rtol=1e-5, atol=1e-6)
+
+    @pytest.mark.parametrize("rate", [0.7, 1.6])
+    @pytest.mark.parametrize("block_frames", [1, 2, 5])
+    def test_blocks_match_single_pass(self, rate, block_frames):
+        waveform = _waveform((2, 2, 3000))
+        reference = wsola_time_shift(MockTensor(waveform), rate, frame_size=128, block_frames=1000)._data
+        result = wsola_time_shift(MockTensor(waveform), rate, frame_size=128, block_frames=block_frames)._data
+
+        np.testing.assert_allclose(result, reference, rtol=1e-5, atol=1e-6)
+
+    @pytest.mark.parametrize(
+        ("frame_size", "tolerance", "block_frames"), [(255, None, 8), (0, None, 8), (256, -1, 8), (256, None, 0)]
+    )
+    def test_invalid_parameters_raise(self, frame_size, tolerance, block_frames):
+        with pytest.raises(ValueError):
+            wsola_time_shift(
+                MockTensor(_waveform((1, 1000))),
+                1.2,
+                frame_size=frame_size,
+                tolerance=tolerance,
+                block_frames=block_frames,
+            )